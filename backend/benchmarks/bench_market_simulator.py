@@ -0,0 +1,55 @@
+"""
+Бенчмарк: синтетический рынок и прием тиков
+
+Генерирует пакеты тиков MarketSimulator для тысяч монет и прогоняет их через
+MarketIngest (версии данных, последние цены, потребители). Показывает скорость
+генерации и приема в тиках в секунду.
+
+Запуск из каталога backend:
+    python benchmarks/bench_market_simulator.py --symbols 5000 --steps 200 --batches 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("COINMARKETCAP_API_KEY", "benchmark")
+
+from src.analysis_cache import DataVersionRegistry  # noqa: E402
+from src.market_ingest import MarketIngest  # noqa: E402
+from src.market_simulator import MarketSimulator  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=200, help="Шагов времени в пакете")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    simulator = MarketSimulator([f"SIM{i}" for i in range(args.symbols)], seed=args.seed)
+    ingest = MarketIngest(DataVersionRegistry())
+
+    generate_seconds = 0.0
+    ingest_seconds = 0.0
+    ticks = 0
+    for _ in range(args.batches):
+        started = time.perf_counter()
+        batch = simulator.step(args.steps)
+        generated = time.perf_counter()
+        ticks += ingest.ingest(batch)
+        generate_seconds += generated - started
+        ingest_seconds += time.perf_counter() - generated
+
+    total = generate_seconds + ingest_seconds
+    print(f"монет: {args.symbols}, шагов в пакете: {args.steps}, пакетов: {args.batches}, тиков: {ticks:,}")
+    print(f"генерация: {generate_seconds:.3f} с ({ticks / generate_seconds / 1e6:.2f} млн тиков/с)")
+    print(f"прием:     {ingest_seconds:.3f} с ({ticks / ingest_seconds / 1e6:.2f} млн тиков/с)")
+    print(f"итого:     {total:.3f} с ({ticks / total / 1e6:.2f} млн тиков/с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Бенчмарк: поддержка/сопротивление и стохастик
+
+Сравнивает прежние O(n * window) реализации (проверка соседей через all(),
+max()/min() по каждому срезу) с O(n) версиями на скользящих экстремумах.
+
+Запуск из каталога backend:
+    python benchmarks/bench_support_resistance.py --points 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.rolling import rolling_max, rolling_min, sliding_extreme  # noqa: E402
+from src.technical_analysis import TechnicalAnalyzer  # noqa: E402
+
+
+def naive_pivots(prices, window):
+    """Прежний алгоритм поиска локальных экстремумов"""
+    support, resistance = [], []
+    for i in range(window, len(prices) - window):
+        current = prices[i]
+        left = prices[i - window:i]
+        right = prices[i + 1:i + window + 1]
+        if all(current <= p for p in left) and all(current <= p for p in right):
+            support.append(current)
+        if all(current >= p for p in left) and all(current >= p for p in right):
+            resistance.append(current)
+    return support, resistance
+
+
+def linear_pivots(prices, window):
+    """Локальные экстремумы через центрированные скользящие min/max"""
+    values = np.asarray(prices, dtype=float)
+    center = values[window:len(values) - window]
+    return (
+        center[center == rolling_min(values, 2 * window + 1)].tolist(),
+        center[center == rolling_max(values, 2 * window + 1)].tolist(),
+    )
+
+
+def naive_stochastic_k(prices, highs, lows, k_period):
+    """Прежний %K: max()/min() по каждому окну"""
+    values = []
+    for i in range(k_period - 1, len(prices)):
+        highest = max(highs[i - k_period + 1:i + 1])
+        lowest = min(lows[i - k_period + 1:i + 1])
+        values.append(50 if highest == lowest else (prices[i] - lowest) / (highest - lowest) * 100)
+    return values
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000, help="Длина ряда")
+    parser.add_argument("--window", type=int, default=20, help="Окно поддержки/сопротивления")
+    parser.add_argument("--k-period", type=int, default=14, help="Период %K стохастика")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # Округление дает равные соседние значения - проверяем и обработку равенств
+    prices_array = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, args.points))), 2)
+    prices = prices_array.tolist()
+    highs = (prices_array * 1.005).tolist()
+    lows = (prices_array * 0.995).tolist()
+
+    print(f"Ряд: {args.points:,} точек, окно S/R: {args.window}, период %K: {args.k_period}\n")
+    rows = []
+
+    naive, t_naive = timed(naive_pivots, prices, args.window)
+    linear, t_linear = timed(linear_pivots, prices, args.window)
+    assert naive == linear, "Уровни расходятся"
+    rows.append(("S/R экстремумы: all() по соседям", t_naive))
+    rows.append(("S/R экстремумы: ван Херк (numpy)", t_linear))
+
+    _, t_full = timed(TechnicalAnalyzer.get_support_resistance, prices, args.window)
+    rows.append(("S/R + кластеризация уровней", t_full))
+
+    naive_k, t_naive_k = timed(naive_stochastic_k, prices, highs, lows, args.k_period)
+    stochastic, t_k = timed(TechnicalAnalyzer.calculate_stochastic, prices, highs, lows, args.k_period)
+    assert np.allclose(naive_k, stochastic["k"]), "%K расходится"
+    rows.append(("%K: max()/min() по срезам", t_naive_k))
+    rows.append(("%K + %D: ван Херк (numpy)", t_k))
+
+    _, t_deque = timed(sliding_extreme, prices, args.k_period, "max")
+    rows.append(("Скользящий max: монотонная дека (Python)", t_deque))
+
+    width = max(len(name) for name, _ in rows)
+    for name, seconds in rows:
+        print(f"{name:<{width}}  {seconds * 1000:10.1f} ms")
+
+    print(f"\nУскорение S/R: x{t_naive / t_linear:.1f}, %K: x{t_naive_k / t_k:.1f}")
+    print(f"Уровней до кластеризации: {len(linear[0]) + len(linear[1]):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Бенчмарк: таймеры heartbeat соединений
+
+Сравнивает три способа держать по таймеру на соединение: задача с asyncio.sleep
+на каждое соединение, loop.call_later на каждое и иерархическое колесо таймеров
+(TimerWheel). Показывает память на таймеры, время постановки и время CPU на цикл,
+в котором каждый таймер срабатывает и ставится заново (как heartbeat).
+
+Запуск из каталога backend:
+    python benchmarks/bench_timer_wheel.py --timers 100000 --interval 2 --cycles 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.timer_wheel import TimerWheel  # noqa: E402
+
+
+async def run_tasks(count, interval, cycles):
+    fired = 0
+
+    async def heartbeat():
+        nonlocal fired
+        for _ in range(cycles):
+            await asyncio.sleep(interval)
+            fired += 1
+
+    started = time.process_time()
+    tasks = [asyncio.create_task(heartbeat()) for _ in range(count)]
+    await asyncio.sleep(0)
+    schedule = time.process_time() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    await asyncio.gather(*tasks)
+    return schedule, memory, fired
+
+
+async def run_call_later(count, interval, cycles):
+    loop = asyncio.get_event_loop()
+    fired = 0
+    done = asyncio.Event()
+
+    def heartbeat(remaining):
+        nonlocal fired
+        fired += 1
+        if remaining > 1:
+            loop.call_later(interval, heartbeat, remaining - 1)
+        elif fired == count * cycles:
+            done.set()
+
+    started = time.process_time()
+    for _ in range(count):
+        loop.call_later(interval, heartbeat, cycles)
+    schedule = time.process_time() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    await done.wait()
+    return schedule, memory, fired
+
+
+async def run_wheel(count, interval, cycles, tick):
+    wheel = TimerWheel(tick)
+    fired = 0
+    done = asyncio.Event()
+
+    def heartbeat(remaining):
+        nonlocal fired
+        fired += 1
+        if remaining > 1:
+            wheel.schedule(interval, heartbeat, remaining - 1)
+        elif fired == count * cycles:
+            done.set()
+
+    started = time.process_time()
+    for _ in range(count):
+        wheel.schedule(interval, heartbeat, cycles)
+    schedule = time.process_time() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    await done.wait()
+    return schedule, memory, fired
+
+
+async def measure(name, factory, count, cycles):
+    """Память - в прогоне под tracemalloc, время - в отдельном прогоне без него"""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    _, memory, _ = await factory()
+    tracemalloc.stop()
+
+    started = time.process_time()
+    schedule, _, fired = await factory()
+    total = time.process_time() - started
+    assert fired == count * cycles, (name, fired)
+    print(f"  {name:<18}{(memory - base) / count:>12.0f}{schedule * 1000:>16.1f}{(total - schedule) / cycles * 1000:>16.1f}")
+
+
+async def run(args):
+    count, interval, cycles = args.timers, args.interval, args.cycles
+    print(f"таймеров: {count}, интервал: {interval} с, циклов: {cycles}, шаг колеса: {args.tick} с")
+    print(f"  {'способ':<18}{'байт/таймер':>12}{'постановка, мс':>16}{'CPU/цикл, мс':>16}")
+    await measure("задачи + sleep", lambda: run_tasks(count, interval, cycles), count, cycles)
+    await measure("loop.call_later", lambda: run_call_later(count, interval, cycles), count, cycles)
+    await measure("TimerWheel", lambda: run_wheel(count, interval, cycles, args.tick), count, cycles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--timers", type=int, default=100000)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--tick", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Бенчмарк: сериализация WebSocket рассылки
+
+Сравнивает сериализацию на каждое соединение (json.dumps для каждого подписчика)
+с общей сериализацией: тема хаба кодируется один раз на публикацию, цены по
+подпискам - один раз на различный набор монет. Показывает время CPU на цикл
+рассылки и число сериализаций.
+
+Запуск из каталога backend:
+    python benchmarks/bench_websocket_fanout.py --clients 10000 --symbols 100 --subscriptions 5 --cycles 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("COINMARKETCAP_API_KEY", "benchmark")
+
+from loguru import logger  # noqa: E402
+
+from src.pubsub import PubSubHub  # noqa: E402
+from src.websocket_manager import WebSocketManager  # noqa: E402
+
+
+class NullWebSocket:
+    """Соединение без сети: бенчмарк измеряет только подготовку сообщений"""
+
+    scope = {"subprotocols": []}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, message: str):
+        pass
+
+
+def prices_message(symbols):
+    """Сообщение темы prices: топ монет, как у StreamService.prices_message"""
+    return {
+        "type": "crypto_prices",
+        "data": [
+            {
+                "id": index, "symbol": symbol, "name": f"Coin {symbol}", "price": random.uniform(0.01, 50000),
+                "market_cap": random.uniform(1e6, 1e12), "volume_24h": random.uniform(1e5, 1e10),
+                "percent_change_24h": random.uniform(-10, 10), "last_updated": "2024-01-01T00:00:00.000Z",
+            }
+            for index, symbol in enumerate(symbols[:10])
+        ],
+        "timestamp": "2024-01-01T00:00:00.000Z",
+    }
+
+
+async def bench_topic(clients, cycles, symbols):
+    """Тема хаба: одна строка на публикацию против json.dumps на подписчика"""
+    manager = WebSocketManager(max_queue=cycles + 2)
+    hub = PubSubHub()
+    hub.register("prices", lambda argument: asyncio.sleep(3600), 3600)
+    sockets = [NullWebSocket() for _ in range(clients)]
+    for websocket in sockets:
+        await manager.connect(websocket)
+
+    def subscriber(websocket):
+        async def deliver(payload):
+            manager.enqueue(websocket, payload, key="prices")
+        return deliver
+
+    for websocket in sockets:
+        await hub.subscribe(id(websocket), subscriber(websocket), "prices")
+
+    messages = [prices_message(symbols) for _ in range(cycles)]
+
+    started = time.process_time()
+    for message in messages:
+        for websocket in sockets:
+            manager.enqueue(websocket, json.dumps(message), key="prices")
+    per_client = (time.process_time() - started) / cycles
+
+    started = time.process_time()
+    for message in messages:
+        await hub.publish("prices", message)
+    shared = (time.process_time() - started) / cycles
+
+    await hub.close()
+    for websocket in sockets:
+        manager.disconnect(websocket)
+    return per_client, shared
+
+
+async def bench_subscriptions(clients, cycles, symbols, subscriptions):
+    """Цены по подпискам: сообщение на соединение против сообщения на набор монет"""
+    manager = WebSocketManager(max_queue=cycles + 2)
+    sockets = [NullWebSocket() for _ in range(clients)]
+    popular = symbols[:max(subscriptions * 4, 1)]
+    for websocket in sockets:
+        await manager.connect(websocket)
+        manager.subscribe(websocket, random.sample(popular, subscriptions))
+
+    updates = [
+        {symbol: {"price": random.uniform(0.01, 50000), "time": cycle} for symbol in symbols}
+        for cycle in range(cycles)
+    ]
+
+    started = time.process_time()
+    for update in updates:
+        timestamp = asyncio.get_event_loop().time()
+        for websocket in sockets:
+            subscribed = manager.registry.subscriptions[websocket]
+            data = {symbol: value for symbol, value in update.items() if symbol in subscribed}
+            if data:
+                manager.enqueue(websocket, json.dumps({
+                    "type": "price_update", "data": data, "timestamp": timestamp
+                }), "price_update")
+    per_client = (time.process_time() - started) / cycles
+
+    started = time.process_time()
+    for update in updates:
+        manager.publish_prices(update)
+    shared = (time.process_time() - started) / cycles
+    groups = len(manager.registry.fan_out(updates[-1]))
+
+    for websocket in sockets:
+        manager.disconnect(websocket)
+    return per_client, shared, groups
+
+
+async def run(args):
+    random.seed(args.seed)
+    symbols = [f"SIM{i}" for i in range(args.symbols)]
+
+    per_client, shared = await bench_topic(args.clients, args.cycles, symbols)
+    print(f"клиентов: {args.clients}, циклов: {args.cycles}")
+    print("тема prices (одно сообщение всем подписчикам):")
+    print(f"  на соединение: {per_client * 1000:8.2f} мс CPU/цикл, сериализаций: {args.clients}")
+    print(f"  общая:         {shared * 1000:8.2f} мс CPU/цикл, сериализаций: 1 ({per_client / shared:.1f}x)")
+
+    per_client, shared, groups = await bench_subscriptions(args.clients, args.cycles, symbols, args.subscriptions)
+    print(f"цены по подпискам ({args.subscriptions} монет у клиента из {args.symbols}):")
+    print(f"  на соединение: {per_client * 1000:8.2f} мс CPU/цикл, сериализаций: {args.clients}")
+    print(f"  общая:         {shared * 1000:8.2f} мс CPU/цикл, сериализаций: {groups} ({per_client / shared:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--subscriptions", type=int, default=3, help="Монет в подписке клиента")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logger.remove()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
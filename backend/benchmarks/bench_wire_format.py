@@ -0,0 +1,121 @@
+"""
+Бенчмарк: форматы и сжатие WebSocket сообщений
+
+Для типичных сообщений рассылки (топ цен со статистиками, дельта, цены по подпискам)
+сравнивает форматы JSON и MessagePack: байты сообщения, байты на проводе после
+permessage-deflate (с контекстом между сообщениями и без) и время сериализации
+и сжатия одного сообщения.
+
+Запуск из каталога backend:
+    python benchmarks/bench_wire_format.py --coins 100 --messages 50 --level 6
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("COINMARKETCAP_API_KEY", "benchmark")
+
+from src.delta import diff  # noqa: E402
+from src.wire_format import ENCODERS  # noqa: E402
+
+# Хвост сброса deflate, который permessage-deflate не передает
+EMPTY_BLOCK = b"\x00\x00\xff\xff"
+
+
+def price_records(coins, step, moving=0.1):
+    """Записи цен как у CryptoPrice.dict() на шаге `step`: за шаг меняется доля `moving` монет"""
+    rng = random.Random(step)
+    records = []
+    for index in range(coins):
+        moved = rng.random() < moving
+        records.append({
+            "id": index + 1,
+            "symbol": f"SIM{index}",
+            "name": f"Simulated {index}",
+            "price": 100.0 / (index + 1) * (1 + rng.gauss(0, 0.002) if moved else 1),
+            "market_cap": 1e9 / (index + 1),
+            "volume_24h": 1e7 / (index + 1) * (1 + rng.random() if moved else 1),
+            "percent_change_24h": rng.gauss(0, 3) if moved else 0.5,
+            "last_updated": "2024-01-01T00:00:00.000Z",
+        })
+    return records
+
+
+def message_series(kind, coins, count):
+    """Последовательность сообщений одного вида, как их получает одно соединение"""
+    messages = []
+    previous = None
+    for step in range(count):
+        records = price_records(coins, step)
+        full = {
+            "type": "crypto_prices",
+            "data": records,
+            "stats": {
+                record["symbol"]: {"high": record["price"] * 1.05, "low": record["price"] * 0.95} for record in records
+            },
+            "timestamp": f"2024-01-01T00:{step // 60 % 60:02d}:{step % 60:02d}.000Z",
+        }
+        if kind == "prices":
+            messages.append(full)
+        elif kind == "delta":
+            if previous is not None:
+                changes = diff(previous, full, 1e-5)
+                messages.append({"type": "delta", "topic": "prices", "seq": step, "changes": changes})
+            previous = full
+        elif kind == "price_update":
+            messages.append({
+                "type": "price_update",
+                "data": {record["symbol"]: {"price": record["price"], "time": 1704067200000 + step} for record in records},
+                "timestamp": 1000.0 + step,
+            })
+    return messages
+
+
+def wire_bytes(encoded, level, window_bits, context_takeover):
+    """Байты после permessage-deflate и время сжатия на сообщение"""
+    total = 0
+    encoder = zlib.compressobj(level, zlib.DEFLATED, -window_bits)
+    started = time.perf_counter()
+    for data in encoded:
+        if not context_takeover:
+            encoder = zlib.compressobj(level, zlib.DEFLATED, -window_bits)
+        compressed = encoder.compress(data) + encoder.flush(zlib.Z_SYNC_FLUSH)
+        if compressed.endswith(EMPTY_BLOCK):
+            compressed = compressed[:-4]
+        total += len(compressed)
+    return total / len(encoded), (time.perf_counter() - started) / len(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--coins", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--level", type=int, default=6, help="Уровень zlib")
+    parser.add_argument("--window-bits", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"монет: {args.coins}, сообщений: {args.messages}, zlib: уровень {args.level}, окно {args.window_bits} бит")
+    print(f"{'сообщение':<14}{'формат':<9}{'байт':>9}{'сериал., мкс':>14}"
+          f"{'deflate':>10}{'без контекста':>15}{'сжатие, мкс':>13}")
+    for kind in ("prices", "delta", "price_update"):
+        messages = message_series(kind, args.coins, args.messages)
+        for format, encoder in ENCODERS.items():
+            started = time.perf_counter()
+            encoded = [encoder(message) for message in messages]
+            encode_seconds = (time.perf_counter() - started) / len(messages)
+            encoded = [data.encode() if isinstance(data, str) else data for data in encoded]
+
+            size = sum(map(len, encoded)) / len(encoded)
+            deflated, compress_seconds = wire_bytes(encoded, args.level, args.window_bits, True)
+            fresh, _ = wire_bytes(encoded, args.level, args.window_bits, False)
+            print(f"{kind:<14}{format:<9}{size:>9.0f}{encode_seconds * 1e6:>14.1f}"
+                  f"{deflated:>10.0f}{fresh:>15.0f}{compress_seconds * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ FastAPI Crypto Analytics API - Entry Point
 
 import uvicorn
 from src.config import settings
+from src.ws_compression import CompressedWebSocketProtocol
 from loguru import logger
 
 if __name__ == "__main__":
@@ -16,5 +17,10 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level="info"
+        log_level="info",
+        # Формат и сжатие WebSocket: подпротоколы json/msgpack, permessage-deflate с порогом
+        ws=CompressedWebSocketProtocol,
+        ws_per_message_deflate=settings.ws_deflate_enabled,
+        # Heartbeat ведет WebSocketManager на колесе таймеров: keepalive-задача на соединение не нужна
+        ws_ping_interval=None if settings.ws_heartbeat_interval > 0 else 20.0
     ) 
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Analysis Cache
+Кэш результатов технического анализа, привязанный к версии данных монеты
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from loguru import logger
+
+from .config import settings
+from .metrics import record_analysis_cache_lookup
+
+
+class DataVersionRegistry:
+    """
+    Версии данных по монетам
+
+    Как работает:
+    1. Источники данных сообщают о новых тиках через `observe` или `bump`
+    2. Если маркер тика (время обновления, цена) изменился - версия монеты растет
+    3. Вместе с версией монеты растет версия всего рынка (`MARKET`) - для
+       результатов, зависящих от многих монет (скринер, корреляции)
+    4. Подписчики (кэши) получают уведомление и сбрасывают устаревшие записи
+    5. ID и slug монеты (`alias`) разрешаются в ее символ: у запросов по любому
+       из имен одна версия данных
+    """
+
+    # Псевдо-монета: версия меняется при новом тике любой монеты
+    MARKET = "*"
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._markers: Dict[str, Hashable] = {}
+        # ID/slug -> символ
+        self._aliases: Dict[str, str] = {}
+        self._listeners = []
+
+    def _normalize(self, coin: str) -> str:
+        coin = str(coin).upper()
+        return self._aliases.get(coin, coin)
+
+    def resolve(self, coin: str) -> str:
+        """Символ монеты по символу, ID или slug"""
+        return self._normalize(coin)
+
+    def alias(self, name: Any, symbol: str):
+        """Регистрация другого имени монеты (ID, slug)"""
+        name, symbol = str(name).upper(), str(symbol).upper()
+        if name and name != symbol:
+            self._aliases[name] = symbol
+
+    def version(self, coin: str) -> int:
+        """Текущая версия данных монеты"""
+        return self._versions.get(self._normalize(coin), 0)
+
+    def bump(self, coin: str) -> int:
+        """Принудительное увеличение версии (пришли новые данные)"""
+        coin = self._normalize(coin)
+        version = self._versions.get(coin, 0) + 1
+        self._versions[coin] = version
+        market_version = self._versions.get(self.MARKET, 0) + 1
+        self._versions[self.MARKET] = market_version
+        for listener in self._listeners:
+            listener(coin, version)
+            listener(self.MARKET, market_version)
+        return version
+
+    def observe(self, coin: str, marker: Hashable) -> int:
+        """Регистрация тика: версия растет, только если маркер изменился"""
+        coin = self._normalize(coin)
+        if self._markers.get(coin) == marker:
+            return self._versions.get(coin, 0)
+        self._markers[coin] = marker
+        return self.bump(coin)
+
+    def add_listener(self, listener: Callable[[str, int], None]):
+        """Подписка на изменение версии монеты"""
+        self._listeners.append(listener)
+
+
+class AnalysisCache:
+    """
+    LRU-кэш результатов анализа
+
+    Ключ: (символ, дни, набор индикаторов, версия данных, запрошенное имя).
+    - Ограничен по числу записей, вытеснение - по давности использования
+    - Записи монеты удаляются сразу при смене ее версии данных
+    - Дополнительно записи живут не дольше `ttl` секунд (интервал обновления)
+    """
+
+    def __init__(self, versions: DataVersionRegistry, max_entries: int = 1024, ttl: float = 60.0):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # ключ -> (значение, время вычисления, момент сохранения)
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, float]]" = OrderedDict()
+        self._keys_by_coin: Dict[str, Set[Tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        versions.add_listener(self._on_version_change)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def make_key(self, coin: str, days: int, selection: Hashable) -> Tuple:
+        # Запись учитывается под символом: запросы по ID/slug сбрасываются вместе с ним
+        name = str(coin).upper()
+        symbol = self.versions.resolve(name)
+        return (symbol, days, selection, self.versions.version(symbol), name)
+
+    def get(self, key: Tuple) -> Optional[Tuple[Any, float]]:
+        """Значение и сэкономленное время вычисления или None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, compute_seconds, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value, compute_seconds
+
+    def put(self, key: Tuple, value: Any, compute_seconds: float):
+        """Сохранение результата с вытеснением самых старых записей"""
+        self._entries[key] = (value, compute_seconds, time.monotonic())
+        self._entries.move_to_end(key)
+        self._keys_by_coin.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate(self, coin: str):
+        """Удаление всех записей монеты"""
+        for key in list(self._keys_by_coin.pop(self.versions.resolve(coin), ())):
+            self._entries.pop(key, None)
+
+    async def get_or_compute(
+        self,
+        coin: str,
+        days: int,
+        selection: Hashable,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Результат из кэша или вычисление через `compute` с сохранением
+        """
+        key = self.make_key(coin, days, selection)
+        cached = self.get(key)
+        if cached is not None:
+            value, saved_seconds = cached
+            self.hits += 1
+            record_analysis_cache_lookup(True, saved_seconds, self.hit_ratio, len(self))
+            return value
+
+        self.misses += 1
+        started = time.perf_counter()
+        value = await compute()
+        # Вычисление само могло получить новые тики: результат соответствует версии после него
+        self.put(self.make_key(coin, days, selection), value, time.perf_counter() - started)
+        record_analysis_cache_lookup(False, 0.0, self.hit_ratio, len(self))
+        return value
+
+    def _remove(self, key: Tuple):
+        self._entries.pop(key, None)
+        keys = self._keys_by_coin.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_coin[key[0]]
+
+    def _on_version_change(self, coin: str, version: int):
+        if coin in self._keys_by_coin:
+            logger.debug(f"Новые данные для {coin} (версия {version}), сброс кэша анализа")
+            self.invalidate(coin)
+
+
+# Глобальные экземпляры: версии данных, кэш результатов анализа и кэш бэктестов
+data_versions = DataVersionRegistry()
+analysis_cache = AnalysisCache(data_versions, settings.analysis_cache_size, settings.analysis_cache_ttl)
+backtest_cache = AnalysisCache(data_versions, settings.backtest_cache_size, settings.analysis_cache_ttl)
@@ -0,0 +1,123 @@
+"""
+Analysis Executor
+Вынос CPU-тяжелого технического анализа из event loop в пул потоков или процессов
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .exceptions import ServiceOverloadedError
+from .metrics import observe_analysis_job, set_analysis_queue_depth, record_analysis_rejected
+
+EXECUTOR_KINDS = ("thread", "process")
+
+# Описание массива в разделяемой памяти: (имя сегмента, форма, dtype)
+SharedArrayRef = Tuple[str, Tuple[int, ...], str]
+
+
+def _timed_call(func: Callable, *args) -> Tuple[float, float, Any]:
+    """Выполнение задачи с фиксацией момента старта и длительности (внутри воркера)"""
+    started_at = time.time()
+    started = time.perf_counter()
+    result = func(*args)
+    return started_at, time.perf_counter() - started, result
+
+
+def _call_with_shared_array(func: Callable, ref: SharedArrayRef, *args) -> Any:
+    """Подключение к разделяемой памяти в процессе-воркере и вызов задачи без копирования"""
+    name, shape, dtype = ref
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        # Результат не должен ссылаться на буфер: сегмент закрывается сразу после вызова
+        return func(np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf), *args)
+    finally:
+        segment.close()
+
+
+class AnalysisExecutor:
+    """
+    Исполнитель задач технического анализа
+
+    Как работает:
+    1. Задача отправляется в пул потоков или процессов (настройка `analysis_executor`)
+    2. Количество задач в очереди и в работе ограничено `max_queue`:
+       при переполнении запрос сразу получает 503, а не копится в памяти
+    3. Для пула процессов массивы NumPy передаются через разделяемую память
+       (воркер видит тот же буфер, без сериализации данных)
+    4. Время ожидания в очереди и время выполнения пишутся в метрики
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Неизвестный тип исполнителя '{kind}', допустимо: {', '.join(EXECUTOR_KINDS)}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def start(self):
+        """Создание пула (лениво при первой задаче или явно при запуске приложения)"""
+        if self._executor is None:
+            pool_class = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self._executor = pool_class(max_workers=self.max_workers)
+            logger.info(f"⚙️ Пул анализа запущен: {self.kind}, воркеров: {self.max_workers}, очередь: {self.max_queue}")
+
+    def shutdown(self):
+        """Остановка пула"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("⚙️ Пул анализа остановлен")
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Выполнение `func(*args)` в пуле
+
+        Аргументы и результат для пула процессов должны сериализоваться (pickle).
+        """
+        if self.pending >= self.max_queue:
+            record_analysis_rejected(self.kind)
+            raise ServiceOverloadedError("analysis", self.max_queue)
+
+        self.start()
+        self.pending += 1
+        set_analysis_queue_depth(self.kind, self.pending)
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, duration, result = await loop.run_in_executor(
+                self._executor, partial(_timed_call, func, *args)
+            )
+            observe_analysis_job(self.kind, max(started_at - submitted_at, 0.0), duration)
+            return result
+        finally:
+            self.pending -= 1
+            set_analysis_queue_depth(self.kind, self.pending)
+
+    async def run_array(self, func: Callable, array: np.ndarray, *args) -> Any:
+        """
+        Выполнение `func(array, *args)`
+
+        В пуле процессов массив копируется один раз в разделяемую память,
+        в пуле потоков передается как есть.
+        """
+        if self.kind != "process":
+            return await self.run(func, array, *args)
+
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        try:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            ref: SharedArrayRef = (segment.name, array.shape, array.dtype.str)
+            return await self.run(_call_with_shared_array, func, ref, *args)
+        finally:
+            segment.close()
+            segment.unlink()
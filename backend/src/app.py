@@ -8,10 +8,15 @@ from .config import settings
 from .middleware.logging import LoggingMiddleware, ErrorLoggingMiddleware, PerformanceMiddleware
 
 # Импорт роутеров
-from .routers import base, crypto, technical, websocket
+from .routers import base, crypto, technical, websocket, alerts
 
 # Импорт обработчиков ошибок
 from .exceptions import CryptoAPIException, raise_http_exception
+from .dependencies import (
+    get_analysis_executor, get_indicator_materializer, get_simulated_client, get_alert_engine, get_websocket_manager,
+    get_market_stats, get_snapshot_store, get_pubsub_hub, get_price_stream, get_backplane
+)
+from .validators import validate_api_key
 
 # Настройка логирования
 logs_dir = "logs"
@@ -47,6 +52,7 @@ app.include_router(base.router)
 app.include_router(crypto.router)
 app.include_router(technical.router)
 app.include_router(websocket.router)
+app.include_router(alerts.router)
 
 # Глобальный обработчик исключений
 @app.exception_handler(CryptoAPIException)
@@ -61,6 +67,10 @@ async def global_exception_handler(request, exc: Exception):
     logger.error(f"Неожиданная ошибка: {str(exc)}")
     return HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
+def has_data_source() -> bool:
+    """Есть ли источник данных для фоновых задач: симулятор или настроенный API ключ"""
+    return settings.data_source == "simulator" or validate_api_key(settings.coinmarketcap_api_key)
+
 @app.on_event("startup")
 async def startup_event():
     """Инициализация при запуске"""
@@ -69,6 +79,34 @@ async def startup_event():
     logger.info(f"🌐 Хост: {settings.host}:{settings.port}")
     logger.info(f"🔧 Режим отладки: {settings.debug}")
     
+    # Запуск пула вычислений технического анализа
+    get_analysis_executor().start()
+    
+    # Скользящие статистики по тикам
+    get_market_stats().start()
+    
+    # Шина между процессами: темы WebSocket и адресные сообщения клиентам любого воркера
+    await get_backplane().start()
+    await get_websocket_manager().attach_backplane(get_backplane())
+    
+    # Ценовые алерты: проверка каждого пакета тиков и адресная доставка по WebSocket
+    get_alert_engine().start(get_websocket_manager())
+    
+    # Цены по подпискам на монеты: только подписчикам обновившихся монет
+    get_price_stream().start(get_websocket_manager())
+    
+    # Синтетический рынок: тики идут в общий прием данных
+    if settings.data_source == "simulator":
+        get_simulated_client().start()
+    
+    # Фоновая материализация индикаторов топ-N монет (нужен источник данных)
+    if settings.materializer_enabled and has_data_source():
+        get_indicator_materializer().start()
+    
+    # Архив снимков листинга для запросов на момент времени
+    if settings.snapshot_enabled and has_data_source():
+        get_snapshot_store().start()
+    
     # Проверка API ключа
     if not settings.coinmarketcap_api_key or settings.coinmarketcap_api_key == "your_api_key_here":
         logger.warning("⚠️ API ключ CoinMarketCap не настроен!")
@@ -80,4 +118,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Очистка при завершении"""
-    logger.info("🛑 Остановка Crypto Analytics API") 
\ No newline at end of file
+    logger.info("🛑 Остановка Crypto Analytics API")
+    if settings.materializer_enabled and has_data_source():
+        await get_indicator_materializer().stop()
+    if settings.snapshot_enabled and has_data_source():
+        await get_snapshot_store().stop()
+    if has_data_source():
+        await get_pubsub_hub().close()
+    await get_websocket_manager().detach_backplane()
+    get_websocket_manager().wheel.stop()
+    await get_backplane().stop()
+    if settings.data_source == "simulator":
+        await get_simulated_client().stop()
+    await get_alert_engine().stop()
+    get_price_stream().stop()
+    get_market_stats().stop()
+    get_analysis_executor().shutdown() 
\ No newline at end of file
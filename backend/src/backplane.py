@@ -0,0 +1,241 @@
+"""
+Backplane
+Шина между процессами (воркерами uvicorn, подами) для WebSocket-рассылки:
+каналы публикаций с порядком внутри канала и аренда лидерства источников тем
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as aioredis
+from loguru import logger
+
+Message = Dict[str, Any]
+Handler = Callable[[Message], Awaitable[None]]
+
+
+def worker_id() -> str:
+    """Уникальный ID процесса: хост, PID и случайный суффикс"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Backplane:
+    """
+    Интерфейс шины
+
+    Гарантии:
+    - сообщения одного канала доставляются всем процессам в порядке публикации
+      (у темы один публикующий - владелец аренды)
+    - аренда `acquire` принадлежит не больше чем одному владельцу до истечения ttl
+    """
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: Message, retain: bool = False):
+        """Публикация во все процессы (`retain` - запомнить как последнее сообщение канала)"""
+        raise NotImplementedError
+
+    async def last(self, channel: str) -> Optional[Message]:
+        """Последнее сохраненное сообщение канала (для подписчиков, пришедших позже)"""
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, handler: Handler):
+        """Подписка процесса на канал (один обработчик на канал)"""
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str):
+        raise NotImplementedError
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Захват или продление аренды; True - аренда у `owner`"""
+        raise NotImplementedError
+
+    async def release(self, name: str, owner: str):
+        """Освобождение аренды, если она все еще у `owner`"""
+        raise NotImplementedError
+
+
+class InMemoryBackplane(Backplane):
+    """
+    Шина одного процесса
+
+    Публикация сразу вызывает обработчик канала: порядок - порядок вызовов publish.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+        self._retained: Dict[str, Message] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    async def publish(self, channel: str, message: Message, retain: bool = False):
+        if retain:
+            self._retained[channel] = message
+        handler = self._handlers.get(channel)
+        if handler is not None:
+            await handler(message)
+
+    async def last(self, channel: str) -> Optional[Message]:
+        return self._retained.get(channel)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+        self._retained.pop(channel, None)
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.monotonic()
+        holder = self._leases.get(name)
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+        self._leases[name] = (owner, now + ttl)
+        return True
+
+    async def release(self, name: str, owner: str):
+        holder = self._leases.get(name)
+        if holder is not None and holder[0] == owner:
+            del self._leases[name]
+
+
+# Продление аренды только своим владельцем (атомарно на стороне Redis)
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) and 1 or 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackplane(Backplane):
+    """
+    Шина на Redis pub/sub
+
+    Как работает:
+    1. Публикация - PUBLISH в канал с префиксом; Redis доставляет сообщения одного
+       публикующего соединения всем подписчикам в порядке публикации
+    2. Один читатель на процесс вызывает обработчики последовательно: порядок
+       внутри канала сохраняется и при доставке локальным клиентам
+    3. Последнее сообщение канала хранится ключом с TTL для подписчиков, пришедших позже
+    4. Аренда - ключ SET NX PX; продление и освобождение - скрипты, проверяющие владельца
+    """
+
+    def __init__(self, url: str, prefix: str = "crypto-api", retain_ttl: float = 3600.0, client=None):
+        self.url = url
+        self.prefix = prefix
+        self.retain_ttl = retain_ttl
+        self._client = client
+        self._pubsub = None
+        self._handlers: Dict[str, Handler] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    def _key(self, kind: str, name: str) -> str:
+        return f"{self.prefix}:{kind}:{name}"
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = aioredis.from_url(self.url)
+        return self._client
+
+    async def start(self):
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            logger.info(f"🛰️ Шина Redis подключена: {self.url}")
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def publish(self, channel: str, message: Message, retain: bool = False):
+        data = json.dumps(message)
+        if retain:
+            # Одна транзакция: сохраненное сообщение не обгоняет опубликованное
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.set(self._key("last", channel), data, px=int(self.retain_ttl * 1000))
+                pipe.publish(self._key("channel", channel), data)
+                await pipe.execute()
+        else:
+            await self.client.publish(self._key("channel", channel), data)
+
+    async def last(self, channel: str) -> Optional[Message]:
+        data = await self.client.get(self._key("last", channel))
+        return json.loads(data) if data is not None else None
+
+    async def subscribe(self, channel: str, handler: Handler):
+        await self.start()
+        self._handlers[channel] = handler
+        await self._pubsub.subscribe(self._key("channel", channel))
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._key("channel", channel))
+
+    async def _read(self):
+        """Читатель процесса: сообщения всех каналов по порядку"""
+        prefix = self._key("channel", "")
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка чтения шины Redis: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            handler = self._handlers.get(channel[len(prefix):])
+            if handler is None:
+                continue
+            try:
+                await handler(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"Ошибка обработчика канала {channel}: {e}")
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        result = await self.client.eval(RENEW_SCRIPT, 1, self._key("lease", name), owner, int(ttl * 1000))
+        return bool(result)
+
+    async def release(self, name: str, owner: str):
+        await self.client.eval(RELEASE_SCRIPT, 1, self._key("lease", name), owner)
+
+
+def create_backplane(url: str) -> Backplane:
+    """Шина по адресу: redis://... - Redis, пусто или memory - в памяти процесса"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackplane(url)
+    return InMemoryBackplane()
@@ -0,0 +1,188 @@
+"""
+Backtesting
+Векторный бэктест правил технического анализа и перебор сетки параметров
+"""
+
+import itertools
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .exceptions import ValidationError
+from .indicator_pipeline import IndicatorPipeline
+
+# Баров в году для дневных данных (по умолчанию для коэффициента Шарпа)
+PERIODS_PER_YEAR = 365
+
+
+def _hold(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    """
+    Позиция по сигналам входа/выхода без цикла: последний сигнал протягивается вперед
+
+    Выход приоритетнее входа на одном баре; до первого сигнала позиции нет.
+    """
+    signal = np.full(len(entries), np.nan)
+    signal[entries] = 1.0
+    signal[exits] = 0.0
+    index = np.where(np.isnan(signal), 0, np.arange(len(signal)))
+    np.maximum.accumulate(index, out=index)
+    held = signal[index]
+    return np.where(np.isnan(held), 0.0, held)
+
+
+def sma_crossover(pipeline: IndicatorPipeline, short: int = 20, long: int = 50) -> np.ndarray:
+    """В позиции, пока короткая SMA выше длинной"""
+    with np.errstate(invalid="ignore"):
+        return (pipeline.sma(short) > pipeline.sma(long)).astype(float)
+
+
+def rsi_reversion(pipeline: IndicatorPipeline, period: int = 14, lower: float = 30, upper: float = 70) -> np.ndarray:
+    """Вход при RSI ниже `lower`, выход при RSI выше `upper`"""
+    rsi = pipeline.rsi(int(period))
+    with np.errstate(invalid="ignore"):
+        return _hold(rsi < lower, rsi > upper)
+
+
+def bollinger_breakout(pipeline: IndicatorPipeline, period: int = 20, std_dev: float = 2) -> np.ndarray:
+    """Вход при пробое верхней полосы, выход при возврате ниже средней линии"""
+    bands = pipeline.bollinger(int(period), float(std_dev))
+    with np.errstate(invalid="ignore"):
+        return _hold(pipeline.prices > bands["upper"], pipeline.prices < bands["middle"])
+
+
+# Стратегия: функция позиции, параметры по умолчанию и пары (a, b), где требуется a < b
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "sma_crossover": {"func": sma_crossover, "defaults": {"short": 20, "long": 50}, "ordered": [("short", "long")]},
+    "rsi": {"func": rsi_reversion, "defaults": {"period": 14, "lower": 30, "upper": 70}, "ordered": [("lower", "upper")]},
+    "bollinger_breakout": {"func": bollinger_breakout, "defaults": {"period": 20, "std_dev": 2}, "ordered": []},
+}
+
+INTEGER_PARAMS = {"short", "long", "period"}
+
+
+def resolve_params(strategy: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Параметры стратегии с подстановкой значений по умолчанию и проверкой
+
+    Проверка выполняется до отправки в пул: задачи воркеров получают только корректные параметры.
+    """
+    if strategy not in STRATEGIES:
+        raise ValidationError("strategy", strategy, f"одна из {', '.join(STRATEGIES)}")
+    defaults = STRATEGIES[strategy]["defaults"]
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValidationError("params", sorted(unknown), f"допустимы {', '.join(defaults)}")
+
+    resolved = {**defaults, **params}
+    for name in INTEGER_PARAMS & set(resolved):
+        if resolved[name] < 1:
+            raise ValidationError(name, resolved[name], ">= 1")
+        resolved[name] = int(resolved[name])
+    for lower, upper in STRATEGIES[strategy]["ordered"]:
+        if resolved[lower] >= resolved[upper]:
+            raise ValidationError(lower, resolved[lower], f"меньше {upper} ({resolved[upper]})")
+    return resolved
+
+
+def expand_grid(strategy: str, grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Все допустимые комбинации параметров сетки
+
+    Комбинации, нарушающие порядок параметров (например short >= long), пропускаются.
+    """
+    if strategy not in STRATEGIES:
+        raise ValidationError("strategy", strategy, f"одна из {', '.join(STRATEGIES)}")
+    names = list(grid)
+    unknown = set(names) - set(STRATEGIES[strategy]["defaults"])
+    if unknown:
+        raise ValidationError("grid", sorted(unknown), f"допустимы {', '.join(STRATEGIES[strategy]['defaults'])}")
+
+    combinations = []
+    for values in itertools.product(*grid.values()):
+        try:
+            combinations.append(resolve_params(strategy, dict(zip(names, values))))
+        except ValidationError:
+            continue
+    if not combinations:
+        raise ValidationError("grid", len(combinations), "хотя бы одна допустимая комбинация")
+    return combinations
+
+
+def evaluate_positions(
+    prices: np.ndarray,
+    position: np.ndarray,
+    fee: float = 0.0,
+    periods_per_year: int = PERIODS_PER_YEAR
+) -> Dict[str, Any]:
+    """
+    PnL, просадка и коэффициент Шарпа для вектора позиций
+
+    Позиция, решенная на закрытии бара t, получает доходность бара t + 1.
+    Комиссия `fee` (доля) списывается с каждого изменения позиции.
+    """
+    returns = np.zeros(len(prices))
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    held = np.concatenate(([0.0], position[:-1]))
+    turnover = np.abs(np.diff(held, prepend=0.0))
+    strategy_returns = held * returns - fee * turnover
+
+    equity = np.cumprod(1 + strategy_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    std = strategy_returns.std(ddof=1) if len(strategy_returns) > 1 else 0.0
+    sharpe = strategy_returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0
+
+    return {
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "buy_and_hold_return": float(prices[-1] / prices[0] - 1) if len(prices) else 0.0,
+        "sharpe": float(sharpe),
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+        "trades": int(np.count_nonzero(np.diff(held, prepend=0.0) > 0)),
+        "exposure": float(held.mean()) if len(held) else 0.0,
+        "equity": equity,
+    }
+
+
+def run_backtest(
+    prices: np.ndarray,
+    strategy: str,
+    params: Dict[str, Any],
+    fee: float = 0.0,
+    periods_per_year: int = PERIODS_PER_YEAR,
+    pipeline: Optional[IndicatorPipeline] = None
+) -> Dict[str, Any]:
+    """Бэктест одной комбинации параметров"""
+    pipeline = pipeline if pipeline is not None else IndicatorPipeline(prices)
+    position = STRATEGIES[strategy]["func"](pipeline, **params)
+    return {"params": params, **evaluate_positions(pipeline.prices, position, fee, periods_per_year)}
+
+
+def run_grid_chunk(
+    prices: np.ndarray,
+    strategy: str,
+    combinations: List[Dict[str, Any]],
+    fee: float = 0.0,
+    periods_per_year: int = PERIODS_PER_YEAR
+) -> List[Dict[str, Any]]:
+    """
+    Бэктест части сетки - задача для пула вычислений
+
+    Один пайплайн на задачу: общие SMA/RSI/полосы для разных комбинаций
+    считаются один раз. Кривая капитала в результат перебора не входит.
+    """
+    pipeline = IndicatorPipeline(np.array(prices, dtype=float))
+    results = []
+    for params in combinations:
+        result = run_backtest(pipeline.prices, strategy, params, fee, periods_per_year, pipeline)
+        result.pop("equity")
+        results.append(result)
+    return results
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Разбиение списка на части не длиннее `size`"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def rank_results(results: List[Dict[str, Any]], sort_by: str, top: int) -> List[Dict[str, Any]]:
+    """Лучшие комбинации по метрике (для просадки - наименьшая по модулю)"""
+    return sorted(results, key=lambda result: result[sort_by], reverse=True)[:top]
@@ -0,0 +1,126 @@
+"""
+Batch Analysis
+Технический анализ множества монет над матрицей цен монеты x время
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .indicator_pipeline import IndicatorPipeline
+from .series_encoding import timestamps_to_epoch_ms
+
+# Минимальная длина ряда для анализа (как в TechnicalAnalyzer.analyze)
+MIN_POINTS = 20
+
+
+def build_price_matrix(
+    histories: Dict[str, List[Dict[str, Any]]],
+    min_points: int = MIN_POINTS
+) -> Tuple[List[str], np.ndarray, List[str], Dict[str, str]]:
+    """
+    Выравнивание исторических рядов в матрицу монеты x время
+
+    Ряды выравниваются по меткам времени: в матрицу попадают только метки,
+    общие для всех монет (пропуски и сдвиги в отдельных рядах не смещают столбцы).
+    Монеты с историей короче `min_points` пропускаются, как и монеты, с которыми
+    общих меток осталось бы меньше `min_points`.
+
+    Returns:
+        (монеты, матрица цен, временные метки, пропущенные монеты с причиной)
+    """
+    skipped: Dict[str, str] = {}
+    usable = {}
+    for coin, history in histories.items():
+        if len(history) < min_points:
+            skipped[coin] = f"недостаточно данных: {len(history)} < {min_points}"
+        else:
+            usable[coin] = history
+
+    if not usable:
+        return [], np.empty((0, 0)), [], skipped
+
+    epochs = {coin: timestamps_to_epoch_ms([item.get('timestamp') for item in history]) for coin, history in usable.items()}
+    coins = list(usable)[:1]
+    common = np.unique(epochs[coins[0]])
+    for coin in list(usable)[1:]:
+        shared = np.intersect1d(common, epochs[coin])
+        if len(shared) < min_points:
+            skipped[coin] = f"недостаточно общих меток времени: {len(shared)} < {min_points}"
+        else:
+            coins.append(coin)
+            common = shared
+
+    # Позиция каждой общей метки в ряду монеты (при повторе метки - последняя точка)
+    positions = {}
+    for coin in coins:
+        order = np.argsort(epochs[coin], kind="stable")
+        positions[coin] = order[np.searchsorted(epochs[coin][order], common, side="right") - 1]
+
+    matrix = np.array(
+        [[usable[coin][index].get('price', 0) for index in positions[coin]] for coin in coins],
+        dtype=float
+    )
+    reference = usable[coins[0]]
+    timestamps = [reference[index].get('timestamp') for index in positions[coins[0]]]
+
+    return coins, matrix, timestamps, skipped
+
+
+def analyze_matrix(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Все стандартные индикаторы по матрице цен за один векторный проход
+
+    Возвращает столбцы: одно значение (последнее) на монету.
+    Столбцы не ссылаются на память `matrix` (она может быть разделяемой).
+    """
+    pipeline = IndicatorPipeline(matrix)
+    macd = pipeline.macd()
+    bollinger = pipeline.bollinger()
+    sma_20, sma_50 = pipeline.sma(20), pipeline.sma(50)
+
+    columns = {
+        "price": matrix[:, -1].copy(),
+        "sma_20": sma_20[:, -1],
+        "sma_50": sma_50[:, -1],
+        "ema_12": pipeline.ema(12)[:, -1],
+        "ema_26": pipeline.ema(26)[:, -1],
+        "rsi": pipeline.rsi()[:, -1],
+        "macd": macd["macd"][:, -1],
+        "macd_signal": macd["signal"][:, -1],
+        "macd_histogram": macd["histogram"][:, -1],
+        "bb_upper": bollinger["upper"][:, -1],
+        "bb_middle": bollinger["middle"][:, -1],
+        "bb_lower": bollinger["lower"][:, -1],
+        "price_change_percent": (matrix[:, -1] - matrix[:, 0]) / matrix[:, 0] * 100,
+    }
+
+    # Пересечение MACD и сигнальной линии на последнем шаге: 1 - было, 0 - нет
+    histogram = macd["histogram"][:, -2:]
+    columns["macd_bullish_cross"] = ((histogram[:, 0] <= 0) & (histogram[:, 1] > 0)).astype(float)
+    columns["macd_bearish_cross"] = ((histogram[:, 0] >= 0) & (histogram[:, 1] < 0)).astype(float)
+
+    # Направление тренда: 1 - восходящий, -1 - нисходящий, 0 - боковой/нет данных
+    if matrix.shape[1] > 50:
+        above = sma_20[:, -2:] > sma_50[:, -2:]
+        below = sma_20[:, -2:] < sma_50[:, -2:]
+        columns["trend"] = np.select([above.all(axis=1), below.all(axis=1)], [1.0, -1.0], 0.0)
+    else:
+        columns["trend"] = np.zeros(matrix.shape[0])
+
+    return columns
+
+
+def merge_columns(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Склейка столбцов, посчитанных по частям матрицы"""
+    if not chunks:
+        return {}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def to_columnar(columns: Dict[str, np.ndarray]) -> Dict[str, List[Any]]:
+    """Столбцы в JSON-совместимом виде (NaN -> None)"""
+    return {
+        name: np.where(np.isnan(values), None, values).tolist()
+        for name, values in columns.items()
+    }
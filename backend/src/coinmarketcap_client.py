@@ -1,8 +1,8 @@
 import httpx
 from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
 from loguru import logger
 from .config import settings
+from .market_simulator import synthetic_history
 
 class CoinMarketCapClient:
     """Клиент для работы с CoinMarketCap API"""
@@ -68,6 +68,7 @@ class CoinMarketCapClient:
                 "id": coin.get("id"),
                 "name": coin.get("name"),
                 "symbol": coin.get("symbol"),
+                "slug": coin.get("slug"),
                 "price": quote.get("price", 0),
                 "market_cap": quote.get("market_cap", 0),
                 "volume_24h": quote.get("volume_24h", 0),
@@ -187,30 +188,21 @@ class CoinMarketCapClient:
     async def get_historical_data(self, coin_id: str, days: int = 30) -> List[Dict[str, Any]]:
         """Получение исторических данных"""
         # CoinMarketCap Pro API требует платную подписку для исторических данных
-        # Для демонстрации используем текущие данные
+        # Для демонстрации строим историю от текущей цены
         logger.warning("Исторические данные требуют платную подписку CoinMarketCap Pro")
         
         try:
             coin_info = await self.get_coin_info(coin_id)
             
-            # Создаем демо-данные на основе текущей цены
-            current_price = coin_info["price"]
-            historical_data = []
-            
-            for i in range(days):
-                date = datetime.now() - timedelta(days=days - i - 1)
-                # Имитируем изменение цены
-                price_change = (i % 7 - 3) * 0.02  # ±6% изменение
-                price = current_price * (1 + price_change)
-                
-                historical_data.append({
-                    "timestamp": date.isoformat(),
-                    "price": price,
-                    "volume": coin_info["volume_24h"] * (0.8 + 0.4 * (i % 5) / 5),
-                    "market_cap": coin_info["market_cap"] * (1 + price_change)
-                })
-            
-            return historical_data
+            # Демо-данные: воспроизводимый синтетический путь, заканчивающийся текущей ценой
+            return synthetic_history(
+                coin_info["symbol"],
+                coin_info["price"],
+                days,
+                seed=settings.simulator_seed,
+                volume_24h=coin_info["volume_24h"],
+                market_cap=coin_info["market_cap"]
+            )
             
         except Exception as e:
             logger.error(f"Ошибка получения исторических данных: {e}")
@@ -3,7 +3,8 @@ from typing import Optional
 
 class Settings(BaseSettings):
     # API ключи
-    coinmarketcap_api_key: str
+    # Не нужен при DATA_SOURCE=simulator
+    coinmarketcap_api_key: str = ""
     
     # Настройки сервера
     host: str = "0.0.0.0"
@@ -19,6 +20,78 @@ class Settings(BaseSettings):
     api_description: str = "API для аналитики криптовалют с данными от CoinMarketCap"
     api_version: str = "2.0.0"
     
+    # Источник данных: "coinmarketcap" или "simulator" (синтетический рынок для разработки)
+    data_source: str = "coinmarketcap"
+    simulator_symbols: int = 500
+    simulator_seed: int = 42
+    simulator_interval: float = 1.0
+    simulator_steps_per_interval: int = 10
+    
+    # Настройки пакетного технического анализа
+    batch_chunk_size: int = 50
+    batch_fetch_concurrency: int = 10
+    
+    # Настройки кэша результатов анализа
+    analysis_cache_size: int = 1024
+    analysis_cache_ttl: float = 60.0
+    # Результаты бэктестов кэшируются по одной комбинации параметров
+    backtest_cache_size: int = 10000
+    
+    # Настройки пула вычислений анализа: "thread" или "process"
+    analysis_executor: str = "thread"
+    analysis_workers: int = 4
+    analysis_max_queue: int = 64
+    
+    # Материализация индикаторов топ-N монет после каждого обновления данных
+    materializer_enabled: bool = True
+    materializer_top_n: int = 50
+    materializer_days: int = 30
+    materializer_interval: float = 60.0
+    
+    # Скользящие статистики по тикам: окна (15m, 1h, 24h, 7d) и число корзин в окне
+    microstats_windows: str = "1h,24h"
+    microstats_resolution: int = 1440
+    
+    # Архив снимков листинга для запросов на момент времени (as_of)
+    snapshot_enabled: bool = True
+    snapshot_dir: str = "data/snapshots"
+    snapshot_limit: int = 500
+    snapshot_interval: float = 60.0
+    # Каждый N-й снимок - опорный, остальные - дельты (запрос читает не больше N записей)
+    snapshot_keyframe_interval: int = 60
+    
+    # Интервалы опроса тем WebSocket-рассылки (один опрос на тему для всех подписчиков)
+    ws_prices_interval: float = 30.0
+    ws_coin_interval: float = 10.0
+    ws_overview_interval: float = 60.0
+    # Очередь отправки соединения и политика при ее заполнении: drop_oldest, conflate, disconnect
+    ws_send_queue_size: int = 100
+    ws_slow_consumer_policy: str = "conflate"
+    # Относительный порог изменения чисел для дельт WebSocket (1e-5 = 0.001%)
+    ws_delta_epsilon: float = 1e-5
+    # Частота обновлений в секунду для клиентов, не задавших max_rate (0 - без ограничения)
+    ws_max_update_rate: float = 0.0
+    # Heartbeat WebSocket: ping соединению, от которого ничего не было интервал (секунды);
+    # соединение без входящих кадров (включая pong) дольше ws_idle_timeout закрывается (0 - выключено).
+    # Таймеры соединений - на колесе таймеров с шагом ws_timer_tick
+    ws_heartbeat_interval: float = 20.0
+    ws_idle_timeout: float = 60.0
+    ws_timer_tick: float = 0.5
+    # Буфер последних дельт темы для повтора при переподключении (?last_seq=) и время (секунды),
+    # которое тема без подписчиков хранит состояние и буфер
+    ws_replay_buffer_size: int = 256
+    ws_replay_retention: float = 300.0
+    # permessage-deflate: сообщения короче порога (байт) не сжимаются;
+    # уровень zlib 1-9, окно 8-15 бит, без контекста между сообщениями - меньше памяти
+    ws_deflate_enabled: bool = True
+    ws_deflate_min_size: int = 512
+    ws_deflate_level: int = 6
+    ws_deflate_window_bits: int = 15
+    ws_deflate_no_context_takeover: bool = False
+    # Шина между процессами для WebSocket-рассылки: пусто - в памяти процесса (один воркер),
+    # redis://host:port/db - Redis pub/sub (несколько воркеров или подов)
+    backplane_url: str = ""
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -43,6 +43,29 @@ DEFAULT_MACD_FAST = 12
 DEFAULT_MACD_SLOW = 26
 DEFAULT_MACD_SIGNAL = 9
 
+# Константы для пакетного анализа
+DEFAULT_BATCH_TOP_N = 100
+MAX_BATCH_COINS = 500
+
+# Константы для матриц корреляций
+DEFAULT_CORRELATION_TOP_N = 20
+MAX_CORRELATION_COINS = 200
+DEFAULT_CORRELATION_WINDOW = 30
+
+# Константы для бэктестов
+MAX_BACKTEST_COMBINATIONS = 10000
+DEFAULT_BACKTEST_TOP = 10
+
+# Максимум точек ряда индикаторов в одном ответе
+MAX_SERIES_POINTS = 100000
+
+# Расширение ASGI scope с ping на уровне протокола WebSocket ({"ping": корутина, возвращающая ожидание pong})
+WS_PING_EXTENSION = "websocket.ping"
+
+# Константы для ценовых алертов
+DEFAULT_ALERT_COOLDOWN = 60
+MAX_ALERTS_PER_CLIENT = 1000
+
 # Сообщения об ошибках
 ERROR_MESSAGES = {
     "api_key_missing": "API ключ CoinMarketCap не настроен",
@@ -0,0 +1,236 @@
+"""
+Cross-Asset Correlation
+Скользящие матрицы ковариации и корреляции доходностей с инкрементальным обновлением
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def log_returns(matrix: np.ndarray) -> np.ndarray:
+    """Логарифмические доходности матрицы цен монеты x время -> время x монеты"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(matrix), axis=1).T
+    return np.where(np.isfinite(returns), returns, 0.0)
+
+
+class RollingCovariance:
+    """
+    Ковариация доходностей N активов в окне из `window` баров
+
+    Как работает:
+    1. Храним кольцевой буфер доходностей (window x N), сумму векторов
+       и сумму внешних произведений r r^T
+    2. Новый бар: прибавляем его вклад и вычитаем вклад вытесненного - O(N^2)
+       вместо пересчета O(window * N^2)
+    3. Раз в `window` обновлений суммы пересчитываются из буфера одной матричной
+       операцией, чтобы ошибки округления не накапливались
+    """
+
+    def __init__(self, returns: np.ndarray, window: int):
+        self.window = window
+        self.size = returns.shape[1]
+        self._buffer = np.zeros((window, self.size))
+        tail = returns[-window:]
+        self.count = len(tail)
+        self._buffer[:self.count] = tail
+        self._head = self.count % window
+        self._updates = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        rows = self._buffer[:self.count] if self.count < self.window else self._buffer
+        self._sum = rows.sum(axis=0)
+        self._outer = rows.T @ rows
+
+    def _last_index(self) -> int:
+        return (self._head - 1) % self.window
+
+    def push(self, row: np.ndarray):
+        """Добавление нового бара (самый старый вытесняется при заполненном окне)"""
+        if self.count == self.window:
+            oldest = self._buffer[self._head]
+            self._sum -= oldest
+            self._outer -= np.outer(oldest, oldest)
+        else:
+            self.count += 1
+        self._buffer[self._head] = row
+        self._head = (self._head + 1) % self.window
+        self._sum += row
+        self._outer += np.outer(row, row)
+        self._track_drift()
+
+    def replace_last(self, row: np.ndarray):
+        """Замена последнего бара (бар еще не закрыт, цена обновилась)"""
+        index = self._last_index()
+        previous = self._buffer[index].copy()
+        self._sum += row - previous
+        self._outer += np.outer(row, row) - np.outer(previous, previous)
+        self._buffer[index] = row
+        self._track_drift()
+
+    def _track_drift(self):
+        self._updates += 1
+        if self._updates >= self.window:
+            self._updates = 0
+            self._rebuild()
+
+    def covariance(self) -> np.ndarray:
+        """Выборочная ковариационная матрица"""
+        if self.count < 2:
+            return np.full((self.size, self.size), np.nan)
+        mean = self._sum / self.count
+        return (self._outer - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+    def correlation(self, covariance: Optional[np.ndarray] = None) -> np.ndarray:
+        """Матрица корреляций (NaN для активов с нулевой дисперсией)"""
+        covariance = self.covariance() if covariance is None else covariance
+        std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = covariance / np.outer(std, std)
+        correlation = np.clip(correlation, -1.0, 1.0)
+        np.fill_diagonal(correlation, np.where(std > 0, 1.0, np.nan))
+        return correlation
+
+
+class CorrelationState:
+    """
+    Закэшированное состояние для (N, окно, интервал): монеты, хвост матрицы цен
+    (окно + 1 бар) с метками баров и скользящая ковариация
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        bars: np.ndarray,
+        matrix: np.ndarray,
+        rolling: RollingCovariance,
+        skipped: Optional[Dict[str, str]] = None
+    ):
+        self.symbols = symbols
+        self.bars = bars
+        self.matrix = matrix
+        self.rolling = rolling
+        # Монеты, не вошедшие в матрицу при полном расчете (с причиной)
+        self.skipped = skipped or {}
+
+    @property
+    def last_prices(self) -> np.ndarray:
+        return self.matrix[:, -1]
+
+    @classmethod
+    def build(
+        cls,
+        symbols: List[str],
+        bars: np.ndarray,
+        matrix: np.ndarray,
+        window: int,
+        skipped: Optional[Dict[str, str]] = None
+    ) -> "CorrelationState":
+        """Полный расчет: одна матричная операция по выровненной матрице доходностей"""
+        return cls(
+            symbols, bars[-(window + 1):].copy(), matrix[:, -(window + 1):].copy(),
+            RollingCovariance(log_returns(matrix), window), skipped
+        )
+
+    def update(self, symbols: List[str], bars: np.ndarray, matrix: np.ndarray) -> bool:
+        """
+        Инкрементальное обновление барами, начиная с последнего известного
+
+        На вход - только новые бары: последний известный (его цена обновилась) и
+        следующие за ним. Возвращает False, если состояние нельзя обновить (другой
+        набор монет или разрыв в барах) - тогда нужен полный пересчет.
+        """
+        if symbols != self.symbols or len(bars) == 0:
+            return False
+
+        fresh = bars >= self.bars[-1]
+        bars, matrix = bars[fresh], matrix[:, fresh]
+        if len(bars) == 0:
+            return True
+
+        # Разрыв: между последним известным и первым новым баром пропущены бары
+        spacing = np.diff(np.concatenate([self.bars, bars]))
+        longest = np.diff(self.bars).max() if len(self.bars) > 1 else None
+        if longest is not None and spacing.max() > longest:
+            return False
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for index, bar in enumerate(bars):
+                prices = matrix[:, index]
+                if bar == self.bars[-1]:
+                    # Текущий бар обновился (та же метка, новая цена)
+                    if self.matrix.shape[1] > 1:
+                        current = np.log(prices / self.matrix[:, -2])
+                        self.rolling.replace_last(np.where(np.isfinite(current), current, 0.0))
+                    self.matrix[:, -1] = prices
+                else:
+                    # Новый бар
+                    row = np.log(prices / self.last_prices)
+                    self.rolling.push(np.where(np.isfinite(row), row, 0.0))
+                    self.matrix = np.column_stack([self.matrix, prices])[:, -(self.rolling.window + 1):]
+                    self.bars = np.append(self.bars, bar)[-(self.rolling.window + 1):]
+        return True
+
+
+def matrix_to_json(matrix: np.ndarray, precision: Optional[int] = None) -> List[List[Optional[float]]]:
+    """Матрица во вложенные списки (NaN -> None)"""
+    if precision is not None:
+        matrix = np.round(matrix, precision)
+    return np.where(np.isnan(matrix), None, matrix).tolist()
+
+
+class CorrelationCache:
+    """Состояния корреляций по ключу (N, окно, интервал)"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._states: Dict[Tuple[int, int, str], CorrelationState] = {}
+
+    def get(self, key: Tuple[int, int, str]) -> Optional[CorrelationState]:
+        return self._states.get(key)
+
+    def refresh(
+        self,
+        key: Tuple[int, int, str],
+        symbols: List[str],
+        bars: np.ndarray,
+        matrix: np.ndarray,
+        window: Optional[int],
+        skipped: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[CorrelationState], bool]:
+        """
+        Актуальное состояние: инкрементальное обновление или полный пересчет
+
+        `bars`/`matrix` - либо только новые бары (начиная с последнего известного
+        состоянию), либо полная история. Если новые бары нельзя применить к
+        состоянию, а полной истории нет (`window` = None), возвращается (None, False).
+
+        Returns:
+            (состояние, было ли обновление инкрементальным)
+        """
+        state = self._states.get(key)
+        if state is not None and state.update(symbols, bars, matrix):
+            return state, True
+        if window is None:
+            return None, False
+
+        state = CorrelationState.build(symbols, bars, matrix, window, skipped)
+        if key not in self._states and len(self._states) >= self.max_entries:
+            self._states.pop(next(iter(self._states)))
+        self._states[key] = state
+        return state, False
+
+    def summary(self, state: CorrelationState, precision: Optional[int] = None) -> Dict[str, Any]:
+        covariance = state.rolling.covariance()
+        return {
+            "symbols": state.symbols,
+            "observations": state.rolling.count,
+            "correlation": matrix_to_json(state.rolling.correlation(covariance), precision),
+            "covariance": matrix_to_json(covariance, precision),
+        }
+
+
+# Глобальный кэш состояний корреляций
+correlation_cache = CorrelationCache()
@@ -0,0 +1,105 @@
+"""
+Delta Encoding
+Дельты сообщений WebSocket-рассылки: только изменившиеся поля
+"""
+
+import copy
+from typing import Any
+
+# Поле, по которому сопоставляются записи списков (монеты)
+RECORD_KEY = "symbol"
+
+
+class _Unchanged:
+    def __repr__(self) -> str:
+        return "UNCHANGED"
+
+
+# Результат diff, когда изменений нет (None в дельте означает удаление поля)
+UNCHANGED = _Unchanged()
+
+
+def moved(previous: Any, current: Any, epsilon: float = 0.0) -> bool:
+    """Изменилось ли значение; числа - больше чем на относительный порог `epsilon`"""
+    numbers = (int, float)
+    if (
+        isinstance(previous, bool) or isinstance(current, bool)
+        or not isinstance(previous, numbers) or not isinstance(current, numbers)
+    ):
+        return previous != current
+    return abs(current - previous) > epsilon * max(abs(previous), abs(current))
+
+
+def _record_keys(value: Any):
+    if not isinstance(value, list) or not all(isinstance(item, dict) and RECORD_KEY in item for item in value):
+        return None
+    return [item[RECORD_KEY] for item in value]
+
+
+def diff(previous: Any, current: Any, epsilon: float = 0.0) -> Any:
+    """
+    Дельта от `previous` к `current` или UNCHANGED
+
+    Формат - JSON Merge Patch (RFC 7386) с расширением для списков монет:
+    - объект: только изменившиеся ключи, null - ключ удален (null и отсутствие
+      ключа равнозначны)
+    - список записей с полем "symbol" и тем же порядком монет: объект
+      {монета: дельта записи} только для изменившихся записей
+    - остальное (числа, строки, списки с другим составом) - новое значение целиком
+    Числа меньше относительного порога `epsilon` изменением не считаются.
+    """
+    if isinstance(previous, dict) and isinstance(current, dict):
+        patch = {}
+        for key, value in current.items():
+            if key not in previous:
+                # null и отсутствующий ключ равнозначны
+                if value is not None:
+                    patch[key] = value
+                continue
+            change = diff(previous[key], value, epsilon)
+            if change is not UNCHANGED:
+                patch[key] = change
+        for key in previous:
+            if key not in current:
+                patch[key] = None
+        return patch if patch else UNCHANGED
+
+    if isinstance(previous, list) and isinstance(current, list):
+        keys = _record_keys(current)
+        if keys is not None and keys == _record_keys(previous):
+            patch = {}
+            for key, old, new in zip(keys, previous, current):
+                change = diff(old, new, epsilon)
+                if change is not UNCHANGED:
+                    patch[key] = change
+            return patch if patch else UNCHANGED
+        return current if previous != current else UNCHANGED
+
+    return current if moved(previous, current, epsilon) else UNCHANGED
+
+
+def apply(target: Any, patch: Any) -> Any:
+    """
+    Применение дельты к значению; возвращает новое значение
+
+    Объекты и записи списков изменяются на месте. Клиент применяет дельты
+    так же, поэтому его состояние совпадает с состоянием сервера.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    keys = _record_keys(target)
+    if keys is not None and all(key in keys for key in patch):
+        records = dict(zip(keys, target))
+        for key, change in patch.items():
+            apply(records[key], change)
+        return target
+    if not isinstance(target, dict):
+        # Значение сменило тип (например, список стал объектом): как в RFC 7386,
+        # объект строится заново из копии дельты, null-поля отбрасываются
+        return apply({}, copy.deepcopy(patch))
+    for key, change in patch.items():
+        if change is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply(target.get(key), change)
+    return target
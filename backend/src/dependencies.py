@@ -1,16 +1,34 @@
 from fastapi import Depends
 from typing import Optional
 from .coinmarketcap_client import CoinMarketCapClient
+from .simulated_client import SimulatedMarketClient
 from .websocket_manager import WebSocketManager
 from .technical_analysis import TechnicalAnalyzer
+from .analysis_cache import AnalysisCache, analysis_cache
+from .analysis_executor import AnalysisExecutor
+from .indicator_materializer import IndicatorMaterializer
+from .price_alerts import AlertEngine, alert_engine
+from .market_stats import MarketStats, market_stats
+from .price_stream import PriceStream, price_stream
+from .snapshot_store import SnapshotStore
+from .pubsub import PubSubHub
+from .backplane import Backplane, create_backplane
+from .timer_wheel import TimerWheel
+from .services.stream_service import StreamService
 from .config import settings
 from .exceptions import APIKeyMissingError
 from .validators import validate_api_key
 
 # Глобальные экземпляры (создаются один раз при запуске)
 _coinmarketcap_client: Optional[CoinMarketCapClient] = None
+_simulated_client: Optional[SimulatedMarketClient] = None
 _websocket_manager: Optional[WebSocketManager] = None
 _technical_analyzer: Optional[TechnicalAnalyzer] = None
+_analysis_executor: Optional[AnalysisExecutor] = None
+_indicator_materializer: Optional[IndicatorMaterializer] = None
+_snapshot_store: Optional[SnapshotStore] = None
+_pubsub_hub: Optional[PubSubHub] = None
+_backplane: Optional[Backplane] = None
 
 def get_coinmarketcap_client() -> CoinMarketCapClient:
     """
@@ -25,6 +43,10 @@ def get_coinmarketcap_client() -> CoinMarketCapClient:
     """
     global _coinmarketcap_client
     
+    # Режим разработки: синтетический рынок с тем же интерфейсом, API ключ не нужен
+    if settings.data_source == "simulator":
+        return get_simulated_client()
+    
     if _coinmarketcap_client is None:
         # Проверяем API ключ
         if not validate_api_key(settings.coinmarketcap_api_key):
@@ -35,6 +57,22 @@ def get_coinmarketcap_client() -> CoinMarketCapClient:
     
     return _coinmarketcap_client
 
+def get_simulated_client() -> SimulatedMarketClient:
+    """
+    Клиент синтетического рынка (DATA_SOURCE=simulator)
+    """
+    global _simulated_client
+    
+    if _simulated_client is None:
+        _simulated_client = SimulatedMarketClient(
+            symbols=settings.simulator_symbols,
+            seed=settings.simulator_seed,
+            interval=settings.simulator_interval,
+            steps_per_interval=settings.simulator_steps_per_interval
+        )
+    
+    return _simulated_client
+
 def get_websocket_manager() -> WebSocketManager:
     """
     Dependency для получения менеджера WebSocket соединений
@@ -42,7 +80,13 @@ def get_websocket_manager() -> WebSocketManager:
     global _websocket_manager
     
     if _websocket_manager is None:
-        _websocket_manager = WebSocketManager()
+        _websocket_manager = WebSocketManager(
+            max_queue=settings.ws_send_queue_size,
+            slow_consumer_policy=settings.ws_slow_consumer_policy,
+            heartbeat_interval=settings.ws_heartbeat_interval,
+            idle_timeout=settings.ws_idle_timeout,
+            wheel=TimerWheel(settings.ws_timer_tick)
+        )
     
     return _websocket_manager
 
@@ -57,10 +101,131 @@ def get_technical_analyzer() -> TechnicalAnalyzer:
     
     return _technical_analyzer
 
+def get_analysis_cache() -> AnalysisCache:
+    """
+    Dependency для получения кэша результатов технического анализа
+    """
+    return analysis_cache
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """
+    Dependency для получения пула вычислений технического анализа
+    """
+    global _analysis_executor
+    
+    if _analysis_executor is None:
+        _analysis_executor = AnalysisExecutor(
+            kind=settings.analysis_executor,
+            max_workers=settings.analysis_workers,
+            max_queue=settings.analysis_max_queue
+        )
+    
+    return _analysis_executor
+
+def get_indicator_materializer() -> IndicatorMaterializer:
+    """
+    Dependency для получения таблицы материализованных индикаторов топ-N монет
+    """
+    global _indicator_materializer
+    
+    if _indicator_materializer is None:
+        _indicator_materializer = IndicatorMaterializer(
+            get_coinmarketcap_client(),
+            get_analysis_executor(),
+            top_n=settings.materializer_top_n,
+            days=settings.materializer_days,
+            interval=settings.materializer_interval
+        )
+    
+    return _indicator_materializer
+
+def get_alert_engine() -> AlertEngine:
+    """
+    Dependency для получения движка ценовых алертов
+    """
+    return alert_engine
+
+def get_market_stats() -> MarketStats:
+    """
+    Dependency для получения скользящих статистик по тикам
+    """
+    return market_stats
+
+def get_price_stream() -> PriceStream:
+    """
+    Dependency для получения рассылки цен по подпискам на монеты
+    """
+    return price_stream
+
+def get_snapshot_store() -> SnapshotStore:
+    """
+    Dependency для получения архива снимков листинга
+    
+    Чтение архива не требует источника данных; запись (фоновая) - требует
+    """
+    global _snapshot_store
+    
+    if _snapshot_store is None:
+        try:
+            client = get_coinmarketcap_client()
+        except APIKeyMissingError:
+            client = None
+        _snapshot_store = SnapshotStore(
+            settings.snapshot_dir,
+            client,
+            limit=settings.snapshot_limit,
+            interval=settings.snapshot_interval,
+            keyframe_interval=settings.snapshot_keyframe_interval
+        )
+    
+    return _snapshot_store
+
+def get_backplane() -> Backplane:
+    """
+    Dependency для получения шины между процессами (BACKPLANE_URL)
+    """
+    global _backplane
+    
+    if _backplane is None:
+        _backplane = create_backplane(settings.backplane_url)
+    
+    return _backplane
+
+def get_pubsub_hub() -> PubSubHub:
+    """
+    Dependency для получения хаба тем WebSocket-рассылки
+    
+    Темы: "prices" (топ монет), "coin:<ID>" (одна монета), "overview" (обзор рынка)
+    """
+    global _pubsub_hub
+    
+    if _pubsub_hub is None:
+        streams = StreamService(get_coinmarketcap_client())
+        _pubsub_hub = PubSubHub(
+            settings.ws_delta_epsilon,
+            get_backplane(),
+            history_size=settings.ws_replay_buffer_size,
+            retention=settings.ws_replay_retention
+        )
+        _pubsub_hub.register("prices", streams.prices_message, settings.ws_prices_interval)
+        _pubsub_hub.register("coin", streams.coin_message, settings.ws_coin_interval)
+        _pubsub_hub.register("overview", streams.overview_message, settings.ws_overview_interval)
+    
+    return _pubsub_hub
+
 # Типизированные зависимости для лучшей поддержки IDE
 CoinMarketCapClientDep = Depends(get_coinmarketcap_client)
 WebSocketManagerDep = Depends(get_websocket_manager)
 TechnicalAnalyzerDep = Depends(get_technical_analyzer)
+AnalysisCacheDep = Depends(get_analysis_cache)
+AnalysisExecutorDep = Depends(get_analysis_executor)
+IndicatorMaterializerDep = Depends(get_indicator_materializer)
+AlertEngineDep = Depends(get_alert_engine)
+MarketStatsDep = Depends(get_market_stats)
+PriceStreamDep = Depends(get_price_stream)
+SnapshotStoreDep = Depends(get_snapshot_store)
+PubSubHubDep = Depends(get_pubsub_hub)
+BackplaneDep = Depends(get_backplane)
 
 # Пример использования в роутере:
 # @router.get("/prices")
@@ -54,6 +54,15 @@ class ValidationError(CryptoAPIException):
             details={"field": field, "value": value, "constraint": constraint}
         )
 
+class ServiceOverloadedError(CryptoAPIException):
+    """Очередь задач переполнена"""
+    def __init__(self, queue_name: str, max_queue: int):
+        super().__init__(
+            message=f"Сервис перегружен: очередь '{queue_name}' заполнена ({max_queue} задач)",
+            status_code=503,
+            details={"queue": queue_name, "max_queue": max_queue}
+        )
+
 def raise_http_exception(exception: CryptoAPIException) -> HTTPException:
     """Преобразует кастомное исключение в HTTPException"""
     return HTTPException(
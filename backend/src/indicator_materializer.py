@@ -0,0 +1,160 @@
+"""
+Indicator Materializer
+Фоновый пересчет стандартных индикаторов топ-N монет в готовую к выдаче таблицу
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from .analysis_executor import AnalysisExecutor
+from .coinmarketcap_client import CoinMarketCapClient
+from .constants import Timeframe
+from .indicator_pipeline import INDICATORS, SERIES_INDICATORS
+from .metrics import observe_materializer_cycle, record_materializer_read
+from .resampling import TIMEFRAME_INTERVALS, bucket_starts
+from .series_encoding import to_epoch_ms
+from .services.technical_service import TechnicalService
+from .technical_analysis import TechnicalAnalyzer
+
+
+class IndicatorMaterializer:
+    """
+    Материализованная таблица индикаторов топ-N монет
+
+    Как работает:
+    1. Раз в `interval` секунд обновляется листинг топ-N (новые тики повышают версии данных)
+    2. Для каждой монеты одной задачей пула считаются полный анализ, все индикаторы и тренд
+    3. Готовая таблица подменяет старую целиком: читатели видят либо прежнюю, либо новую
+    4. Строка привязана к последнему закрытому дневному бару: тики внутри дня ее
+       не сбрасывают (цена дня обновится в следующем цикле), с закрытием бара она устаревает
+    5. Эндпоинты читают строку по символу или ID за O(1); если монеты нет в таблице,
+       запрошен другой период/интервал или закрылся новый бар - расчет по запросу
+    """
+
+    def __init__(
+        self,
+        client: CoinMarketCapClient,
+        executor: AnalysisExecutor,
+        top_n: int = 50,
+        days: int = 30,
+        interval: float = 60.0
+    ):
+        self.client = client
+        self.executor = executor
+        self.top_n = top_n
+        self.days = days
+        self.interval = interval
+        self.cycles = 0
+        self.last_cycle_seconds: Optional[float] = None
+        self.last_refresh: Optional[str] = None
+        # символ или ID монеты (в верхнем регистре) -> строка таблицы
+        self._table: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len({id(entry) for entry in self._table.values()})
+
+    def lookup(self, coin: str, days: int, timeframe: Timeframe = Timeframe.DAILY) -> Optional[Dict[str, Any]]:
+        """
+        Строка таблицы для монеты или None (нужен расчет по запросу)
+        """
+        entry = None
+        if days == self.days and timeframe == Timeframe.DAILY:
+            entry = self._table.get(str(coin).upper())
+            if entry is not None and entry["bar"] != current_daily_bar():
+                entry = None
+        record_materializer_read(entry is not None)
+        return entry
+
+    async def _materialize(self, service: TechnicalService, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            bars = await service.load_bars(symbol, self.days)
+            series = np.array([bars["close"], bars["volume"]], dtype=float)
+            result = await self.executor.run_array(
+                TechnicalAnalyzer.materialize_series, series, list(INDICATORS), SERIES_INDICATORS
+            )
+        except Exception as e:
+            logger.warning(f"Материализация индикаторов {symbol} пропущена: {e}")
+            return None
+
+        return {
+            "symbol": symbol,
+            # Начало текущего (незакрытого) бара: до него закрыты все бары строки
+            "bar": int(bars["epoch_ms"][-1]),
+            "analysis": TechnicalService.analysis_response(symbol, self.days, Timeframe.DAILY, result["analysis"]),
+            "indicators": result["indicators"],
+            "trend": result["trend"],
+        }
+
+    async def run_cycle(self) -> int:
+        """
+        Один цикл: обновление листинга и пересчет таблицы
+
+        Returns:
+            количество монет в новой таблице
+        """
+        started = time.perf_counter()
+        service = TechnicalService(self.client, self.executor)
+        listing = await service.crypto_service.get_crypto_prices(limit=self.top_n)
+
+        # Не больше задач, чем воркеров: запросы пользователей не упираются в очередь пула
+        semaphore = asyncio.Semaphore(max(self.executor.max_workers, 1))
+
+        async def materialize(symbol: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._materialize(service, symbol)
+
+        entries = await asyncio.gather(*(materialize(price.symbol) for price in listing))
+
+        table: Dict[str, Dict[str, Any]] = {}
+        for price, entry in zip(listing, entries):
+            if entry is not None:
+                table[price.symbol.upper()] = entry
+                table[str(price.id)] = entry
+        self._table = table
+
+        coins = sum(entry is not None for entry in entries)
+        self.cycles += 1
+        self.last_cycle_seconds = time.perf_counter() - started
+        self.last_refresh = datetime.now().isoformat()
+        observe_materializer_cycle(self.last_cycle_seconds, coins)
+        logger.info(f"Материализованы индикаторы {coins} из {len(listing)} монет за {self.last_cycle_seconds:.2f} с")
+        return coins
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_cycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка цикла материализации индикаторов: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Запуск фонового цикла"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"📐 Материализация индикаторов: топ-{self.top_n}, {self.days} дней, каждые {self.interval} с")
+
+    async def stop(self):
+        """Остановка фонового цикла"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("📐 Материализация индикаторов остановлена")
+
+
+def current_daily_bar() -> int:
+    """Начало текущего дневного бара (мс эпохи) - по тем же правилам, что и бары истории"""
+    now = np.array([to_epoch_ms(datetime.now().isoformat())], dtype=np.int64)
+    return int(bucket_starts(now, TIMEFRAME_INTERVALS[Timeframe.DAILY])[0])
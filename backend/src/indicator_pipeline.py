@@ -0,0 +1,291 @@
+"""
+Indicator Pipeline
+Декларативный граф технических индикаторов с мемоизацией промежуточных рядов
+"""
+
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .constants import (
+    DEFAULT_RSI_PERIOD, DEFAULT_SMA_PERIOD,
+    DEFAULT_MACD_FAST, DEFAULT_MACD_SLOW, DEFAULT_MACD_SIGNAL,
+)
+from .exceptions import ValidationError
+
+
+def _memoized(method: Callable) -> Callable:
+    """Кэширует результат узла графа по имени метода и аргументам"""
+    @wraps(method)
+    def wrapper(self: "IndicatorPipeline", *args):
+        key = (method.__name__,) + args
+        if key not in self._cache:
+            self._cache[key] = method(self, *args)
+        return self._cache[key]
+    return wrapper
+
+
+def _time_major(values: np.ndarray):
+    """Итерация по времени: float для одного ряда, вектор по монетам для матрицы"""
+    return values.tolist() if values.ndim == 1 else np.moveaxis(values, -1, 0)
+
+
+def _ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA вдоль последней оси, выровненная по исходным индексам.
+
+    Ведущие NaN (период прогрева предыдущего индикатора) пропускаются,
+    первое значение EMA равно SMA первых `period` валидных точек.
+    Для матрицы монеты x время рекурсия идет по времени, векторно по монетам.
+    """
+    result = np.full(values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(values).reshape(-1, values.shape[-1]).any(axis=0))
+    if len(valid) < period:
+        return result
+
+    start = valid[0]
+    multiplier = 2 / (period + 1)
+    ema = values[..., start:start + period].mean(axis=-1)
+    result[..., start + period - 1] = ema
+
+    out = np.moveaxis(result[..., start + period:], -1, 0)
+    for i, value in enumerate(_time_major(values[..., start + period:])):
+        ema = value * multiplier + ema * (1 - multiplier)
+        out[i] = ema
+
+    return result
+
+
+def valid_values(series: np.ndarray) -> List[float]:
+    """Значения ряда без периода прогрева"""
+    return series[~np.isnan(series)].tolist()
+
+
+def last_value(series: np.ndarray) -> Optional[float]:
+    """Последнее значение ряда или None, если данных недостаточно"""
+    if len(series) == 0 or np.isnan(series[-1]):
+        return None
+    return float(series[-1])
+
+
+class IndicatorPipeline:
+    """
+    Граф индикаторов для одного ценового ряда
+
+    Как работает:
+    1. Каждый узел (оконные суммы, EMA, разности, индикаторы) - метод класса
+    2. Результат узла мемоизируется на время жизни пайплайна (один запрос)
+    3. Индикаторы запрашивают общие промежуточные ряды, а не пересчитывают их
+    4. `evaluate` вычисляет только запрошенные выходы и их зависимости
+
+    Все ряды выровнены по индексам исходных цен: период прогрева заполнен NaN.
+    Вместо одного ряда можно передать матрицу монеты x время - все узлы
+    (кроме `trend`) считаются вдоль последней оси за один проход.
+    """
+
+    def __init__(self, prices: Sequence[float]):
+        self.prices = np.asarray(prices, dtype=float)
+        self._cache: Dict[tuple, Any] = {}
+
+    def __len__(self) -> int:
+        return self.prices.shape[-1]
+
+    # Промежуточные ряды
+
+    @_memoized
+    def diff(self) -> np.ndarray:
+        """Изменения цены между соседними точками (длина n - 1)"""
+        return np.diff(self.prices, axis=-1)
+
+    @_memoized
+    def _offset(self) -> np.ndarray:
+        """Первая цена каждого ряда: сдвиг перед накоплением сумм"""
+        return self.prices[..., :1] if len(self) else np.zeros(self.prices.shape[:-1] + (1,))
+
+    @_memoized
+    def _centered_cumsums(self) -> tuple:
+        """Кумулятивные суммы цен и их квадратов (со сдвигом для точности)"""
+        centered = self.prices - self._offset()
+        zero = np.zeros(self.prices.shape[:-1] + (1,))
+        return (
+            np.concatenate((zero, np.cumsum(centered, axis=-1)), axis=-1),
+            np.concatenate((zero, np.cumsum(centered * centered, axis=-1)), axis=-1),
+        )
+
+    @_memoized
+    def window_sum(self, period: int) -> np.ndarray:
+        """Оконная сумма (центрированных) цен"""
+        result = np.full(self.prices.shape, np.nan)
+        if len(self) >= period:
+            cumsum, _ = self._centered_cumsums()
+            result[..., period - 1:] = cumsum[..., period:] - cumsum[..., :-period]
+        return result
+
+    @_memoized
+    def window_sqsum(self, period: int) -> np.ndarray:
+        """Оконная сумма квадратов (центрированных) цен"""
+        result = np.full(self.prices.shape, np.nan)
+        if len(self) >= period:
+            _, cumsq = self._centered_cumsums()
+            result[..., period - 1:] = cumsq[..., period:] - cumsq[..., :-period]
+        return result
+
+    @_memoized
+    def sma(self, period: int) -> np.ndarray:
+        """Простая скользящая средняя"""
+        return self.window_sum(period) / period + self._offset()
+
+    @_memoized
+    def std(self, period: int) -> np.ndarray:
+        """Скользящее стандартное отклонение (генеральное, как np.std)"""
+        mean = self.window_sum(period) / period
+        variance = self.window_sqsum(period) / period - mean * mean
+        return np.sqrt(np.clip(variance, 0.0, None))
+
+    @_memoized
+    def ema(self, period: int) -> np.ndarray:
+        """Экспоненциальная скользящая средняя цены"""
+        return _ema(self.prices, period)
+
+    # Индикаторы
+
+    @_memoized
+    def rsi(self, period: int = DEFAULT_RSI_PERIOD) -> np.ndarray:
+        """Индекс относительной силы (сглаживание Уайлдера)"""
+        result = np.full(self.prices.shape, np.nan)
+        if len(self) < period + 1:
+            return result
+
+        changes = self.diff()
+        gains = np.maximum(changes, 0)
+        losses = np.maximum(-changes, 0)
+
+        # Сглаженные средние прироста и падения (рекурсия по времени)
+        avg_gains = np.empty(result[..., period:].shape)
+        avg_losses = np.empty(avg_gains.shape)
+        avg_gain = gains[..., :period].mean(axis=-1)
+        avg_loss = losses[..., :period].mean(axis=-1)
+        avg_gains[..., 0], avg_losses[..., 0] = avg_gain, avg_loss
+
+        steps = zip(_time_major(gains[..., period:]), _time_major(losses[..., period:]))
+        for i, (gain, loss) in enumerate(steps, start=1):
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+            avg_gains[..., i], avg_losses[..., i] = avg_gain, avg_loss
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + avg_gains / avg_losses)
+        result[..., period:] = np.where(avg_losses == 0, 100.0, rsi)
+        return result
+
+    @_memoized
+    def macd(self, fast_period: int = DEFAULT_MACD_FAST, slow_period: int = DEFAULT_MACD_SLOW,
+             signal_period: int = DEFAULT_MACD_SIGNAL) -> Dict[str, np.ndarray]:
+        """MACD: линия, сигнальная линия и гистограмма"""
+        macd_line = self.ema(fast_period) - self.ema(slow_period)
+        signal_line = _ema(macd_line, signal_period)
+        return {
+            "macd": macd_line,
+            "signal": signal_line,
+            "histogram": macd_line - signal_line,
+        }
+
+    @_memoized
+    def bollinger(self, period: int = DEFAULT_SMA_PERIOD, std_dev: float = 2) -> Dict[str, np.ndarray]:
+        """Полосы Боллинджера"""
+        middle = self.sma(period)
+        deviation = std_dev * self.std(period)
+        return {
+            "upper": middle + deviation,
+            "middle": middle,
+            "lower": middle - deviation,
+        }
+
+    @_memoized
+    def trend(self, sma_short: int = 20, sma_long: int = 50) -> Dict[str, Any]:
+        """Анализ тренда по пересечению скользящих средних (для одного ряда)"""
+        if len(self.prices) < sma_long:
+            return {"trend": "недостаточно данных", "strength": "неизвестно"}
+
+        short_values = self.sma(sma_short)
+        long_values = self.sma(sma_long)
+
+        current_short, current_long = short_values[-1], long_values[-1]
+        has_previous = len(self.prices) > sma_long
+        previous_short = short_values[-2] if has_previous else current_short
+        previous_long = long_values[-2] if has_previous else current_long
+
+        if current_short > current_long and previous_short > previous_long:
+            trend = "восходящий"
+        elif current_short < current_long and previous_short < previous_long:
+            trend = "нисходящий"
+        else:
+            trend = "боковой"
+
+        price_change = float((self.prices[-1] - self.prices[0]) / self.prices[0] * 100)
+        if abs(price_change) > 20:
+            strength = "сильный"
+        elif abs(price_change) > 10:
+            strength = "умеренный"
+        else:
+            strength = "слабый"
+
+        return {
+            "trend": trend,
+            "strength": strength,
+            "price_change_percent": round(price_change, 2)
+        }
+
+    # Выходы графа
+
+    def evaluate(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Вычисление выбранных индикаторов (полные выровненные ряды)"""
+        return {name: INDICATORS[name](self) for name in names}
+
+    def latest(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Последние значения выбранных индикаторов"""
+        return {name: _map_series(value, last_value) for name, value in self.evaluate(names).items()}
+
+    def series(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Ряды выбранных индикаторов без периода прогрева"""
+        return {name: _map_series(value, valid_values) for name, value in self.evaluate(names).items()}
+
+
+def _map_series(value: Any, func: Callable[[np.ndarray], Any]) -> Any:
+    if isinstance(value, dict):
+        return {key: func(series) for key, series in value.items()}
+    return func(value)
+
+
+# Декларативное описание доступных индикаторов: имя -> узел графа
+INDICATORS: Dict[str, Callable[[IndicatorPipeline], Any]] = {
+    "sma_20": lambda p: p.sma(20),
+    "sma_50": lambda p: p.sma(50),
+    "ema_12": lambda p: p.ema(12),
+    "ema_26": lambda p: p.ema(26),
+    "rsi": lambda p: p.rsi(DEFAULT_RSI_PERIOD),
+    "macd": lambda p: p.macd(DEFAULT_MACD_FAST, DEFAULT_MACD_SLOW, DEFAULT_MACD_SIGNAL),
+    "bollinger_bands": lambda p: p.bollinger(DEFAULT_SMA_PERIOD, 2),
+}
+
+DEFAULT_INDICATORS = ["sma_20", "sma_50", "rsi", "macd", "bollinger_bands"]
+
+# Индикаторы, которые /technical/indicators отдает полными рядами, а не последним значением
+SERIES_INDICATORS = ["bollinger_bands", "macd"]
+
+
+def parse_indicator_selection(raw: Optional[str]) -> List[str]:
+    """Разбор параметра `indicators=` (список имен через запятую)"""
+    if not raw:
+        return list(DEFAULT_INDICATORS)
+
+    names = []
+    for name in (part.strip().lower() for part in raw.split(",")):
+        if not name or name in names:
+            continue
+        if name not in INDICATORS:
+            raise ValidationError("indicators", name, f"один из {', '.join(INDICATORS)}")
+        names.append(name)
+
+    return names or list(DEFAULT_INDICATORS)
@@ -0,0 +1,105 @@
+"""
+Market Ingest
+Единая точка приема тиков: версии данных, последние цены и подписчики-потребители
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from loguru import logger
+
+from .analysis_cache import DataVersionRegistry, data_versions
+from .market_simulator import TickBatch
+from .metrics import observe_ticks_ingested
+
+
+class MarketIngest:
+    """
+    Прием пакетов тиков
+
+    Как работает:
+    1. Пакет приходит целиком в колоночном виде (время x монеты)
+    2. Последний тик каждой монеты становится ее текущей ценой и маркером версии данных:
+       работа на пакет пропорциональна числу монет, а не числу тиков
+    3. Потребители (свечи, алерты, статистики, рассылка) получают пакет как есть
+       и обрабатывают его векторно
+    """
+
+    def __init__(self, versions: DataVersionRegistry = data_versions):
+        self.versions = versions
+        self.ticks = 0
+        # символ -> (мс эпохи, цена) последнего тика
+        self.latest: Dict[str, Tuple[int, float]] = {}
+        self._consumers: List[Callable[[TickBatch], None]] = []
+
+    def add_consumer(self, consumer: Callable[[TickBatch], None]):
+        """Подписка на пакеты тиков"""
+        self._consumers.append(consumer)
+
+    def remove_consumer(self, consumer: Callable[[TickBatch], None]):
+        if consumer in self._consumers:
+            self._consumers.remove(consumer)
+
+    def ingest(self, batch: TickBatch) -> int:
+        """Прием пакета; возвращает число тиков"""
+        started = time.perf_counter()
+        if batch.prices.size == 0:
+            return 0
+
+        last_prices = batch.prices[-1].tolist()
+        tick_time = int(batch.epoch_ms[-1])
+        for symbol, price in zip(batch.symbols, last_prices):
+            self.latest[symbol] = (tick_time, price)
+            self.versions.observe(symbol, (tick_time, price))
+
+        for consumer in self._consumers:
+            try:
+                consumer(batch)
+            except Exception as e:
+                logger.error(f"Ошибка потребителя тиков {getattr(consumer, '__name__', consumer)}: {e}")
+
+        self.ticks += batch.size
+        observe_ticks_ingested(batch.size, time.perf_counter() - started)
+        return batch.size
+
+    def ingest_quotes(self, symbols: List[str], last_updated: List[str], prices: List[float]) -> int:
+        """
+        Прием котировок листинга
+
+        Повторно опрошенная котировка (то же время и цена) - не новый тик и пропускается.
+        Новые котировки группируются по своему времени: пакет из одной строки на каждое время.
+        """
+        groups: Dict[int, Tuple[List[str], List[float]]] = {}
+        for symbol, updated, price in zip(symbols, last_updated, prices):
+            tick_time = quote_time(updated)
+            if self.latest.get(symbol) == (tick_time, price):
+                continue
+            group = groups.setdefault(tick_time, ([], []))
+            group[0].append(symbol)
+            group[1].append(price)
+
+        ingested = 0
+        for tick_time in sorted(groups):
+            names, values = groups[tick_time]
+            batch = TickBatch(
+                names,
+                np.array([tick_time], dtype=np.int64),
+                np.array([values], dtype=float),
+                np.zeros((1, len(names)))
+            )
+            ingested += self.ingest(batch)
+        return ingested
+
+def quote_time(last_updated: str) -> int:
+    """Время котировки (ISO 8601, как в ответах API) в мс эпохи"""
+    try:
+        return round(datetime.fromisoformat(last_updated.replace("Z", "+00:00")).timestamp() * 1000)
+    except (AttributeError, ValueError):
+        return 0
+
+
+# Глобальный прием тиков
+market_ingest = MarketIngest()
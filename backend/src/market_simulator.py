@@ -0,0 +1,163 @@
+"""
+Market Simulator
+Синтетический рынок: геометрическое броуновское движение со скачками и режимами волатильности
+"""
+
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+DAY_SECONDS = 24 * 60 * 60
+
+
+class TickBatch(NamedTuple):
+    """
+    Пакет тиков в колоночном виде
+
+    Строка - момент времени, столбец - монета: prices[i, j] - цена `symbols[j]` в `epoch_ms[i]`.
+    """
+    symbols: List[str]
+    epoch_ms: np.ndarray
+    prices: np.ndarray
+    volumes: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return self.prices.size
+
+
+class MarketSimulator:
+    """
+    Генератор тиков для множества монет
+
+    Модель на шаге dt для каждой монеты:
+        log(P[t+1] / P[t]) = (mu - sigma^2 / 2) dt + sigma sqrt(dt) Z + J
+    - sigma зависит от режима: спокойный или турбулентный; режим переключается
+      с вероятностью dt / regime_duration на шаге
+    - J - скачки: число скачков ~ Poisson(jump_intensity dt), размер ~ N(jump_mean, jump_std)
+    - Объем растет с модулем нормированной доходности
+
+    Все шаги пакета считаются матричными операциями (время x монеты), состояние
+    (последние цены, режимы, время) переносится между пакетами. Одинаковый `seed`
+    дает одинаковую последовательность пакетов.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        initial_prices: Optional[Sequence[float]] = None,
+        seed: int = 42,
+        step_seconds: float = 1.0,
+        drift: float = 0.0,
+        calm_volatility: float = 0.6,
+        turbulent_volatility: float = 1.8,
+        regime_duration: float = 3 * DAY_SECONDS,
+        jump_intensity: float = 12.0,
+        jump_mean: float = -0.01,
+        jump_std: float = 0.04,
+        base_volumes: Optional[Sequence[float]] = None,
+        start_ms: Optional[int] = None
+    ):
+        self.symbols = list(symbols)
+        self.rng = np.random.default_rng(seed)
+        size = len(self.symbols)
+
+        # Цены и объемы по умолчанию: лог-нормальный разброс, как у реального рынка
+        self.prices = (
+            np.asarray(initial_prices, dtype=float) if initial_prices is not None
+            else np.exp(self.rng.normal(2.0, 2.5, size))
+        )
+        self.base_volumes = (
+            np.asarray(base_volumes, dtype=float) if base_volumes is not None
+            else self.prices * np.exp(self.rng.normal(8.0, 1.5, size))
+        )
+        self.regimes = np.zeros(size, dtype=np.int64)
+
+        self.step_seconds = step_seconds
+        self.drift = drift
+        self.volatilities = np.array([calm_volatility, turbulent_volatility])
+        self.switch_probability = min(step_seconds / regime_duration, 1.0)
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.time_ms = int(start_ms if start_ms is not None else datetime.now().timestamp() * 1000)
+
+    def step(self, steps: int = 1) -> TickBatch:
+        """Следующие `steps` моментов времени для всех монет"""
+        shape = (steps, len(self.symbols))
+        dt = self.step_seconds / SECONDS_PER_YEAR
+
+        # Двухрежимная цепь: четность числа переключений - текущий режим
+        switches = self.rng.random(shape) < self.switch_probability
+        regimes = (self.regimes + np.cumsum(switches, axis=0, dtype=np.int64)) % 2
+        sigma = self.volatilities[regimes]
+
+        shocks = self.rng.standard_normal(shape)
+        log_returns = (self.drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks
+
+        # Скачки редки: нормальные величины генерируются только для ячеек со скачком
+        jumps = self.rng.poisson(self.jump_intensity * dt, shape)
+        hits = np.flatnonzero(jumps)
+        if len(hits):
+            counts = jumps.ravel()[hits]
+            flat = log_returns.reshape(-1)
+            flat[hits] += counts * self.jump_mean + np.sqrt(counts) * self.jump_std * self.rng.standard_normal(len(hits))
+
+        prices = self.prices * np.exp(np.cumsum(log_returns, axis=0))
+        step_share = self.step_seconds / DAY_SECONDS
+        volumes = self.base_volumes * step_share * (0.5 + np.abs(shocks))
+
+        epoch_ms = self.time_ms + (np.arange(1, steps + 1) * self.step_seconds * 1000).astype(np.int64)
+
+        self.prices = prices[-1].copy()
+        self.regimes = regimes[-1].copy()
+        self.time_ms = int(epoch_ms[-1])
+        return TickBatch(self.symbols, epoch_ms, prices, volumes)
+
+
+def symbol_seed(symbol: str, seed: int) -> int:
+    """Стабильное между запусками зерно для монеты (hash() строк рандомизирован)"""
+    return zlib.crc32(str(symbol).upper().encode()) ^ seed
+
+
+def synthetic_history(
+    symbol: str,
+    end_price: float,
+    days: int,
+    seed: int = 42,
+    volume_24h: float = 0.0,
+    market_cap: float = 0.0,
+    end: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Дневная история монеты, заканчивающаяся текущей ценой
+
+    Путь генерируется симулятором с дневным шагом и масштабируется так, чтобы
+    последняя точка совпала с `end_price`. Для одной монеты и зерна путь воспроизводим.
+    """
+    if days <= 0:
+        return []
+
+    simulator = MarketSimulator(
+        [symbol], initial_prices=[1.0], base_volumes=[volume_24h],
+        seed=symbol_seed(symbol, seed), step_seconds=DAY_SECONDS
+    )
+    batch = simulator.step(days)
+    scale = batch.prices[:, 0] / batch.prices[-1, 0]
+    prices = (end_price * scale).tolist()
+    market_caps = (market_cap * scale).tolist()
+    volumes = batch.volumes[:, 0].tolist()
+
+    end = end or datetime.now()
+    return [
+        {
+            "timestamp": (end - timedelta(days=days - i - 1)).isoformat(),
+            "price": prices[i],
+            "volume": volumes[i],
+            "market_cap": market_caps[i]
+        }
+        for i in range(days)
+    ]
@@ -0,0 +1,262 @@
+"""
+Market Microstatistics
+Скользящие статистики по монетам (максимум, минимум, VWAP, реализованная волатильность, число тиков),
+обновляемые инкрементально на каждом пакете тиков
+"""
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .config import settings
+from .exceptions import ValidationError
+from .market_ingest import MarketIngest, market_ingest
+from .market_simulator import SECONDS_PER_YEAR, TickBatch
+from .rolling import MonotonicDeque
+
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(label: str) -> int:
+    """Длина окна в секундах из метки вида 90s, 15m, 1h, 24h, 7d (или просто секунд)"""
+    label = str(label).strip().lower()
+    try:
+        if label[-1:] in WINDOW_UNITS:
+            seconds = int(label[:-1]) * WINDOW_UNITS[label[-1]]
+        else:
+            seconds = int(label)
+    except ValueError:
+        seconds = 0
+    if seconds <= 0:
+        raise ValidationError("window", label, "длительность вида 15m, 1h, 24h, 7d")
+    return seconds
+
+
+def bucket_length(window_seconds: int, resolution: int) -> int:
+    """Длина корзины окна в мс"""
+    return max(window_seconds * 1000 // max(resolution, 1), 1)
+
+
+class RollingWindow:
+    """
+    Скользящее окно статистик одной монеты
+
+    Окно делится на `resolution` корзин: тики корзины сворачиваются в агрегаты
+    (открытие, максимум, минимум, закрытие, объем, цена*объем, сумма квадратов
+    лог-доходностей, число тиков). Суммы окна - бегущие: корзина прибавляется
+    при появлении и вычитается при выходе из окна. Максимум и минимум по закрытым
+    корзинам - монотонные деки. Каждая корзина входит и выходит один раз, поэтому
+    обновление - O(1) амортизированно, память - O(resolution) при любой частоте тиков.
+    Граница окна точна до длины корзины.
+    """
+
+    __slots__ = (
+        "window_ms", "bucket_ms", "buckets", "highs", "lows",
+        "volume", "price_volume", "squared_returns", "count",
+    )
+
+    def __init__(self, window_seconds: int, resolution: int = 1440):
+        self.window_ms = window_seconds * 1000
+        self.bucket_ms = bucket_length(window_seconds, resolution)
+        # [начало, открытие, максимум, минимум, закрытие, объем, цена*объем, сумма r^2, тиков]
+        self.buckets: Deque[List[float]] = deque()
+        self.highs = MonotonicDeque("max")
+        self.lows = MonotonicDeque("min")
+        self.volume = 0.0
+        self.price_volume = 0.0
+        self.squared_returns = 0.0
+        self.count = 0
+
+    def add(
+        self, start: int, open_: float, high: float, low: float, close: float,
+        volume: float, price_volume: float, squared_returns: float, count: int
+    ):
+        """Добавление агрегата тиков одной корзины (`start` - начало корзины)"""
+        buckets = self.buckets
+        # Запоздавший тик (старше текущей корзины) учитывается в текущей корзине
+        if buckets and start <= buckets[-1][0]:
+            current = buckets[-1]
+            current[2] = max(current[2], high)
+            current[3] = min(current[3], low)
+            current[4] = close
+            current[5] += volume
+            current[6] += price_volume
+            current[7] += squared_returns
+            current[8] += count
+        else:
+            # Текущая корзина закрывается и уходит в монотонные деки
+            if buckets:
+                closed = buckets[-1]
+                self.highs.push(closed[0], closed[2])
+                self.lows.push(closed[0], closed[3])
+            buckets.append([start, open_, high, low, close, volume, price_volume, squared_returns, count])
+
+        self.volume += volume
+        self.price_volume += price_volume
+        self.squared_returns += squared_returns
+        self.count += count
+
+    def evict(self, now_ms: int):
+        """Удаление корзин, целиком вышедших из окна, заканчивающегося в `now_ms`"""
+        buckets = self.buckets
+        cutoff = now_ms - self.window_ms
+        # Частый случай: старейшая корзина еще в окне
+        if not buckets or buckets[0][0] + self.bucket_ms > cutoff:
+            return
+        while buckets and buckets[0][0] + self.bucket_ms <= cutoff:
+            bucket = buckets.popleft()
+            self.volume -= bucket[5]
+            self.price_volume -= bucket[6]
+            self.squared_returns -= bucket[7]
+            self.count -= bucket[8]
+        if buckets:
+            self.highs.evict(buckets[0][0])
+            self.lows.evict(buckets[0][0])
+        else:
+            self.highs = MonotonicDeque("max")
+            self.lows = MonotonicDeque("min")
+            self.volume = self.price_volume = self.squared_returns = 0.0
+            self.count = 0
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Статистики окна или None, если в окне нет тиков"""
+        if not self.buckets:
+            return None
+
+        current = self.buckets[-1]
+        high = max(self.highs.value, current[2]) if len(self.highs) else current[2]
+        low = min(self.lows.value, current[3]) if len(self.lows) else current[3]
+        open_ = self.buckets[0][1]
+        # Бегущие суммы накапливают ошибку округления: отрицательный остаток - это ноль
+        variance = max(self.squared_returns, 0.0)
+        return {
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": current[4],
+            "change_percent": (current[4] / open_ - 1) * 100 if open_ else None,
+            "vwap": self.price_volume / self.volume if self.volume > 0 else None,
+            "volume": max(self.volume, 0.0),
+            "realized_volatility": math.sqrt(variance),
+            "annualized_volatility": math.sqrt(variance * SECONDS_PER_YEAR * 1000 / self.window_ms),
+            "ticks": self.count,
+        }
+
+
+class MarketStats:
+    """
+    Скользящие статистики всех монет по нескольким окнам
+
+    Как работает:
+    1. Подписан на MarketIngest: статистики строятся из уже принятых тиков,
+       без дополнительных запросов к внешнему API
+    2. Пакет (время x монеты) разбивается на отрезки по корзинам окна; агрегаты
+       отрезков (максимум, минимум, суммы) считаются векторно сразу для всех монет
+    3. Каждая монета получает O(число корзин в пакете) обновлений окна
+    4. Окна считаются по времени данных: конец окна - время последнего тика потока
+    """
+
+    def __init__(self, windows: List[str], resolution: int = 1440, ingest: MarketIngest = market_ingest):
+        self.ingest = ingest
+        self.resolution = resolution
+        self.windows: Dict[str, int] = {label: parse_window(label) for label in windows}
+        self._stats: Dict[str, Dict[str, RollingWindow]] = {}
+        self._last_prices: Dict[str, float] = {}
+        self.now_ms = 0
+
+    @property
+    def default_window(self) -> str:
+        """Самое длинное окно (обычно 24h)"""
+        return max(self.windows, key=self.windows.get)
+
+    def on_batch(self, batch: TickBatch):
+        """Потребитель MarketIngest: обновление окон по пакету тиков"""
+        if batch.prices.size == 0:
+            return
+
+        prices = batch.prices
+        volumes = batch.volumes
+        epoch_ms = batch.epoch_ms
+        symbols = batch.symbols
+
+        # Лог-доходности между тиками; первая - от последней цены предыдущего пакета
+        previous = np.array([self._last_prices.get(symbol, np.nan) for symbol in symbols], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(np.vstack([previous, prices])), axis=0)
+        squared = np.nan_to_num(returns * returns, nan=0.0, posinf=0.0)
+        price_volume = prices * volumes
+
+        windows = {}
+        for label, seconds in self.windows.items():
+            bucket_ms = bucket_length(seconds, self.resolution)
+            bucket_ids = epoch_ms // bucket_ms
+            starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+            ends = np.r_[starts[1:], len(epoch_ms)]
+            # Агрегаты отрезков: монета x отрезок x (открытие, максимум, минимум, закрытие, объем, цена*объем, r^2)
+            aggregates = np.stack([
+                prices[starts],
+                np.maximum.reduceat(prices, starts, axis=0),
+                np.minimum.reduceat(prices, starts, axis=0),
+                prices[ends - 1],
+                np.add.reduceat(volumes, starts, axis=0),
+                np.add.reduceat(price_volume, starts, axis=0),
+                np.add.reduceat(squared, starts, axis=0),
+            ], axis=-1).transpose(1, 0, 2).tolist()
+            segments = list(zip((bucket_ids[starts] * bucket_ms).tolist(), (ends - starts).tolist()))
+            windows[label] = (segments, aggregates)
+
+        now_ms = int(epoch_ms[-1])
+        self.now_ms = max(self.now_ms, now_ms)
+        for column, symbol in enumerate(symbols):
+            stats = self._stats.get(symbol)
+            if stats is None:
+                stats = self._stats[symbol] = {
+                    label: RollingWindow(seconds, self.resolution) for label, seconds in self.windows.items()
+                }
+            for label, window in stats.items():
+                segments, aggregates = windows[label]
+                for (start, count), values in zip(segments, aggregates[column]):
+                    window.add(start, *values, count)
+                window.evict(now_ms)
+
+        last_prices = prices[-1].tolist()
+        for symbol, price in zip(symbols, last_prices):
+            self._last_prices[symbol] = price
+
+    def get(self, symbol: str, window: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Статистики монеты за окно (по умолчанию - самое длинное) или None"""
+        window = window or self.default_window
+        if window not in self.windows:
+            raise ValidationError("window", window, f"одно из окон {', '.join(self.windows)}")
+        # ID и slug монеты разрешаются в символ через реестр версий данных
+        stats = self._stats.get(self.ingest.versions.resolve(symbol))
+        if stats is None:
+            return None
+        rolling = stats[window]
+        rolling.evict(self.now_ms)
+        snapshot = rolling.snapshot()
+        if snapshot is not None:
+            snapshot["window"] = window
+        return snapshot
+
+    def get_all(self, symbol: str) -> Dict[str, Dict[str, Any]]:
+        """Статистики монеты по всем окнам"""
+        result = {}
+        for window in self.windows:
+            snapshot = self.get(symbol, window)
+            if snapshot is not None:
+                result[window] = snapshot
+        return result
+
+    def start(self):
+        """Подписка на тики"""
+        self.ingest.add_consumer(self.on_batch)
+
+    def stop(self):
+        self.ingest.remove_consumer(self.on_batch)
+
+
+# Глобальные скользящие статистики
+market_stats = MarketStats(settings.microstats_windows.split(","), settings.microstats_resolution)
@@ -61,6 +61,243 @@ CRYPTO_MARKET_CAP = Gauge(
     ['symbol']
 )
 
+# Метрики для кэша результатов технического анализа
+ANALYSIS_CACHE_REQUESTS = Counter(
+    'analysis_cache_requests_total',
+    'Technical analysis cache lookups',
+    ['result']
+)
+
+ANALYSIS_CACHE_SAVED_SECONDS = Counter(
+    'analysis_cache_saved_seconds_total',
+    'Compute time saved by technical analysis cache hits'
+)
+
+ANALYSIS_CACHE_HIT_RATIO = Gauge(
+    'analysis_cache_hit_ratio',
+    'Technical analysis cache hit ratio'
+)
+
+ANALYSIS_CACHE_ENTRIES = Gauge(
+    'analysis_cache_entries',
+    'Current technical analysis cache entries'
+)
+
+# Метрики для пула вычислений технического анализа
+ANALYSIS_QUEUE_WAIT = Histogram(
+    'analysis_queue_wait_seconds',
+    'Time analysis jobs spend waiting for a worker',
+    ['executor']
+)
+
+ANALYSIS_EXECUTION = Histogram(
+    'analysis_execution_seconds',
+    'Analysis job execution time in a worker',
+    ['executor']
+)
+
+ANALYSIS_QUEUE_DEPTH = Gauge(
+    'analysis_queue_depth',
+    'Analysis jobs queued or running',
+    ['executor']
+)
+
+ANALYSIS_REJECTED = Counter(
+    'analysis_jobs_rejected_total',
+    'Analysis jobs rejected because the queue was full',
+    ['executor']
+)
+
+# Метрики для материализации индикаторов топ-N монет
+MATERIALIZER_CYCLE_DURATION = Histogram(
+    'indicator_materializer_cycle_seconds',
+    'Duration of one indicator materialization cycle',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+MATERIALIZED_COINS = Gauge(
+    'indicator_materializer_coins',
+    'Coins in the materialized indicator table'
+)
+
+MATERIALIZER_READS = Counter(
+    'indicator_materializer_reads_total',
+    'Technical endpoint reads served from the materialized table or computed on demand',
+    ['result']
+)
+
+# Метрики приема тиков
+TICKS_INGESTED = Counter(
+    'market_ticks_ingested_total',
+    'Ticks accepted by the ingest path'
+)
+
+INGEST_BATCH_DURATION = Histogram(
+    'market_ingest_batch_seconds',
+    'Time to ingest one tick batch including consumers',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+# Метрики ценовых алертов
+ALERT_EVALUATION_DURATION = Histogram(
+    'price_alert_evaluation_seconds',
+    'Time to evaluate price alerts against one tick batch',
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+)
+
+ALERTS_TRIGGERED = Counter(
+    'price_alerts_triggered_total',
+    'Price alerts triggered'
+)
+
+ALERTS_ACTIVE = Gauge(
+    'price_alerts_active',
+    'Registered price alerts'
+)
+
+ALERT_DELIVERY_DURATION = Histogram(
+    'price_alert_delivery_seconds',
+    'Time from alert trigger to WebSocket delivery',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+ALERTS_DROPPED = Counter(
+    'price_alerts_dropped_total',
+    'Triggered alerts dropped because the delivery queue was full'
+)
+
+# Метрики архива снимков листинга
+SNAPSHOTS_WRITTEN = Counter(
+    'listing_snapshots_written_total',
+    'Listing snapshots written to the archive',
+    ['kind']
+)
+
+SNAPSHOT_BYTES = Counter(
+    'listing_snapshot_bytes_total',
+    'Compressed bytes written to the listing snapshot archive',
+    ['kind']
+)
+
+SNAPSHOT_WRITE_DURATION = Histogram(
+    'listing_snapshot_write_seconds',
+    'Time to encode and append one listing snapshot',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+SNAPSHOT_READ_DURATION = Histogram(
+    'listing_snapshot_read_seconds',
+    'Time to reconstruct a point-in-time listing snapshot',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+SNAPSHOT_READ_RECORDS = Histogram(
+    'listing_snapshot_read_records',
+    'Archive records (keyframe plus deltas) read per point-in-time query',
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120)
+)
+
+# Метрики тем WebSocket-рассылки
+WEBSOCKET_TOPIC_POLLS = Counter(
+    'websocket_topic_polls_total',
+    'Upstream polls made by WebSocket topic producers',
+    ['topic', 'status']
+)
+
+WEBSOCKET_TOPIC_POLL_DURATION = Histogram(
+    'websocket_topic_poll_seconds',
+    'Duration of one WebSocket topic producer poll',
+    ['topic'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+WEBSOCKET_TOPIC_SUBSCRIBERS = Gauge(
+    'websocket_topic_subscribers',
+    'WebSocket subscribers per topic kind',
+    ['topic']
+)
+
+# Метрики очередей отправки WebSocket
+WEBSOCKET_QUEUE_DEPTH = Histogram(
+    'websocket_send_queue_depth',
+    'Per-connection outbound queue depth after enqueue',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+
+WEBSOCKET_SEND_LATENCY = Histogram(
+    'websocket_send_latency_seconds',
+    'Time from enqueue to completed WebSocket send',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+WEBSOCKET_DROPPED = Counter(
+    'websocket_slow_consumer_events_total',
+    'Messages dropped or conflated, or clients disconnected, because an outbound queue was full',
+    ['policy']
+)
+
+WEBSOCKET_PINGS = Counter(
+    'websocket_pings_total',
+    'Heartbeat pings sent to silent connections (protocol ping frame or ping message)',
+    ['transport']
+)
+
+WEBSOCKET_IDLE_REAPED = Counter(
+    'websocket_idle_reaped_total',
+    'Connections closed after receiving no frames or pongs for the idle timeout'
+)
+
+WEBSOCKET_CONFLATED = Counter(
+    'websocket_conflated_updates_total',
+    'Updates merged into a pending flush of a rate-limited connection',
+    ['kind']
+)
+
+# Метрики сериализации WebSocket рассылки
+WEBSOCKET_SERIALIZATION_DURATION = Histogram(
+    'websocket_serialization_duration_seconds',
+    'Time to encode one WebSocket payload in one wire format',
+    ['source', 'format'],
+    buckets=(0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+
+WEBSOCKET_PAYLOADS = Counter(
+    'websocket_payloads_encoded_total',
+    'Encoded WebSocket payloads, each shared by all recipients of its wire format',
+    ['source', 'format']
+)
+
+WEBSOCKET_ENCODED_BYTES = Counter(
+    'websocket_encoded_bytes_total',
+    'Size of encoded WebSocket payloads before per-connection compression',
+    ['source', 'format']
+)
+
+# Метрики дельта-протокола WebSocket
+WEBSOCKET_TOPIC_UPDATES = Counter(
+    'websocket_topic_updates_total',
+    'Topic publications by delta protocol result (snapshot, delta, unchanged)',
+    ['topic', 'result']
+)
+
+WEBSOCKET_TOPIC_PAYLOAD_BYTES = Counter(
+    'websocket_topic_payload_bytes_total',
+    'Encoded size of topic publications as full messages and as deltas',
+    ['topic', 'encoding']
+)
+
+WEBSOCKET_TOPIC_RESUMES = Counter(
+    'websocket_topic_resumes_total',
+    'First messages of topic subscriptions (current, replayed from buffer, snapshot, latest full message)',
+    ['topic', 'result']
+)
+
+WEBSOCKET_TOPIC_REPLAYED = Counter(
+    'websocket_topic_replayed_messages_total',
+    'Buffered topic deltas replayed to reconnecting subscribers',
+    ['topic']
+)
+
 def track_request_metrics(func):
     """Декоратор для отслеживания метрик HTTP запросов"""
     @wraps(func)
@@ -162,4 +399,120 @@ def record_api_call(api_name: str, endpoint: str):
     API_CALLS.labels(
         endpoint=f"{api_name}_{endpoint}",
         status='success'
-    ).inc() 
\ No newline at end of file
+    ).inc() 
+
+def record_analysis_cache_lookup(hit: bool, saved_seconds: float, hit_ratio: float, entries: int):
+    """Запись метрик обращения к кэшу технического анализа"""
+    ANALYSIS_CACHE_REQUESTS.labels(result='hit' if hit else 'miss').inc()
+    if hit:
+        ANALYSIS_CACHE_SAVED_SECONDS.inc(saved_seconds)
+    ANALYSIS_CACHE_HIT_RATIO.set(hit_ratio)
+    ANALYSIS_CACHE_ENTRIES.set(entries)
+
+def observe_analysis_job(executor: str, queue_wait: float, execution: float):
+    """Запись времени ожидания и выполнения задачи анализа"""
+    ANALYSIS_QUEUE_WAIT.labels(executor=executor).observe(queue_wait)
+    ANALYSIS_EXECUTION.labels(executor=executor).observe(execution)
+
+def set_analysis_queue_depth(executor: str, depth: int):
+    """Обновление глубины очереди задач анализа"""
+    ANALYSIS_QUEUE_DEPTH.labels(executor=executor).set(depth)
+
+def record_analysis_rejected(executor: str):
+    """Запись отклоненной задачи анализа"""
+    ANALYSIS_REJECTED.labels(executor=executor).inc()
+
+def observe_materializer_cycle(duration: float, coins: int):
+    """Запись длительности цикла материализации и размера таблицы"""
+    MATERIALIZER_CYCLE_DURATION.observe(duration)
+    MATERIALIZED_COINS.set(coins)
+
+def record_materializer_read(hit: bool):
+    """Запись чтения из материализованной таблицы (hit) или расчета по запросу (miss)"""
+    MATERIALIZER_READS.labels(result='hit' if hit else 'miss').inc()
+
+def observe_ticks_ingested(ticks: int, duration: float):
+    """Запись принятого пакета тиков"""
+    TICKS_INGESTED.inc(ticks)
+    INGEST_BATCH_DURATION.observe(duration)
+
+def observe_alert_evaluation(duration: float, triggered: int):
+    """Запись проверки алертов по пакету тиков"""
+    ALERT_EVALUATION_DURATION.observe(duration)
+    if triggered:
+        ALERTS_TRIGGERED.inc(triggered)
+
+def set_active_alerts(count: int):
+    """Обновление числа зарегистрированных алертов"""
+    ALERTS_ACTIVE.set(count)
+
+def observe_alert_delivery(duration: float):
+    """Запись задержки доставки алерта"""
+    ALERT_DELIVERY_DURATION.observe(duration)
+
+def record_alerts_dropped():
+    """Запись алерта, не поместившегося в очередь доставки"""
+    ALERTS_DROPPED.inc()
+
+def observe_snapshot_write(keyframe: bool, size: int, duration: float):
+    """Запись снимка листинга в архив"""
+    kind = 'keyframe' if keyframe else 'delta'
+    SNAPSHOTS_WRITTEN.labels(kind=kind).inc()
+    SNAPSHOT_BYTES.labels(kind=kind).inc(size)
+    SNAPSHOT_WRITE_DURATION.observe(duration)
+
+def observe_snapshot_read(duration: float, records: int):
+    """Восстановление снимка листинга на момент времени"""
+    SNAPSHOT_READ_DURATION.observe(duration)
+    SNAPSHOT_READ_RECORDS.observe(records)
+
+def observe_topic_poll(topic: str, duration: float, success: bool):
+    """Запись опроса источника темы WebSocket-рассылки"""
+    WEBSOCKET_TOPIC_POLLS.labels(topic=topic, status='success' if success else 'error').inc()
+    WEBSOCKET_TOPIC_POLL_DURATION.labels(topic=topic).observe(duration)
+
+def set_topic_subscribers(topic: str, count: int):
+    """Обновление числа подписчиков тем одного типа"""
+    WEBSOCKET_TOPIC_SUBSCRIBERS.labels(topic=topic).set(count)
+
+def observe_websocket_queue_depth(depth: int):
+    """Глубина очереди отправки соединения после постановки сообщения"""
+    WEBSOCKET_QUEUE_DEPTH.observe(depth)
+
+def observe_websocket_send(latency: float):
+    """Задержка от постановки в очередь до отправки"""
+    WEBSOCKET_SEND_LATENCY.observe(latency)
+
+def record_websocket_dropped(policy: str):
+    """Срабатывание политики медленного клиента"""
+    WEBSOCKET_DROPPED.labels(policy=policy).inc()
+
+def record_websocket_conflated(kind: str, count: int = 1):
+    """Обновления, слитые с ожидающими у соединений с ограничением частоты (price, topic)"""
+    WEBSOCKET_CONFLATED.labels(kind=kind).inc(count)
+
+def observe_websocket_serialization(source: str, format: str, duration: float, size: int):
+    """Сериализация сообщения рассылки в одном формате (один раз на всех получателей формата)"""
+    WEBSOCKET_SERIALIZATION_DURATION.labels(source=source, format=format).observe(duration)
+    WEBSOCKET_PAYLOADS.labels(source=source, format=format).inc()
+    WEBSOCKET_ENCODED_BYTES.labels(source=source, format=format).inc(size)
+
+def observe_topic_update(topic: str, result: str, delta_bytes: int, full_bytes: int):
+    """Публикация темы: результат дельта-протокола и размеры полного сообщения и дельты"""
+    WEBSOCKET_TOPIC_UPDATES.labels(topic=topic, result=result).inc()
+    WEBSOCKET_TOPIC_PAYLOAD_BYTES.labels(topic=topic, encoding="delta").inc(delta_bytes)
+    WEBSOCKET_TOPIC_PAYLOAD_BYTES.labels(topic=topic, encoding="full").inc(full_bytes)
+
+def record_topic_resume(topic: str, result: str, replayed: int = 0):
+    """Первые сообщения подписки на тему: без пропуска, повтор из буфера, снимок или последнее сообщение"""
+    WEBSOCKET_TOPIC_RESUMES.labels(topic=topic, result=result).inc()
+    if replayed:
+        WEBSOCKET_TOPIC_REPLAYED.labels(topic=topic).inc(replayed)
+
+def record_websocket_ping(transport: str):
+    """Heartbeat молчащему соединению: кадр ping протокола (protocol) или сообщение ping (message)"""
+    WEBSOCKET_PINGS.labels(transport=transport).inc()
+
+def record_websocket_reaped():
+    """Соединение закрыто по таймауту простоя"""
+    WEBSOCKET_IDLE_REAPED.inc()
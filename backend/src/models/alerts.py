@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class PriceAlert(BaseModel):
+    """Модель ценового алерта"""
+    id: int = Field(..., description="ID алерта")
+    client_id: str = Field(..., description="ID клиента")
+    symbol: str = Field(..., description="Символ монеты")
+    kind: str = Field(..., description="Тип алерта")
+    value: float = Field(..., description="Цена порога или изменение в процентах")
+    threshold: float = Field(..., description="Ценовой порог срабатывания")
+    reference_price: Optional[float] = Field(None, description="Опорная цена для изменения в %")
+    cooldown: float = Field(..., description="Пауза между срабатываниями, секунды")
+    repeat: bool = Field(..., description="Повторяемый алерт")
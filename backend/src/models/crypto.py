@@ -14,6 +14,20 @@ class CryptoPrice(BaseModel):
     change_24h: float = Field(..., description="Изменение цены за 24 часа в %")
     last_updated: str = Field(..., description="Время последнего обновления")
 
+class MarketMicrostats(BaseModel):
+    """Модель скользящих статистик монеты за окно"""
+    window: str = Field(..., description="Окно (например 24h)")
+    open: float = Field(..., description="Цена в начале окна")
+    high: float = Field(..., description="Максимум за окно")
+    low: float = Field(..., description="Минимум за окно")
+    close: float = Field(..., description="Последняя цена")
+    change_percent: Optional[float] = Field(None, description="Изменение цены за окно в %")
+    vwap: Optional[float] = Field(None, description="Средневзвешенная по объему цена (нет объема тиков - None)")
+    volume: float = Field(..., description="Объем тиков за окно")
+    realized_volatility: float = Field(..., description="Реализованная волатильность за окно")
+    annualized_volatility: float = Field(..., description="Реализованная волатильность в годовом выражении")
+    ticks: int = Field(..., description="Количество тиков за окно")
+
 class CoinInfo(BaseModel):
     """Модель информации о монете"""
     id: int = Field(..., description="ID монеты")
@@ -34,6 +48,7 @@ class CoinInfo(BaseModel):
     tags: List[str] = Field(default=[], description="Теги монеты")
     platform: Optional[Dict[str, Any]] = Field(None, description="Информация о платформе")
     description: Optional[str] = Field(None, description="Описание монеты")
+    microstats: Dict[str, MarketMicrostats] = Field(default={}, description="Скользящие статистики по окнам")
 
 class SearchResult(BaseModel):
     """Модель результата поиска"""
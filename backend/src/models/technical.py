@@ -13,24 +13,40 @@ class TrendAnalysis(BaseModel):
     """Модель анализа тренда"""
     trend: str = Field(..., description="Направление тренда")
     strength: str = Field(..., description="Сила тренда")
-    price_change_percent: float = Field(..., description="Изменение цены в процентах")
+    price_change_percent: Optional[float] = Field(None, description="Изменение цены в процентах")
 
 class VolumeAnalysis(BaseModel):
     """Модель анализа объема"""
     volume_trend: str = Field(..., description="Тренд объема")
     price_volume_correlation: str = Field(..., description="Корреляция цены и объема")
 
+class SupportResistanceLevel(BaseModel):
+    """Модель уровня поддержки/сопротивления"""
+    level: float = Field(..., description="Цена уровня (центр кластера)")
+    touches: int = Field(..., description="Количество касаний уровня")
+
 class TechnicalAnalysis(BaseModel):
     """Модель технического анализа"""
     coin_id: str = Field(..., description="ID монеты")
     period_days: int = Field(..., description="Период анализа в днях")
+    timeframe: str = Field("daily", description="Интервал баров")
     indicators: TechnicalIndicators = Field(..., description="Технические индикаторы")
     trend_analysis: TrendAnalysis = Field(..., description="Анализ тренда")
     volume_analysis: Optional[VolumeAnalysis] = Field(None, description="Анализ объема")
-    support_resistance: Dict[str, List[float]] = Field(..., description="Уровни поддержки и сопротивления")
+    support_resistance: Dict[str, List[SupportResistanceLevel]] = Field(..., description="Уровни поддержки и сопротивления")
 
 class PriceHistory(BaseModel):
     """Модель истории цен"""
     coin_id: str = Field(..., description="ID монеты")
     period_days: int = Field(..., description="Период в днях")
-    data: List[Dict[str, float]] = Field(..., description="Исторические данные") 
\ No newline at end of file
+    data: List[Dict[str, float]] = Field(..., description="Исторические данные") 
+
+class BatchTechnicalAnalysis(BaseModel):
+    """Модель пакетного технического анализа (колоночный формат)"""
+    coins: List[str] = Field(..., description="Монеты в порядке строк")
+    period_days: int = Field(..., description="Период анализа в днях")
+    timeframe: str = Field("daily", description="Интервал баров")
+    points: int = Field(..., description="Количество общих точек в выровненных рядах")
+    as_of: Optional[str] = Field(None, description="Временная метка последней точки")
+    columns: Dict[str, List[Optional[float]]] = Field(..., description="Последние значения индикаторов: столбец -> значения по монетам")
+    skipped: Dict[str, str] = Field(default={}, description="Пропущенные монеты и причина")
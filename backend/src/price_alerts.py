@@ -0,0 +1,328 @@
+"""
+Price Alerts
+Движок ценовых алертов с отсортированными индексами порогов по монетам
+"""
+
+import asyncio
+import itertools
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .constants import DEFAULT_ALERT_COOLDOWN, MAX_ALERTS_PER_CLIENT
+from .exceptions import ValidationError
+from .market_ingest import MarketIngest, market_ingest
+from .market_simulator import TickBatch
+from .metrics import observe_alert_evaluation, observe_alert_delivery, set_active_alerts, record_alerts_dropped
+
+# Виды алертов: направление пересечения и способ задания порога
+ALERT_KINDS = {
+    "price_above": "above",
+    "price_below": "below",
+    "change_up": "above",
+    "change_down": "below",
+}
+
+
+class PriceAlert:
+    """Пользовательский порог по монете"""
+
+    __slots__ = (
+        "id", "client_id", "symbol", "kind", "direction", "threshold", "value",
+        "reference_price", "cooldown", "repeat", "cooldown_until", "created_at",
+    )
+
+    def __init__(
+        self,
+        alert_id: int,
+        client_id: str,
+        symbol: str,
+        kind: str,
+        threshold: float,
+        value: float,
+        reference_price: Optional[float],
+        cooldown: float,
+        repeat: bool
+    ):
+        self.id = alert_id
+        self.client_id = client_id
+        self.symbol = symbol
+        self.kind = kind
+        self.direction = ALERT_KINDS[kind]
+        self.threshold = threshold
+        self.value = value
+        self.reference_price = reference_price
+        self.cooldown = cooldown
+        self.repeat = repeat
+        self.cooldown_until = 0.0
+        self.created_at = time.time()
+
+    def key(self) -> Tuple:
+        """Ключ дедупликации: одинаковые алерты клиента не дублируются"""
+        return (self.client_id, self.symbol, self.direction, self.threshold)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "client_id": self.client_id,
+            "symbol": self.symbol,
+            "kind": self.kind,
+            "value": self.value,
+            "threshold": self.threshold,
+            "reference_price": self.reference_price,
+            "cooldown": self.cooldown,
+            "repeat": self.repeat,
+        }
+
+
+class ThresholdIndex:
+    """
+    Пороги одного направления по одной монете в порядке возрастания
+
+    Параллельные списки порогов и ID алертов: вставка и поиск - bisect,
+    выборка сработавших - срез по диапазону пересеченных цен.
+    """
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, threshold: float, alert_id: int):
+        position = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, alert_id)
+
+    def remove(self, threshold: float, alert_id: int):
+        position = bisect_left(self.thresholds, threshold)
+        end = bisect_right(self.thresholds, threshold, position)
+        for index in range(position, end):
+            if self.ids[index] == alert_id:
+                del self.thresholds[index]
+                del self.ids[index]
+                return
+
+    def crossed_up(self, previous: float, high: float) -> List[int]:
+        """Пороги в (previous, high]: цена поднялась до порога"""
+        return self.ids[bisect_right(self.thresholds, previous):bisect_right(self.thresholds, high)]
+
+    def crossed_down(self, low: float, previous: float) -> List[int]:
+        """Пороги в [low, previous): цена опустилась до порога"""
+        return self.ids[bisect_left(self.thresholds, low):bisect_left(self.thresholds, previous)]
+
+
+class AlertEngine:
+    """
+    Движок алертов
+
+    Как работает:
+    1. Алерт на изменение в % переводится в ценовой порог от опорной цены,
+       поэтому все алерты - пересечения порогов вверх или вниз
+    2. Для каждой монеты два отсортированных индекса порогов (вверх/вниз)
+    3. На пакет тиков берутся предыдущая цена, минимум и максимум пакета;
+       bisect находит только пересеченные пороги - O(log n + k) вместо O(n)
+    4. Сработавший разовый алерт удаляется, повторяемый уходит в паузу `cooldown`;
+       в пределах пакета алерт срабатывает не больше одного раза
+    5. События ставятся в очередь и доставляются адресно через WebSocketManager.send_alert
+    """
+
+    def __init__(
+        self,
+        ingest: MarketIngest = market_ingest,
+        max_per_client: int = MAX_ALERTS_PER_CLIENT,
+        max_pending: int = 100000
+    ):
+        self.ingest = ingest
+        self.max_per_client = max_per_client
+        self._alerts: Dict[int, PriceAlert] = {}
+        self._by_key: Dict[Tuple, int] = {}
+        self._by_client: Dict[str, Set[int]] = {}
+        self._indexes: Dict[str, Dict[str, ThresholdIndex]] = {}
+        self._last_prices: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._positions: Dict[str, int] = {}
+        self._positions_for: Optional[List[str]] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self.triggered = 0
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add(
+        self,
+        client_id: str,
+        symbol: str,
+        kind: str,
+        value: float,
+        reference_price: Optional[float] = None,
+        cooldown: float = DEFAULT_ALERT_COOLDOWN,
+        repeat: bool = False
+    ) -> PriceAlert:
+        """Регистрация алерта (повторная регистрация такого же возвращает существующий)"""
+        if kind not in ALERT_KINDS:
+            raise ValidationError("kind", kind, f"один из {', '.join(ALERT_KINDS)}")
+        symbol = symbol.upper()
+
+        if kind.startswith("change"):
+            if reference_price is None:
+                latest = self.ingest.latest.get(symbol)
+                reference_price = self._last_prices.get(symbol, latest[1] if latest else None)
+            if reference_price is None:
+                raise ValidationError("reference_price", None, "нужна опорная цена: по монете еще нет тиков")
+            sign = 1 if kind == "change_up" else -1
+            threshold = reference_price * (1 + sign * abs(value) / 100)
+        else:
+            threshold = value
+
+        alert = PriceAlert(next(self._ids), client_id, symbol, kind, threshold, value, reference_price, cooldown, repeat)
+        existing = self._by_key.get(alert.key())
+        if existing is not None:
+            return self._alerts[existing]
+        if len(self._by_client.get(client_id, ())) >= self.max_per_client:
+            raise ValidationError("alerts", client_id, f"не больше {self.max_per_client} алертов на клиента")
+
+        self._alerts[alert.id] = alert
+        self._by_key[alert.key()] = alert.id
+        self._by_client.setdefault(client_id, set()).add(alert.id)
+        indexes = self._indexes.setdefault(symbol, {"above": ThresholdIndex(), "below": ThresholdIndex()})
+        indexes[alert.direction].add(threshold, alert.id)
+        if symbol not in self._last_prices and symbol in self.ingest.latest:
+            self._last_prices[symbol] = self.ingest.latest[symbol][1]
+        set_active_alerts(len(self._alerts))
+        return alert
+
+    def remove(self, alert_id: int) -> bool:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return False
+        self._by_key.pop(alert.key(), None)
+        client_alerts = self._by_client.get(alert.client_id)
+        if client_alerts is not None:
+            client_alerts.discard(alert_id)
+            if not client_alerts:
+                del self._by_client[alert.client_id]
+        indexes = self._indexes[alert.symbol]
+        indexes[alert.direction].remove(alert.threshold, alert_id)
+        if not indexes["above"] and not indexes["below"]:
+            del self._indexes[alert.symbol]
+            self._last_prices.pop(alert.symbol, None)
+        set_active_alerts(len(self._alerts))
+        return True
+
+    def symbol_count(self) -> int:
+        return len(self._indexes)
+
+    def get(self, alert_id: int) -> Optional[PriceAlert]:
+        return self._alerts.get(alert_id)
+
+    def list_for_client(self, client_id: str) -> List[PriceAlert]:
+        return [self._alerts[alert_id] for alert_id in sorted(self._by_client.get(client_id, ()))]
+
+    def evaluate(self, symbol: str, previous: float, low: float, high: float, last: float, now: float) -> List[PriceAlert]:
+        """Сработавшие алерты монеты: только пороги в пересеченном диапазоне"""
+        indexes = self._indexes.get(symbol)
+        if indexes is None:
+            return []
+
+        candidates = []
+        if high > previous:
+            candidates.extend(indexes["above"].crossed_up(previous, high))
+        if low < previous:
+            candidates.extend(indexes["below"].crossed_down(low, previous))
+
+        fired = []
+        for alert_id in candidates:
+            alert = self._alerts[alert_id]
+            if now < alert.cooldown_until:
+                continue
+            fired.append(alert)
+            if alert.repeat:
+                alert.cooldown_until = now + alert.cooldown
+        for alert in fired:
+            if not alert.repeat:
+                self.remove(alert.id)
+        return fired
+
+    def _column_positions(self, symbols: List[str]) -> Dict[str, int]:
+        # Источник обычно передает тот же список символов в каждом пакете
+        if symbols is not self._positions_for:
+            self._positions = {symbol: index for index, symbol in enumerate(symbols)}
+            self._positions_for = symbols
+        return self._positions
+
+    def on_batch(self, batch: TickBatch):
+        """Потребитель MarketIngest: проверка пакета тиков"""
+        if not self._indexes or batch.prices.size == 0:
+            return
+        started = time.perf_counter()
+        now = time.time()
+
+        positions = self._column_positions(batch.symbols)
+        symbols = [symbol for symbol in self._indexes if symbol in positions]
+        if not symbols:
+            return
+        columns = [positions[symbol] for symbol in symbols]
+        prices = batch.prices[:, columns]
+        firsts = prices[0].tolist()
+        lows = prices.min(axis=0).tolist()
+        highs = prices.max(axis=0).tolist()
+        lasts = prices[-1].tolist()
+        tick_time = int(batch.epoch_ms[-1])
+
+        events = 0
+        for index, symbol in enumerate(symbols):
+            previous = self._last_prices.get(symbol, firsts[index])
+            self._last_prices[symbol] = lasts[index]
+            for alert in self.evaluate(symbol, previous, lows[index], highs[index], lasts[index], now):
+                events += 1
+                self._enqueue(alert, lasts[index], tick_time)
+
+        self.triggered += events
+        observe_alert_evaluation(time.perf_counter() - started, events)
+
+    def _enqueue(self, alert: PriceAlert, price: float, tick_time: int):
+        try:
+            self._queue.put_nowait((time.perf_counter(), alert.to_dict(), price, tick_time))
+        except asyncio.QueueFull:
+            record_alerts_dropped()
+
+    async def _deliver(self, ws_manager):
+        while True:
+            enqueued_at, alert, price, tick_time = await self._queue.get()
+            try:
+                direction = "выше" if ALERT_KINDS[alert["kind"]] == "above" else "ниже"
+                await ws_manager.send_alert(
+                    alert["kind"],
+                    f"{alert['symbol']}: цена {price:.8g} {direction} порога {alert['threshold']:.8g}",
+                    {**alert, "price": price, "tick_time": tick_time},
+                    client_id=alert["client_id"]
+                )
+                observe_alert_delivery(time.perf_counter() - enqueued_at)
+            except Exception as e:
+                logger.error(f"Ошибка доставки алерта {alert['id']}: {e}")
+
+    def start(self, ws_manager):
+        """Подписка на тики и запуск доставки"""
+        if self._task is None:
+            self.ingest.add_consumer(self.on_batch)
+            self._task = asyncio.create_task(self._deliver(ws_manager))
+            logger.info("🔔 Движок ценовых алертов запущен")
+
+    async def stop(self):
+        if self._task is not None:
+            self.ingest.remove_consumer(self.on_batch)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Глобальный движок алертов
+alert_engine = AlertEngine()
@@ -0,0 +1,87 @@
+"""
+Price Stream
+Рассылка тиков подписчикам монет по WebSocket
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from .config import settings
+from .delta import moved
+from .market_ingest import MarketIngest, market_ingest
+from .market_simulator import TickBatch
+
+
+class PriceStream:
+    """
+    Потребитель MarketIngest для подписок на монеты
+
+    На каждом пакете берутся последние цены только тех монет, на которые есть
+    подписчики и цена которых сдвинулась больше относительного порога `epsilon`
+    с последней рассылки; рассылку по группам подписчиков выполняет WebSocketManager.
+    """
+
+    def __init__(self, ingest: MarketIngest = market_ingest, epsilon: float = 0.0):
+        self.ingest = ingest
+        self.epsilon = epsilon
+        self.ws_manager = None
+        # Последняя разосланная цена монеты
+        self._sent: Dict[str, float] = {}
+        self._positions: Dict[str, int] = {}
+        self._positions_for: Optional[List[str]] = None
+
+    def _column_positions(self, symbols: List[str]) -> Dict[str, int]:
+        # Источник обычно передает тот же список символов в каждом пакете
+        if symbols is not self._positions_for:
+            self._positions = {symbol: index for index, symbol in enumerate(symbols)}
+            self._positions_for = symbols
+        return self._positions
+
+    def on_batch(self, batch: TickBatch):
+        """Потребитель MarketIngest: последние цены подписанных монет - подписчикам"""
+        if self.ws_manager is None or batch.prices.size == 0:
+            return
+        subscribed = self.ws_manager.registry.subscribers
+        if not subscribed:
+            return
+
+        positions = self._column_positions(batch.symbols)
+        symbols = [symbol for symbol in subscribed if symbol in positions]
+        if not symbols:
+            return
+        prices = batch.prices[-1, [positions[symbol] for symbol in symbols]].tolist()
+        tick_time = int(batch.epoch_ms[-1])
+
+        sent = self._sent
+        updates: Dict[str, Any] = {}
+        for symbol, price in zip(symbols, prices):
+            if moved(sent.get(symbol), price, self.epsilon):
+                sent[symbol] = price
+                updates[symbol] = {"price": price, "time": tick_time}
+        if updates:
+            self.ws_manager.publish_prices(updates)
+
+    def snapshot(self, symbols: Iterable[str]) -> Dict[str, Any]:
+        """Последние цены монет (ответ на подписку и get_prices)"""
+        latest = self.ingest.latest
+        return {
+            symbol: {"price": latest[symbol][1], "time": latest[symbol][0]}
+            for symbol in sorted(symbols) if symbol in latest
+        }
+
+    def start(self, ws_manager):
+        """Подписка на тики"""
+        if self.ws_manager is None:
+            self.ws_manager = ws_manager
+            self.ingest.add_consumer(self.on_batch)
+            logger.info("📈 Рассылка цен по подпискам запущена")
+
+    def stop(self):
+        if self.ws_manager is not None:
+            self.ingest.remove_consumer(self.on_batch)
+            self.ws_manager = None
+
+
+# Глобальная рассылка цен
+price_stream = PriceStream(epsilon=settings.ws_delta_epsilon)
@@ -0,0 +1,386 @@
+"""
+Pub/Sub Hub
+Темы WebSocket-рассылки: один источник данных на тему, результат - всем подписчикам
+(во всех процессах через шину backplane)
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .backplane import Backplane, InMemoryBackplane, worker_id
+from .delta import UNCHANGED, apply, diff
+from .metrics import observe_topic_poll, observe_topic_update, record_topic_resume, set_topic_subscribers
+from .wire_format import Payload
+
+Message = Dict[str, Any]
+Producer = Callable[[str], Awaitable[Message]]
+# Подписчик получает общее для всех подписчиков сообщение (сериализуется один раз на формат)
+Subscriber = Callable[[Payload], Awaitable[None]]
+
+
+class Topic:
+    """
+    Тема: источник данных, подписчики и последнее сообщение (сериализованное)
+
+    Для подписчиков дельта-протокола - состояние `view` (сообщение после всех
+    разосланных дельт), номер его версии `seq` и кольцевой буфер последних дельт
+    `history` для повтора пропущенного при переподключении. Номера версий
+    действительны в пределах `epoch` - ID экземпляра темы (процесс, время жизни).
+    """
+
+    def __init__(
+        self, name: str, kind: str, argument: str, producer: Producer, interval: float, history_size: int = 0
+    ):
+        self.name = name
+        self.kind = kind
+        self.argument = argument
+        self.producer = producer
+        self.interval = interval
+        self.subscribers: Dict[Any, Subscriber] = {}
+        self.last: Optional[Payload] = None
+        self.task: Optional[asyncio.Task] = None
+        # Подписка процесса на канал темы в шине выполнена, последнее сообщение загружено
+        self.ready = asyncio.Event()
+        # Источник темы работает в этом процессе (аренда в шине)
+        self.leader = False
+        # ID подписчиков дельта-протокола
+        self.delta_subscribers: Set[Any] = set()
+        self.view: Optional[Message] = None
+        self.seq = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self.history: Deque[Tuple[int, Payload]] = deque(maxlen=history_size)
+        # Время последнего сохраненного сообщения (monotonic) и таймер удаления темы без подписчиков
+        self.updated_at = 0.0
+        self.expiry: Optional[asyncio.TimerHandle] = None
+        self._snapshot: Optional[Tuple[int, Payload]] = None
+
+    def snapshot(self) -> Optional[Payload]:
+        """Полное состояние с номером версии (сериализуется один раз на версию)"""
+        if self.view is None:
+            return None
+        if self._snapshot is None or self._snapshot[0] != self.seq:
+            # Состояние изменяется на месте следующими дельтами: сериализуется сразу
+            self._snapshot = (self.seq, Payload.frozen({
+                "type": "snapshot", "topic": self.name, "seq": self.seq, "epoch": self.epoch, "data": self.view
+            }, self.kind))
+        return self._snapshot[1]
+
+    def resume(self, last_seq: Optional[int], epoch: Optional[str] = None) -> Tuple[str, List[Payload]]:
+        """
+        Первые сообщения подписчика дельта-протокола: пропущенные после `last_seq` дельты
+        из буфера или, если их там уже нет (или версия из другого экземпляра темы), снимок
+
+        Returns:
+            (результат: current, replayed, snapshot; сообщения)
+        """
+        if self.view is None:
+            return "snapshot", []
+        if last_seq is not None and (epoch is None or epoch == self.epoch):
+            if last_seq == self.seq:
+                return "current", []
+            if self.history and self.history[0][0] <= last_seq + 1 and last_seq < self.seq:
+                return "replayed", [payload for seq, payload in self.history if seq > last_seq]
+        return "snapshot", [self.snapshot()]
+
+
+class PubSubHub:
+    """
+    Хаб публикаций по темам
+
+    Как работает:
+    1. Тип темы регистрируется один раз: функция-источник и интервал опроса
+       (например "prices" - топ монет, "coin" - одна монета, "overview" - обзор рынка)
+    2. Имя темы - тип и аргумент через двоеточие: "prices", "coin:BTC"
+    3. Первый подписчик темы в процессе подписывает процесс на канал темы в шине
+       и запускает цикл источника, уход последнего - останавливает его
+    4. Опрашивает источник только процесс, владеющий арендой темы в шине; остальные
+       процессы (воркеры, поды) получают его сообщения из шины и рассылают своим
+       подписчикам. Внешний API опрашивается один раз на тему во всем кластере;
+       сообщения темы публикует один процесс, поэтому порядок у всех одинаковый.
+       Аренда продлевается каждый цикл; если владелец пропал, ее забирает другой
+       процесс через ttl
+    5. Новый подписчик сразу получает последнее сообщение темы: из памяти процесса
+       или, если тема в процессе новая, сохраненное в шине
+    6. Сообщение сериализуется один раз на публикацию и формат (JSON, MessagePack);
+       все подписчики формата получают одни и те же строку или байты
+    7. Подписчики дельта-протокола получают снимок {"type": "snapshot", "seq", "epoch", "data"},
+       затем только изменения {"type": "delta", "seq", "changes"} (см. delta.diff);
+       публикация без изменений им не отправляется. При пропуске номера клиент
+       запрашивает снимок заново (resync)
+    8. Последние `history_size` дельт темы хранятся в кольцевом буфере. Клиент,
+       переподключившийся с last_seq (и epoch из снимка), получает из буфера только
+       пропущенные дельты; если их там уже нет - снимок
+    9. Тема без подписчиков останавливает источник, но хранит состояние и буфер
+       `retention` секунд: переподключившийся клиент сразу получает последнее
+       состояние, а источник не опрашивается раньше своего интервала
+    """
+
+    def __init__(
+        self,
+        epsilon: float = 0.0,
+        backplane: Optional[Backplane] = None,
+        owner: Optional[str] = None,
+        history_size: int = 256,
+        retention: float = 300.0
+    ):
+        # Относительный порог изменения чисел для дельт
+        self.epsilon = epsilon
+        self.history_size = history_size
+        self.retention = retention
+        self.backplane = backplane or InMemoryBackplane()
+        # ID процесса - владельца аренды тем
+        self.owner = owner or worker_id()
+        self._kinds: Dict[str, Tuple[Producer, float]] = {}
+        self._topics: Dict[str, Topic] = {}
+        # Темы без подписчиков, хранящие состояние до истечения retention
+        self._idle: Dict[str, Topic] = {}
+
+    def register(self, kind: str, producer: Producer, interval: float):
+        """Регистрация типа темы"""
+        self._kinds[kind] = (producer, interval)
+
+    @staticmethod
+    def topic_name(kind: str, argument: str = "") -> str:
+        return f"{kind}:{argument.upper()}" if argument else kind
+
+    @staticmethod
+    def channel(name: str) -> str:
+        """Канал (и имя аренды) темы в шине"""
+        return f"topic:{name}"
+
+    def topics(self) -> Dict[str, int]:
+        """Активные темы и число подписчиков"""
+        return {name: len(topic.subscribers) for name, topic in self._topics.items()}
+
+    async def subscribe(
+        self,
+        subscriber_id: Any,
+        subscriber: Subscriber,
+        kind: str,
+        argument: str = "",
+        delta: bool = False,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None
+    ) -> str:
+        """
+        Подписка на тему (`delta` - дельта-протокол); возвращает имя темы
+
+        Подписчик сразу получает последнее состояние темы, если оно есть. С `last_seq`
+        (дельта-протокол, переподключение) - только дельты после last_seq из буфера темы.
+        """
+        if kind not in self._kinds:
+            raise KeyError(f"Неизвестный тип темы: {kind}")
+
+        name = self.topic_name(kind, argument)
+        topic = self._topics.get(name)
+        if topic is None:
+            topic = self._idle.pop(name, None)
+            if topic is not None:
+                topic.expiry.cancel()
+                topic.expiry = None
+            else:
+                producer, interval = self._kinds[kind]
+                topic = Topic(name, kind, argument.upper(), producer, interval, self.history_size)
+            self._topics[name] = topic
+
+        topic.subscribers[subscriber_id] = subscriber
+        if delta:
+            topic.delta_subscribers.add(subscriber_id)
+        set_topic_subscribers(kind, sum(len(t.subscribers) for t in self._topics.values() if t.kind == kind))
+
+        # Последнее состояние - до запуска источника: следующая дельта продолжает нумерацию
+        if delta:
+            result, initial = topic.resume(last_seq, epoch)
+        else:
+            result, initial = "full", [topic.last] if topic.last is not None else []
+        if initial or result == "current":
+            record_topic_resume(kind, result, len(initial) if result == "replayed" else 0)
+        for payload in initial:
+            await self._deliver(topic, subscriber_id, subscriber, payload)
+
+        if topic.task is None:
+            topic.task = asyncio.create_task(self._run(topic))
+            logger.info(f"📡 Тема {name}: источник запущен")
+            await self._attach(topic)
+        return name
+
+    async def _attach(self, topic: Topic):
+        """Подписка процесса на канал темы; новый подписчик получает сохраненное в шине сообщение"""
+        channel = self.channel(topic.name)
+        try:
+            await self.backplane.subscribe(channel, lambda envelope: self._relay(topic.name, envelope))
+            envelope = await self.backplane.last(channel)
+        except Exception as e:
+            logger.error(f"Ошибка подписки на канал темы {topic.name}: {e}")
+            envelope = None
+        # Сообщение из канала могло прийти раньше сохраненного - оно новее; состояние
+        # темы, хранившей его без подписчиков, обновляется, только если оно изменилось
+        if envelope is not None and (topic.last is None or json.dumps(envelope["message"]) != topic.last.encode()):
+            await self._publish_local(topic, envelope["message"], True)
+        topic.ready.set()
+
+    async def _relay(self, name: str, envelope: Message):
+        """Сообщение темы из шины - подписчикам процесса"""
+        topic = self._topics.get(name)
+        if topic is not None:
+            await self._publish_local(topic, envelope["message"], envelope.get("retain", True))
+
+    def snapshot(self, name: str) -> Optional[Payload]:
+        """Снимок темы для дельта-протокола (первое сообщение и resync)"""
+        topic = self._topics.get(name)
+        return topic.snapshot() if topic is not None else None
+
+    async def unsubscribe(self, subscriber_id: Any, name: str):
+        """Отписка от темы; источник темы останавливается с уходом последнего подписчика"""
+        topic = self._topics.get(name)
+        if topic is None:
+            return
+        topic.subscribers.pop(subscriber_id, None)
+        topic.delta_subscribers.discard(subscriber_id)
+        set_topic_subscribers(topic.kind, sum(len(t.subscribers) for t in self._topics.values() if t.kind == topic.kind))
+        if not topic.subscribers:
+            del self._topics[name]
+            await self._detach(topic)
+            logger.info(f"📡 Тема {name}: подписчиков нет, источник остановлен")
+            # Тема могла получить подписчика заново, пока шла остановка
+            if name not in self._topics and topic.last is not None and self.retention > 0:
+                topic.task = None
+                topic.leader = False
+                topic.ready = asyncio.Event()
+                topic.expiry = asyncio.get_event_loop().call_later(self.retention, self._expire, name, topic)
+                self._idle[name] = topic
+
+    def _expire(self, name: str, topic: Topic):
+        if self._idle.get(name) is topic:
+            del self._idle[name]
+
+    async def _detach(self, topic: Topic):
+        """Остановка цикла источника, освобождение аренды и отписка процесса от канала темы"""
+        if topic.task is not None:
+            topic.task.cancel()
+            try:
+                await topic.task
+            except asyncio.CancelledError:
+                pass
+        channel = self.channel(topic.name)
+        try:
+            if topic.leader:
+                await self.backplane.release(channel, self.owner)
+            # Пока шли ожидания, тему могли создать заново: канал нужен новой теме
+            if topic.name not in self._topics:
+                await self.backplane.unsubscribe(channel)
+        except Exception as e:
+            logger.error(f"Ошибка отписки от канала темы {topic.name}: {e}")
+
+    async def publish(self, name: str, message: Message, retain: bool = True):
+        """
+        Публикация сообщения темы подписчикам всех процессов через шину
+        (`retain` - запомнить для новых подписчиков)
+        """
+        await self.backplane.publish(self.channel(name), {"message": message, "retain": retain}, retain=retain)
+
+    async def _publish_local(self, topic: Topic, message: Message, retain: bool):
+        """Рассылка сообщения подписчикам темы в этом процессе"""
+        payload = Payload.frozen(message, topic.kind)
+        # Без retain (ошибки) сообщение получают все подписчики как есть
+        delta_payload = payload
+        if retain:
+            topic.last = payload
+            topic.updated_at = time.monotonic()
+            delta_payload = self._advance(topic, message)
+
+        # Подписчики только ставят сообщение в очереди соединений: отдельная задача
+        # на каждого не нужна
+        for subscriber_id, subscriber in list(topic.subscribers.items()):
+            if subscriber_id not in topic.delta_subscribers:
+                await self._deliver(topic, subscriber_id, subscriber, payload)
+            elif delta_payload is not None:
+                await self._deliver(topic, subscriber_id, subscriber, delta_payload)
+
+    def _advance(self, topic: Topic, message: Message) -> Optional[Payload]:
+        """Новая версия состояния темы; возвращает сообщение для подписчиков дельт или None"""
+        full_size = len(topic.last.encode())
+        if topic.view is None:
+            topic.view = message
+            topic.seq += 1
+            snapshot = topic.snapshot()
+            observe_topic_update(topic.kind, "snapshot", len(snapshot.encode()), full_size)
+            return snapshot
+
+        changes = diff(topic.view, message, self.epsilon)
+        if changes is UNCHANGED:
+            observe_topic_update(topic.kind, "unchanged", 0, full_size)
+            return None
+        # Дельта сериализуется до применения: apply изменяет состояние на месте
+        topic.seq += 1
+        delta_payload = Payload.frozen(
+            {"type": "delta", "topic": topic.name, "seq": topic.seq, "changes": changes}, topic.kind
+        )
+        topic.view = apply(topic.view, changes)
+        topic.history.append((topic.seq, delta_payload))
+        observe_topic_update(topic.kind, "delta", len(delta_payload.encode()), full_size)
+        return delta_payload
+
+    async def _deliver(self, topic: Topic, subscriber_id: Any, subscriber: Subscriber, payload: Payload):
+        try:
+            await subscriber(payload)
+        except Exception as e:
+            logger.error(f"Ошибка доставки сообщения темы {topic.name}: {e}")
+            topic.subscribers.pop(subscriber_id, None)
+
+    async def _lead(self, topic: Topic) -> bool:
+        """Захват или продление аренды темы; True - источник опрашивает этот процесс"""
+        # Запас ttl на медленный опрос источника: иначе аренду заберут посреди цикла
+        ttl = max(topic.interval * 3, 30.0)
+        try:
+            leader = await self.backplane.acquire(self.channel(topic.name), self.owner, ttl)
+        except Exception as e:
+            logger.error(f"Ошибка аренды темы {topic.name}: {e}")
+            leader = False
+        if leader != topic.leader:
+            topic.leader = leader
+            logger.info(f"📡 Тема {topic.name}: источник {'в этом процессе' if leader else 'в другом процессе'}")
+        return leader
+
+    async def _run(self, topic: Topic):
+        await topic.ready.wait()
+        # Состояние темы, хранившей его без подписчиков, еще свежее: опрос - в свой интервал
+        if topic.updated_at:
+            await asyncio.sleep(max(topic.updated_at + topic.interval - time.monotonic(), 0.0))
+        while True:
+            if not await self._lead(topic):
+                await asyncio.sleep(topic.interval)
+                continue
+            started = time.perf_counter()
+            try:
+                message = await topic.producer(topic.argument)
+                observe_topic_poll(topic.kind, time.perf_counter() - started, True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                observe_topic_poll(topic.kind, time.perf_counter() - started, False)
+                logger.error(f"Ошибка источника темы {topic.name}: {e}")
+                await self._broadcast(topic, {"type": "error", "topic": topic.name, "message": str(e)}, False)
+            else:
+                await self._broadcast(topic, message, True)
+            await asyncio.sleep(topic.interval)
+
+    async def _broadcast(self, topic: Topic, message: Message, retain: bool):
+        try:
+            await self.publish(topic.name, message, retain)
+        except Exception as e:
+            logger.error(f"Ошибка публикации темы {topic.name} в шину: {e}")
+
+    async def close(self):
+        """Остановка всех источников и освобождение аренд"""
+        for name in list(self._topics):
+            await self._detach(self._topics.pop(name))
+        for topic in self._idle.values():
+            topic.expiry.cancel()
+        self._idle.clear()
@@ -0,0 +1,140 @@
+"""
+Resampling
+Агрегация базового ряда в бары старших интервалов (неделя, месяц, произвольный интервал)
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .constants import Timeframe
+from .exceptions import ValidationError
+from .series_encoding import encode_timestamps, timestamps_to_epoch_ms
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+WEEK_MS = 7 * DAY_MS
+
+# Фиксированные единицы интервала: (длительность, начало отсчета)
+# Недели начинаются с понедельника: 1970-01-05 - первый понедельник после эпохи
+_FIXED_UNITS = {"h": (HOUR_MS, 0), "d": (DAY_MS, 0), "w": (WEEK_MS, 4 * DAY_MS)}
+
+# Интервалы Timeframe в виде (количество, единица); resample принимает любой такой интервал,
+# например (4, "h") или (2, "w")
+TIMEFRAME_INTERVALS = {
+    Timeframe.DAILY: (1, "d"),
+    Timeframe.WEEKLY: (1, "w"),
+    Timeframe.MONTHLY: (1, "M"),
+}
+
+# Баров в году для годовых метрик (крипторынок торгуется без выходных)
+BARS_PER_YEAR = {
+    Timeframe.DAILY: 365,
+    Timeframe.WEEKLY: 52,
+    Timeframe.MONTHLY: 12,
+}
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume", "market_cap", "count")
+
+
+def parse_timeframes(raw: Optional[str]) -> List[Timeframe]:
+    """Интервалы из строки через запятую (по умолчанию - все)"""
+    if not raw:
+        return list(Timeframe)
+    timeframes = []
+    for name in (part.strip().lower() for part in raw.split(",") if part.strip()):
+        try:
+            timeframes.append(Timeframe(name))
+        except ValueError:
+            raise ValidationError("timeframes", name, f"один из {', '.join(t.value for t in Timeframe)}")
+    return list(dict.fromkeys(timeframes))
+
+
+def bucket_starts(epoch_ms: np.ndarray, interval: Tuple[int, str]) -> np.ndarray:
+    """Начало бара (мс эпохи) для каждой точки - одна векторная операция"""
+    count, unit = interval
+    if unit == "M":
+        months = epoch_ms.astype("datetime64[ms]").astype("datetime64[M]").astype(np.int64)
+        starts = (months // count) * count
+        return starts.astype("datetime64[M]").astype("datetime64[ms]").astype(np.int64)
+
+    width, origin = _FIXED_UNITS[unit]
+    width *= count
+    return (epoch_ms - origin) // width * width + origin
+
+
+def resample(
+    epoch_ms: np.ndarray,
+    prices: np.ndarray,
+    volumes: np.ndarray,
+    market_caps: np.ndarray,
+    interval: Tuple[int, str]
+) -> Dict[str, np.ndarray]:
+    """
+    OHLC-бары интервала из отсортированного по времени ряда
+
+    Как работает:
+    1. Каждой точке сопоставляется начало ее бара
+    2. Границы баров - места смены начала (ряд отсортирован, группы непрерывны)
+    3. Агрегаты считаются через `reduceat` по границам: без цикла по барам
+
+    Метка бара - его начало; последний бар может быть незакрытым.
+    """
+    if len(epoch_ms) == 0:
+        empty = {field: np.empty(0) for field in BAR_FIELDS}
+        return {"epoch_ms": np.empty(0, dtype=np.int64), **empty}
+
+    starts = bucket_starts(epoch_ms, interval)
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+    last = np.concatenate((first[1:], [len(starts)])) - 1
+
+    return {
+        "epoch_ms": starts[first],
+        "open": prices[first],
+        "high": np.maximum.reduceat(prices, first),
+        "low": np.minimum.reduceat(prices, first),
+        "close": prices[last],
+        "volume": np.add.reduceat(volumes, first),
+        "market_cap": market_caps[last],
+        "count": (last - first + 1).astype(float),
+    }
+
+
+def history_arrays(history: List[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+    """Исторические данные в массивы (метки, цены, объемы, капитализация), отсортированные по времени"""
+    epoch_ms = timestamps_to_epoch_ms([item.get('timestamp') for item in history])
+    prices = np.array([item.get('price', 0) for item in history], dtype=float)
+    volumes = np.array([item.get('volume', 0) for item in history], dtype=float)
+    market_caps = np.array([item.get('market_cap', 0) for item in history], dtype=float)
+
+    if len(epoch_ms) > 1 and np.any(epoch_ms[1:] < epoch_ms[:-1]):
+        order = np.argsort(epoch_ms, kind="stable")
+        return epoch_ms[order], prices[order], volumes[order], market_caps[order]
+    return epoch_ms, prices, volumes, market_caps
+
+
+def resample_all(
+    history: List[Dict[str, Any]],
+    timeframes: Sequence[Timeframe]
+) -> Dict[Timeframe, Dict[str, np.ndarray]]:
+    """Бары всех запрошенных интервалов: исторические данные разбираются один раз"""
+    arrays = history_arrays(history)
+    return {timeframe: resample(*arrays, TIMEFRAME_INTERVALS[timeframe]) for timeframe in timeframes}
+
+
+def bars_to_history(bars: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Бары в формат исторических данных (цена - закрытие бара)"""
+    timestamps = encode_timestamps(bars["epoch_ms"], "json")
+    columns = {name: bars[name].tolist() for name in ("open", "high", "low", "close", "volume", "market_cap")}
+    return [
+        {
+            "timestamp": timestamp,
+            "price": columns["close"][index],
+            "open": columns["open"][index],
+            "high": columns["high"][index],
+            "low": columns["low"][index],
+            "volume": columns["volume"][index],
+            "market_cap": columns["market_cap"][index],
+        }
+        for index, timestamp in enumerate(timestamps)
+    ]
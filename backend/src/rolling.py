@@ -0,0 +1,131 @@
+"""
+Rolling Extremes
+Скользящие минимум и максимум за O(n): монотонная дека и векторный алгоритм ван Херка
+"""
+
+from collections import deque
+from typing import Deque, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class MonotonicDeque:
+    """
+    Монотонная дека для потокового максимума (или минимума) в окне
+
+    Элементы хранятся как (индекс, значение) в порядке убывания значения
+    (возрастания - для минимума). Каждый элемент добавляется и удаляется
+    не более одного раза, поэтому обновление - O(1) амортизированно.
+    """
+
+    def __init__(self, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError("mode должен быть 'max' или 'min'")
+        self._is_max = mode == "max"
+        self._items: Deque[Tuple[float, float]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, key: float, value: float):
+        """Добавление значения с ключом (индекс или время), ключи возрастают"""
+        items = self._items
+        if self._is_max:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((key, value))
+
+    def evict(self, min_key: float):
+        """Удаление элементов с ключом меньше `min_key` (вышедших из окна)"""
+        items = self._items
+        while items and items[0][0] < min_key:
+            items.popleft()
+
+    @property
+    def value(self) -> float:
+        """Текущий экстремум окна"""
+        return self._items[0][1]
+
+
+def sliding_extreme(values: Iterable[float], window: int, mode: str = "max") -> List[float]:
+    """Экстремум каждого окна длины `window` на монотонной деке (чистый Python, O(n))"""
+    tracker = MonotonicDeque(mode)
+    result = []
+    for i, value in enumerate(values):
+        tracker.push(i, value)
+        tracker.evict(i - window + 1)
+        if i >= window - 1:
+            result.append(tracker.value)
+    return result
+
+
+def _rolling_extreme(values: Sequence[float], window: int, ufunc: np.ufunc, fill: float) -> np.ndarray:
+    """
+    Алгоритм ван Херка / Гил-Вермана
+
+    Ряд режется на блоки длины `window`, внутри блоков считаются префиксные
+    и суффиксные экстремумы. Любое окно покрывает суффикс одного блока
+    и префикс следующего: ответ - экстремум двух чисел. Итого O(n) без цикла Python.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if window < 1 or n < window:
+        return np.empty(0)
+    if window == 1:
+        return values.copy()
+
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, fill)
+    padded[:n] = values
+    padded = padded.reshape(blocks, window)
+
+    prefix = ufunc.accumulate(padded, axis=1).ravel()
+    suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    return ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def rolling_max(values: Sequence[float], window: int) -> np.ndarray:
+    """Максимум каждого окна длины `window` (длина результата n - window + 1)"""
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values: Sequence[float], window: int) -> np.ndarray:
+    """Минимум каждого окна длины `window` (длина результата n - window + 1)"""
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def cluster_levels(
+    levels: Sequence[float],
+    prices: Sequence[float],
+    tolerance: float = 0.01,
+    max_levels: int = 5
+) -> List[dict]:
+    """
+    Кластеризация близких уровней и оценка по числу касаний
+
+    Соседние (после сортировки) уровни, отличающиеся меньше чем на `tolerance`
+    (доля цены), объединяются; уровень кластера - среднее. Касания - число
+    точек ряда в полосе ±tolerance вокруг уровня. Возвращаются `max_levels`
+    уровней с наибольшим числом касаний.
+    """
+    if len(levels) == 0:
+        return []
+
+    levels = np.sort(np.asarray(levels, dtype=float))
+    gaps = np.diff(levels) > tolerance * np.abs(levels[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(gaps) + 1))
+    centers = np.add.reduceat(levels, starts) / np.diff(np.append(starts, len(levels)))
+
+    sorted_prices = np.sort(np.asarray(prices, dtype=float))
+    band = tolerance * np.abs(centers)
+    touches = (
+        np.searchsorted(sorted_prices, centers + band, side="right")
+        - np.searchsorted(sorted_prices, centers - band, side="left")
+    )
+
+    order = np.argsort(-touches, kind="stable")[:max_levels]
+    return [{"level": float(centers[i]), "touches": int(touches[i])} for i in order]
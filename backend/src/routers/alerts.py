@@ -0,0 +1,76 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List
+from ..dependencies import AlertEngineDep
+from ..price_alerts import AlertEngine
+from ..models.alerts import PriceAlert
+from ..validators import PriceAlertRequest
+from ..exceptions import CryptoAPIException, raise_http_exception
+from loguru import logger
+
+router = APIRouter(
+    prefix="/alerts",
+    tags=["alerts"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.post("", response_model=PriceAlert)
+async def create_alert(
+    request: PriceAlertRequest,
+    engine: AlertEngine = AlertEngineDep
+):
+    """
+    Создание ценового алерта
+    
+    - **client_id**: ID клиента; сработавший алерт приходит в WebSocket /ws/alerts/{client_id}
+    - **symbol**: Символ монеты
+    - **kind**: price_above / price_below - пересечение цены `value`;
+      change_up / change_down - изменение на `value` % от опорной цены
+    - **reference_price**: Опорная цена для изменения в % (по умолчанию - последняя известная)
+    - **cooldown**: Пауза между срабатываниями повторяемого алерта, секунды
+    - **repeat**: Повторять срабатывания (иначе алерт удаляется после первого)
+    """
+    try:
+        alert = engine.add(
+            request.client_id, request.symbol, request.kind, request.value,
+            reference_price=request.reference_price, cooldown=request.cooldown, repeat=request.repeat
+        )
+        logger.info(f"Алерт {alert.id}: {alert.symbol} {alert.kind} {alert.value} для клиента {alert.client_id}")
+        return alert.to_dict()
+    except CryptoAPIException as e:
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка создания алерта: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+@router.get("/stats")
+async def get_alert_stats(engine: AlertEngine = AlertEngineDep) -> Dict[str, Any]:
+    """
+    Статистика движка алертов
+    """
+    return {
+        "active": len(engine),
+        "symbols": engine.symbol_count(),
+        "triggered": engine.triggered
+    }
+
+@router.get("/client/{client_id}", response_model=List[PriceAlert])
+async def get_client_alerts(
+    client_id: str,
+    engine: AlertEngine = AlertEngineDep
+):
+    """
+    Активные алерты клиента
+    """
+    return [alert.to_dict() for alert in engine.list_for_client(client_id)]
+
+@router.delete("/{alert_id}")
+async def delete_alert(
+    alert_id: int,
+    engine: AlertEngine = AlertEngineDep
+) -> Dict[str, Any]:
+    """
+    Удаление алерта
+    """
+    if not engine.remove(alert_id):
+        raise HTTPException(status_code=404, detail=f"Алерт {alert_id} не найден")
+    return {"id": alert_id, "deleted": True}
@@ -21,6 +21,7 @@ async def root() -> Dict[str, Any]:
         "endpoints": {
             "crypto": "/crypto",
             "technical": "/technical", 
+            "alerts": "/alerts",
             "websocket": "/ws",
             "docs": "/docs",
             "health": "/health",
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from ..services.crypto_service import CryptoService
-from ..dependencies import CoinMarketCapClientDep
+from ..dependencies import CoinMarketCapClientDep, MarketStatsDep, SnapshotStoreDep
+from ..market_stats import MarketStats
+from ..snapshot_store import SnapshotStore
 from ..coinmarketcap_client import CoinMarketCapClient
-from ..models.crypto import CryptoPrice, CoinInfo, SearchResult, TrendingCoin
+from ..models.crypto import CryptoPrice, CoinInfo, SearchResult, TrendingCoin, MarketMicrostats
 from ..validators import CryptoPricesRequest, SearchRequest
 from ..constants import Currency, DEFAULT_LIMIT, MIN_LIMIT, MAX_LIMIT
-from ..exceptions import raise_http_exception
+from ..exceptions import CoinNotFoundError, CryptoAPIException, raise_http_exception
 from loguru import logger
 
 # Создаем роутер с префиксом и тегами
@@ -20,14 +23,32 @@ router = APIRouter(
 async def get_crypto_prices(
     limit: int = Query(DEFAULT_LIMIT, ge=MIN_LIMIT, le=MAX_LIMIT, description="Количество монет"),
     convert: Currency = Query(Currency.USD, description="Валюта конвертации"),
-    client: CoinMarketCapClient = CoinMarketCapClientDep
+    as_of: Optional[datetime] = Query(None, description="Листинг на момент времени (ISO 8601, без зоны - UTC)"),
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    snapshots: SnapshotStore = SnapshotStoreDep
 ):
     """
     Получение цен криптовалют
     
     - **limit**: Количество монет (1-5000)
     - **convert**: Валюта конвертации (USD, EUR, BTC, ETH)
+    - **as_of**: Вернуть листинг из архива снимков - последний снимок не позже этого момента
+      (только USD, не больше SNAPSHOT_LIMIT монет)
     """
+    if as_of is not None:
+        if convert != Currency.USD:
+            raise HTTPException(status_code=400, detail="Снимки листинга хранятся только в USD")
+        if as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=timezone.utc)
+        
+        snapshot = snapshots.as_of(int(as_of.timestamp() * 1000))
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail=f"Нет снимков листинга на момент {as_of.isoformat()}")
+        
+        taken_at, state = snapshot
+        logger.info(f"Листинг на {as_of.isoformat()}: снимок от {taken_at}")
+        return state.rows(limit)
+    
     try:
         # Создаем сервис с клиентом
         service = CryptoService(client)
@@ -42,6 +63,22 @@ async def get_crypto_prices(
         logger.error(f"Ошибка получения цен криптовалют: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/snapshots/range")
+async def get_snapshot_range(snapshots: SnapshotStore = SnapshotStoreDep) -> Dict[str, Any]:
+    """
+    Диапазон архива снимков листинга (для запросов /crypto/prices?as_of=)
+    """
+    def moment(epoch_ms: Optional[int]) -> Optional[str]:
+        return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).isoformat() if epoch_ms is not None else None
+    
+    return {
+        "snapshots": len(snapshots),
+        "first": moment(snapshots.first),
+        "last": moment(snapshots.last),
+        "interval": snapshots.interval,
+        "limit": snapshots.limit
+    }
+
 @router.get("/{coin_id}", response_model=CoinInfo)
 async def get_coin_info(
     coin_id: str,
@@ -96,6 +133,32 @@ async def get_trending_coins(
         logger.error(f"Ошибка получения трендовых монет: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{coin_id}/stats", response_model=MarketMicrostats)
+async def get_coin_microstats(
+    coin_id: str,
+    window: Optional[str] = Query(None, description="Окно статистик (по умолчанию самое длинное, например 24h)"),
+    stats: MarketStats = MarketStatsDep
+):
+    """
+    Скользящие статистики монеты: максимум, минимум, VWAP, реализованная волатильность, число тиков
+    
+    Считаются инкрементально по уже принятым тикам, без запросов к внешнему API.
+    
+    - **coin_id**: Символ, ID или slug монеты
+    - **window**: Окно из настроенных (MICROSTATS_WINDOWS)
+    """
+    try:
+        snapshot = stats.get(coin_id, window)
+        if snapshot is None:
+            raise CoinNotFoundError(coin_id)
+        return snapshot
+        
+    except CryptoAPIException as e:
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка получения статистик для {coin_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{coin_id}/history")
 async def get_coin_history(
     coin_id: str,
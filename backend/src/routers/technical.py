@@ -1,13 +1,27 @@
+import json
+import numpy as np
 from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import Dict, Any
-from ..services.crypto_service import CryptoService
-from ..dependencies import CoinMarketCapClientDep, TechnicalAnalyzerDep
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, AsyncIterator, Optional
+from ..dependencies import (
+    CoinMarketCapClientDep, TechnicalAnalyzerDep, AnalysisCacheDep, AnalysisExecutorDep, IndicatorMaterializerDep
+)
+from ..analysis_cache import AnalysisCache
+from ..analysis_executor import AnalysisExecutor
+from ..indicator_materializer import IndicatorMaterializer
 from ..coinmarketcap_client import CoinMarketCapClient
 from ..technical_analysis import TechnicalAnalyzer
-from ..models.technical import TechnicalAnalysis
-from ..validators import TechnicalAnalysisRequest
-from ..constants import DEFAULT_DAYS, MIN_DAYS, MAX_DAYS
-from ..exceptions import InsufficientDataError, raise_http_exception
+from ..indicator_pipeline import INDICATORS, SERIES_INDICATORS, parse_indicator_selection
+from ..resampling import parse_timeframes
+from ..services.technical_service import TechnicalService
+from ..models.technical import TechnicalAnalysis, BatchTechnicalAnalysis
+from ..validators import TechnicalAnalysisRequest, BatchAnalysisRequest, ScreenerRequest, BacktestRequest, BacktestSweepRequest
+from ..series_encoding import ENCODINGS, render_series
+from ..constants import (
+    DEFAULT_DAYS, MIN_DAYS, MAX_DAYS, MAX_SERIES_POINTS,
+    DEFAULT_CORRELATION_TOP_N, MAX_CORRELATION_COINS, DEFAULT_CORRELATION_WINDOW, Timeframe
+)
+from ..exceptions import CryptoAPIException, InsufficientDataError, ServiceOverloadedError, ValidationError, raise_http_exception
 from loguru import logger
 
 router = APIRouter(
@@ -20,33 +34,48 @@ router = APIRouter(
 async def analyze_coin(
     coin_id: str,
     days: int = Query(DEFAULT_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней для анализа"),
+    timeframe: Timeframe = Query(Timeframe.DAILY, description="Интервал баров"),
     client: CoinMarketCapClient = CoinMarketCapClientDep,
-    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep
+    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep,
+    cache: AnalysisCache = AnalysisCacheDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep,
+    materializer: IndicatorMaterializer = IndicatorMaterializerDep
 ):
     """
     Технический анализ криптовалюты
     
     - **coin_id**: ID или символ монеты
     - **days**: Количество дней для анализа (1-365)
+    - **timeframe**: Интервал баров (daily, weekly, monthly)
+    
+    Для монет из топ-N результат берется из материализованной таблицы.
     """
-    try:
-        # Получаем исторические данные
-        service = CryptoService(client)
-        historical_data = await service.get_historical_data(coin_id, days)
+    async def compute() -> Dict[str, Any]:
+        # Бары интервала (закэшированы отдельно от результата анализа); не меньше 20 баров
+        bars = await TechnicalService(client, executor, cache).load_bars(coin_id, days, timeframe)
         
-        # Проверяем достаточность данных
-        if len(historical_data) < 20:
-            raise InsufficientDataError(20, len(historical_data))
+        # Выполняем технический анализ в пуле вычислений, не блокируя event loop
+        series = np.array([bars["close"], bars["volume"]], dtype=float)
+        analysis_result = await executor.run_array(analyzer.analyze_series, series)
         
-        # Выполняем технический анализ
-        analysis_result = analyzer.analyze(historical_data)
+        return TechnicalService.analysis_response(coin_id, days, timeframe, analysis_result)
+    
+    try:
+        materialized = materializer.lookup(coin_id, days, timeframe)
+        if materialized is not None:
+            return {**materialized["analysis"], "coin_id": coin_id}
         
-        logger.info(f"Выполнен технический анализ для {coin_id} за {days} дней")
-        return analysis_result
+        result = await cache.get_or_compute(coin_id, days, ("analyze", timeframe.value), compute)
+        
+        logger.info(f"Выполнен технический анализ для {coin_id} за {days} дней ({timeframe.value})")
+        return result
         
     except InsufficientDataError as e:
         logger.warning(f"Недостаточно данных для анализа {coin_id}: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except ServiceOverloadedError as e:
+        logger.warning(f"Пул анализа перегружен, запрос {coin_id} отклонен")
+        raise raise_http_exception(e)
     except Exception as e:
         logger.error(f"Ошибка технического анализа для {coin_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -55,44 +84,98 @@ async def analyze_coin(
 async def get_technical_indicators(
     coin_id: str,
     days: int = Query(DEFAULT_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней"),
+    timeframe: Timeframe = Query(Timeframe.DAILY, description="Интервал баров"),
+    indicators: Optional[str] = Query(None, description=f"Индикаторы через запятую: {', '.join(INDICATORS)}"),
+    series: bool = Query(False, description="Полные ряды, выровненные по временным меткам"),
+    from_: Optional[str] = Query(None, alias="from", description="Начало окна (ISO 8601), для series=true"),
+    to: Optional[str] = Query(None, description="Конец окна (ISO 8601), для series=true"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_SERIES_POINTS, description="Максимум точек в ответе, для series=true"),
+    precision: Optional[int] = Query(None, ge=0, le=12, description="Знаков после запятой, для series=true"),
+    encoding: str = Query("json", description=f"Кодировка рядов: {', '.join(ENCODINGS)}"),
     client: CoinMarketCapClient = CoinMarketCapClientDep,
-    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep
+    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep,
+    cache: AnalysisCache = AnalysisCacheDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep,
+    materializer: IndicatorMaterializer = IndicatorMaterializerDep
 ):
     """
     Получение технических индикаторов
     
     - **coin_id**: ID или символ монеты
     - **days**: Количество дней (1-365)
+    - **timeframe**: Интервал баров (daily, weekly, monthly)
+    - **indicators**: Список индикаторов (по умолчанию sma_20, sma_50, rsi, macd, bollinger_bands)
+    - **series**: Вернуть ряды всех индикаторов в колоночном виде, выровненные по `timestamps`
+    - **from** / **to** / **limit**: Окно и постраничная выдача рядов (`next_from` - начало следующей страницы)
+    - **precision**: Округление значений рядов
+    - **encoding**: `json` - массивы чисел, `f32`/`f64` - base64 little-endian массивы (метки - int64 мс)
     """
-    try:
-        service = CryptoService(client)
-        historical_data = await service.get_historical_data(coin_id, days)
-        
-        if len(historical_data) < 20:
-            raise InsufficientDataError(20, len(historical_data))
-        
-        # Извлекаем цены
-        prices = [item.get('price', 0) for item in historical_data]
-        
-        # Вычисляем индикаторы
-        indicators = {
-            "sma_20": analyzer.calculate_sma(prices, 20)[-1] if len(prices) >= 20 else None,
-            "sma_50": analyzer.calculate_sma(prices, 50)[-1] if len(prices) >= 50 else None,
-            "rsi": analyzer.calculate_rsi(prices, 14)[-1] if len(prices) >= 14 else None,
-            "macd": analyzer.calculate_macd(prices),
-            "bollinger_bands": analyzer.calculate_bollinger_bands(prices, 20)
-        }
+    async def fetch_bars() -> Dict[str, np.ndarray]:
+        return await TechnicalService(client, executor, cache).load_bars(coin_id, days, timeframe)
+    
+    async def compute() -> Dict[str, Any]:
+        bars = await fetch_bars()
+        
+        # Вычисляем только запрошенные индикаторы: скаляры для средних и RSI, ряды для MACD и Боллинджера
+        values = await executor.run_array(
+            analyzer.indicator_values, bars["close"], selected, SERIES_INDICATORS
+        )
         
-        logger.info(f"Получены технические индикаторы для {coin_id}")
         return {
             "coin_id": coin_id,
             "days": days,
-            "indicators": indicators
+            "timeframe": timeframe.value,
+            "indicators": values
         }
+    
+    async def compute_series() -> Dict[str, Any]:
+        bars = await fetch_bars()
+        
+        # Ряды остаются массивами NumPy: окно и кодировка применяются к закэшированному результату
+        columns = await executor.run_array(analyzer.indicator_series, bars["close"], selected)
+        return {"epoch_ms": bars["epoch_ms"], "columns": columns}
+    
+    try:
+        selected = parse_indicator_selection(indicators)
+        
+        if not series:
+            materialized = materializer.lookup(coin_id, days, timeframe)
+            if materialized is not None:
+                values = materialized["indicators"]
+                return {
+                    "coin_id": coin_id,
+                    "days": days,
+                    "timeframe": timeframe.value,
+                    "indicators": {name: values[name] for name in selected}
+                }
+            
+            result = await cache.get_or_compute(
+                coin_id, days, ("indicators", timeframe.value) + tuple(selected), compute
+            )
+            logger.info(f"Получены технические индикаторы {selected} для {coin_id}")
+            return result
+        
+        if encoding not in ENCODINGS:
+            raise ValidationError("encoding", encoding, f"один из {', '.join(ENCODINGS)}")
+        
+        computed = await cache.get_or_compute(
+            coin_id, days, ("series", timeframe.value) + tuple(selected), compute_series
+        )
+        rendered = render_series(
+            computed["epoch_ms"], computed["columns"],
+            start=from_, end=to, limit=limit, precision=precision, encoding=encoding
+        )
+        
+        logger.info(f"Получены ряды индикаторов {selected} для {coin_id}: {rendered['count']} точек, {encoding}")
+        # Ответ уже в JSON-совместимом виде: минуем повторную сериализацию через jsonable_encoder
+        return JSONResponse({"coin_id": coin_id, "days": days, "timeframe": timeframe.value, "series": rendered})
         
     except InsufficientDataError as e:
         logger.warning(f"Недостаточно данных для индикаторов {coin_id}: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос индикаторов для {coin_id}: {e}")
+        raise raise_http_exception(e)
     except Exception as e:
         logger.error(f"Ошибка получения индикаторов для {coin_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -101,38 +184,290 @@ async def get_technical_indicators(
 async def get_trend_analysis(
     coin_id: str,
     days: int = Query(DEFAULT_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней"),
+    timeframe: Timeframe = Query(Timeframe.DAILY, description="Интервал баров"),
     client: CoinMarketCapClient = CoinMarketCapClientDep,
-    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep
+    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep,
+    cache: AnalysisCache = AnalysisCacheDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep,
+    materializer: IndicatorMaterializer = IndicatorMaterializerDep
 ):
     """
     Анализ тренда криптовалюты
     
     - **coin_id**: ID или символ монеты
     - **days**: Количество дней (1-365)
+    - **timeframe**: Интервал баров (daily, weekly, monthly)
     """
+    async def compute() -> Dict[str, Any]:
+        bars = await TechnicalService(client, executor, cache).load_bars(coin_id, days, timeframe)
+        trend = await executor.run(analyzer.get_trend_analysis, bars["close"].tolist())
+        
+        return {
+            "coin_id": coin_id,
+            "days": days,
+            "timeframe": timeframe.value,
+            "trend_analysis": trend
+        }
+    
     try:
-        service = CryptoService(client)
-        historical_data = await service.get_historical_data(coin_id, days)
+        materialized = materializer.lookup(coin_id, days, timeframe)
+        if materialized is not None:
+            return {
+                "coin_id": coin_id,
+                "days": days,
+                "timeframe": timeframe.value,
+                "trend_analysis": materialized["trend"]
+            }
         
-        if len(historical_data) < 20:
-            raise InsufficientDataError(20, len(historical_data))
+        result = await cache.get_or_compute(coin_id, days, ("trend", timeframe.value), compute)
         
-        # Извлекаем цены
-        prices = [item.get('price', 0) for item in historical_data]
+        logger.info(f"Выполнен анализ тренда для {coin_id}")
+        return result
         
-        # Анализируем тренд
-        trend_analysis = analyzer.analyze_trend(prices)
+    except InsufficientDataError as e:
+        logger.warning(f"Недостаточно данных для анализа тренда {coin_id}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Ошибка анализа тренда для {coin_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timeframes/{coin_id}")
+async def get_multi_timeframe_indicators(
+    coin_id: str,
+    days: int = Query(MAX_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней"),
+    timeframes: Optional[str] = Query(None, description="Интервалы через запятую: daily, weekly, monthly"),
+    indicators: Optional[str] = Query(None, description=f"Индикаторы через запятую: {', '.join(INDICATORS)}"),
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    analyzer: TechnicalAnalyzer = TechnicalAnalyzerDep,
+    cache: AnalysisCache = AnalysisCacheDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep
+):
+    """
+    Последние значения индикаторов сразу по нескольким интервалам
+    
+    - **coin_id**: ID или символ монеты
+    - **days**: Количество дней истории (для monthly нужен год, чтобы SMA/RSI имели значения)
+    - **timeframes**: Интервалы (по умолчанию все)
+    - **indicators**: Список индикаторов
+    
+    Исторические данные загружаются один раз и агрегируются во все интервалы,
+    индикаторы всех интервалов считаются одной задачей пула.
+    Для интервала с недостаточным числом баров значения индикаторов - null.
+    """
+    async def compute() -> Dict[str, Any]:
+        bars = await TechnicalService(client, executor, cache).get_bars(coin_id, days, selected_timeframes)
+        closes = {timeframe.value: bars[timeframe]["close"] for timeframe in selected_timeframes}
+        values = await executor.run(analyzer.indicator_values_by_timeframe, closes, selected)
         
-        logger.info(f"Выполнен анализ тренда для {coin_id}")
         return {
             "coin_id": coin_id,
             "days": days,
-            "trend_analysis": trend_analysis
+            "timeframes": {
+                name: {"bars": len(closes[name]), "indicators": values[name]}
+                for name in closes
+            }
         }
+    
+    try:
+        selected = parse_indicator_selection(indicators)
+        selected_timeframes = parse_timeframes(timeframes)
+        
+        result = await cache.get_or_compute(
+            coin_id, days,
+            ("timeframes", tuple(timeframe.value for timeframe in selected_timeframes)) + tuple(selected),
+            compute
+        )
+        
+        logger.info(f"Индикаторы {selected} для {coin_id} по интервалам {list(result['timeframes'])}")
+        return result
+        
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос индикаторов по интервалам для {coin_id}: {e}")
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка расчета индикаторов по интервалам для {coin_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=BatchTechnicalAnalysis)
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep
+):
+    """
+    Пакетный технический анализ нескольких монет
+    
+    - **coins**: Список символов монет (или)
+    - **top_n**: Топ-N монет по капитализации
+    - **days**: Количество дней (1-365)
+    - **parallel**: Считать большие пакеты частями на нескольких воркерах пула
+    
+    Ряды выравниваются в матрицу монеты x время, индикаторы считаются за один проход.
+    """
+    try:
+        service = TechnicalService(client, executor)
+        result = await service.analyze_batch(
+            request.coins, request.top_n, request.days, request.parallel, request.timeframe
+        )
+        
+        logger.info(f"Выполнен пакетный анализ {len(result['coins'])} монет за {request.days} дней")
+        return result
+        
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос пакетного анализа: {e}")
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка пакетного анализа: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/screener")
+async def screen_market(
+    request: ScreenerRequest,
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep,
+    cache: AnalysisCache = AnalysisCacheDep
+):
+    """
+    Скринер рынка по индикаторам и полям снимка
+    
+    - **conditions**: Условия `{field, op, value}`, объединяются через И
+      (например: `rsi lt 30` и `macd_bullish_cross eq 1`)
+    - **top_n**: Вселенная монет - топ-N по капитализации
+    - **days**: Количество дней истории для индикаторов
+    - **sort_by** / **sort_order**: Ранжирование результатов
+    - **limit**: Максимум результатов
+    
+    Поля снимка: price, change_24h, volume_24h, market_cap.
+    Таблица рынка кэшируется до прихода новых данных, условия проверяются векторно.
+    """
+    try:
+        service = TechnicalService(client, executor, cache)
+        return await service.screen(
+            request.conditions, request.top_n, request.days,
+            request.sort_by, request.sort_order, request.limit, request.timeframe
+        )
+        
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос скринера: {e}")
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка скринера: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/correlation")
+async def get_correlation_matrix(
+    top_n: int = Query(DEFAULT_CORRELATION_TOP_N, ge=2, le=MAX_CORRELATION_COINS, description="Топ-N монет по капитализации"),
+    window: int = Query(DEFAULT_CORRELATION_WINDOW, ge=2, le=MAX_DAYS - 1, description="Окно в барах"),
+    interval: Timeframe = Query(Timeframe.DAILY, description="Интервал баров"),
+    precision: Optional[int] = Query(None, ge=0, le=12, description="Знаков после запятой"),
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep,
+    cache: AnalysisCache = AnalysisCacheDep
+):
+    """
+    Матрицы корреляций и ковариаций логарифмических доходностей
+    
+    - **top_n**: Количество монет (2-200)
+    - **window**: Окно в барах
+    - **interval**: Интервал баров (daily, weekly, monthly); история ограничена 365 днями
+    - **precision**: Округление значений
+    
+    Строки и столбцы матриц соответствуют `symbols`.
+    """
+    try:
+        service = TechnicalService(client, executor, cache)
+        result = await service.get_correlation(top_n, window, interval, precision)
+        return JSONResponse(result)
         
     except InsufficientDataError as e:
-        logger.warning(f"Недостаточно данных для анализа тренда {coin_id}: {e}")
+        logger.warning(f"Недостаточно данных для корреляций: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос корреляций: {e}")
+        raise raise_http_exception(e)
     except Exception as e:
-        logger.error(f"Ошибка анализа тренда для {coin_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        logger.error(f"Ошибка расчета корреляций: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/backtest")
+async def run_backtest(
+    request: BacktestRequest,
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep
+):
+    """
+    Бэктест стратегии на истории цен
+    
+    - **coin_id**: ID или символ монеты
+    - **days**: Количество дней истории
+    - **strategy**: `sma_crossover` (short, long), `rsi` (period, lower, upper),
+      `bollinger_breakout` (period, std_dev)
+    - **params**: Параметры стратегии
+    - **fee**: Комиссия за изменение позиции
+    - **include_equity**: Вернуть кривую капитала
+    
+    Позиция решается на закрытии бара и получает доходность следующего бара.
+    """
+    try:
+        service = TechnicalService(client, executor)
+        result = await service.backtest(
+            request.coin_id, request.days, request.strategy, request.params,
+            request.fee, request.include_equity, request.timeframe
+        )
+        
+        logger.info(f"Выполнен бэктест {request.strategy} для {request.coin_id}")
+        return result
+        
+    except InsufficientDataError as e:
+        logger.warning(f"Недостаточно данных для бэктеста {request.coin_id}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос бэктеста: {e}")
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка бэктеста для {request.coin_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _ndjson(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """События потока построчно в JSON; ошибка после начала ответа - последнее событие"""
+    try:
+        async for event in events:
+            yield json.dumps(event) + "\n"
+    except Exception as e:
+        logger.error(f"Ошибка потоковой выдачи: {e}")
+        yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+@router.post("/backtest/sweep")
+async def sweep_backtest(
+    request: BacktestSweepRequest,
+    client: CoinMarketCapClient = CoinMarketCapClientDep,
+    executor: AnalysisExecutor = AnalysisExecutorDep
+):
+    """
+    Перебор сетки параметров стратегии
+    
+    - **grid**: Значения параметров, например `{"short": [5, 10, 20], "long": [50, 100]}`
+    - **sort_by**: Метрика ранжирования (sharpe, total_return, max_drawdown)
+    - **top**: Количество лучших комбинаций в результате
+    
+    Ответ - NDJSON: события `progress` (completed/total) по мере готовности частей сетки
+    и итоговое событие `result`. Комбинации считаются параллельно в пуле вычислений,
+    уже посчитанные для текущих данных берутся из кэша.
+    """
+    try:
+        service = TechnicalService(client, executor)
+        events = await service.sweep(
+            request.coin_id, request.days, request.strategy, request.grid,
+            request.fee, request.sort_by, request.top, request.timeframe
+        )
+        return StreamingResponse(_ndjson(events), media_type="application/x-ndjson")
+        
+    except InsufficientDataError as e:
+        logger.warning(f"Недостаточно данных для перебора {request.coin_id}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except CryptoAPIException as e:
+        logger.warning(f"Некорректный запрос перебора: {e}")
+        raise raise_http_exception(e)
+    except Exception as e:
+        logger.error(f"Ошибка перебора для {request.coin_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, Any
-from ..dependencies import WebSocketManagerDep, CoinMarketCapClientDep
-from ..services.crypto_service import CryptoService
-from ..coinmarketcap_client import CoinMarketCapClient
+from typing import Any, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from ..config import settings
+from ..dependencies import WebSocketManagerDep, PubSubHubDep, PriceStreamDep
+from ..price_stream import PriceStream
+from ..pubsub import PubSubHub
 from ..websocket_manager import WebSocketManager
+from ..wire_format import Payload, decode
 from loguru import logger
 
 router = APIRouter(
@@ -12,122 +14,243 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+async def receive_message(websocket: WebSocket, ws_manager: WebSocketManager) -> Any:
+    """
+    Следующее сообщение клиента в любом формате (JSON-текст или MessagePack)
+    
+    Каждый кадр отмечает соединение живым для heartbeat; ответы {"action": "pong"}
+    на сообщения ping не возвращаются.
+    
+    Returns:
+        разобранное сообщение или None, если его не удалось разобрать
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        ws_manager.touch(websocket)
+        data = message.get("text")
+        try:
+            decoded = decode(data if data is not None else message.get("bytes") or b"")
+        except (ValueError, TypeError):
+            return None
+        if not (isinstance(decoded, dict) and decoded.get("action") == "pong"):
+            return decoded
+
+async def stream_topic(
+    websocket: WebSocket,
+    ws_manager: WebSocketManager,
+    hub: PubSubHub,
+    kind: str,
+    argument: str = "",
+    delta: bool = False,
+    max_rate: Optional[float] = None,
+    last_seq: Optional[int] = None,
+    epoch: Optional[str] = None
+):
+    """
+    Подписка соединения на тему хаба до отключения клиента
+    
+    Данные темы опрашиваются один раз для всех подписчиков; соединение только
+    получает готовые сообщения через свою очередь отправки. Первое сообщение
+    приходит сразу, если у темы есть состояние (она активна или недавно осталась
+    без подписчиков).
+    
+    С `delta` клиент получает снимок с номером версии, затем только изменения.
+    Номер дельты должен быть на единицу больше предыдущего; при пропуске
+    (например, сообщение выброшено из очереди медленного клиента) клиент
+    отправляет {"action": "resync"} и получает текущий снимок.
+    
+    С `last_seq` (номер последнего полученного сообщения, включает дельта-протокол)
+    переподключившийся клиент получает только пропущенные дельты из буфера темы, без
+    запроса к источнику. Если их в буфере уже нет или `epoch` (из снимка) не совпадает -
+    текущий снимок.
+    
+    С `max_rate` клиент получает не больше max_rate сообщений темы в секунду:
+    промежуточные сливаются в последнее, а несколько слитых дельт заменяются снимком.
+    """
+    name = hub.topic_name(kind, argument)
+    delta = delta or last_seq is not None
+    ws_manager.set_max_rate(websocket, max_rate or settings.ws_max_update_rate)
+    
+    def snapshot():
+        return hub.snapshot(name)
+    
+    async def deliver(payload: Payload):
+        # Сообщение сериализуется один раз на формат для всех подписчиков;
+        # очередь не ждет сокет, при заполнении старое сообщение темы заменяется новым
+        ws_manager.enqueue(websocket, payload, key=name, replacement=snapshot if delta else None)
+    
+    try:
+        await hub.subscribe(id(websocket), deliver, kind, argument, delta=delta, last_seq=last_seq, epoch=epoch)
+        
+        # Соединение держится открытым; из входящих сообщений обрабатывается только resync
+        while True:
+            message = await receive_message(websocket, ws_manager)
+            if not delta or not isinstance(message, dict):
+                continue
+            if message.get("action") == "resync":
+                current = hub.snapshot(name)
+                if current is not None:
+                    ws_manager.enqueue(websocket, current)
+            
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket соединение темы {name} закрыто")
+    except Exception as e:
+        logger.error(f"Ошибка WebSocket темы {name}: {e}")
+    finally:
+        ws_manager.disconnect(websocket)
+        await hub.unsubscribe(id(websocket), name)
+
 @router.websocket("/crypto/prices")
 async def websocket_crypto_prices(
     websocket: WebSocket,
+    delta: bool = False,
+    max_rate: Optional[float] = None,
+    last_seq: Optional[int] = None,
+    epoch: Optional[str] = None,
     ws_manager: WebSocketManager = WebSocketManagerDep,
-    client: CoinMarketCapClient = CoinMarketCapClientDep
+    hub: PubSubHub = PubSubHubDep
 ):
     """
     WebSocket для получения цен криптовалют в реальном времени
+    
+    `?delta=true` - снимок и затем только изменившиеся поля по монетам,
+    `?max_rate=2` - не больше 2 сообщений в секунду,
+    `?last_seq=42&epoch=...` - переподключение: только пропущенные дельты
     """
     await ws_manager.connect(websocket)
+    await stream_topic(
+        websocket, ws_manager, hub, "prices", delta=delta, max_rate=max_rate, last_seq=last_seq, epoch=epoch
+    )
+
+@router.websocket("/alerts/{client_id}")
+async def websocket_alerts(
+    websocket: WebSocket,
+    client_id: str,
+    ws_manager: WebSocketManager = WebSocketManagerDep
+):
+    """
+    WebSocket для получения сработавших ценовых алертов клиента
+    
+    Алерты создаются через POST /alerts с тем же client_id и доставляются
+    движком алертов только соединениям этого клиента.
+    """
+    await ws_manager.connect(websocket, client_id=client_id)
     
     try:
-        service = CryptoService(client)
-        
+        # Соединение держится открытым; входящие сообщения не обрабатываются
         while True:
-            # Получаем актуальные цены
-            prices = await service.get_crypto_prices(limit=10)  # Топ 10 монет
-            
-            # Отправляем данные клиенту
-            await websocket.send_json({
-                "type": "crypto_prices",
-                "data": [price.dict() for price in prices],
-                "timestamp": prices[0].last_updated if prices else None
-            })
-            
-            # Ждем 30 секунд перед следующим обновлением
-            import asyncio
-            await asyncio.sleep(30)
+            await receive_message(websocket, ws_manager)
             
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
-        logger.info("WebSocket соединение закрыто")
+        logger.info(f"WebSocket соединение алертов клиента {client_id} закрыто")
     except Exception as e:
-        logger.error(f"Ошибка WebSocket: {e}")
+        logger.error(f"Ошибка WebSocket алертов клиента {client_id}: {e}")
         ws_manager.disconnect(websocket)
 
 @router.websocket("/crypto/{coin_id}")
 async def websocket_coin_data(
     websocket: WebSocket,
     coin_id: str,
+    delta: bool = False,
+    max_rate: Optional[float] = None,
+    last_seq: Optional[int] = None,
+    epoch: Optional[str] = None,
     ws_manager: WebSocketManager = WebSocketManagerDep,
-    client: CoinMarketCapClient = CoinMarketCapClientDep
+    hub: PubSubHub = PubSubHubDep
 ):
     """
     WebSocket для получения данных конкретной монеты
+    
+    Последние данные монеты приходят сразу при подключении; `?last_seq=42&epoch=...` -
+    переподключение с повтором пропущенных дельт из памяти
     """
     await ws_manager.connect(websocket)
-    
-    try:
-        service = CryptoService(client)
-        
-        while True:
-            # Получаем информацию о монете
-            coin_info = await service.get_coin_info(coin_id)
-            
-            # Отправляем данные клиенту
-            await websocket.send_json({
-                "type": "coin_data",
-                "coin_id": coin_id,
-                "data": coin_info.dict(),
-                "timestamp": coin_info.last_updated
-            })
-            
-            # Ждем 10 секунд перед следующим обновлением
-            import asyncio
-            await asyncio.sleep(10)
-            
-    except WebSocketDisconnect:
-        ws_manager.disconnect(websocket)
-        logger.info(f"WebSocket соединение для {coin_id} закрыто")
-    except Exception as e:
-        logger.error(f"Ошибка WebSocket для {coin_id}: {e}")
-        ws_manager.disconnect(websocket)
+    await stream_topic(
+        websocket, ws_manager, hub, "coin", coin_id, delta=delta, max_rate=max_rate, last_seq=last_seq, epoch=epoch
+    )
 
 @router.websocket("/market/overview")
 async def websocket_market_overview(
     websocket: WebSocket,
+    delta: bool = False,
+    max_rate: Optional[float] = None,
+    last_seq: Optional[int] = None,
+    epoch: Optional[str] = None,
     ws_manager: WebSocketManager = WebSocketManagerDep,
-    client: CoinMarketCapClient = CoinMarketCapClientDep
+    hub: PubSubHub = PubSubHubDep
 ):
     """
     WebSocket для получения обзора рынка
     """
     await ws_manager.connect(websocket)
+    await stream_topic(
+        websocket, ws_manager, hub, "overview", delta=delta, max_rate=max_rate, last_seq=last_seq, epoch=epoch
+    )
+
+
+@router.websocket("/market/stream")
+async def websocket_market_stream(
+    websocket: WebSocket,
+    max_rate: Optional[float] = None,
+    ws_manager: WebSocketManager = WebSocketManagerDep,
+    stream: PriceStream = PriceStreamDep
+):
+    """
+    WebSocket для получения цен выбранных монет на каждом пакете тиков
+    
+    Сообщения клиента:
+    - {"action": "subscribe", "symbols": ["BTC", "ETH"], "max_rate": 2}
+    - {"action": "unsubscribe", "symbols": ["ETH"]}
+    - {"action": "get_prices"} - последние цены подписанных монет
+    
+    Ответ на подписку содержит текущие цены монет; затем приходят только
+    монеты, цена которых сдвинулась больше порога WS_DELTA_EPSILON.
+    
+    `max_rate` (в запросе подключения или в подписке) - не больше max_rate
+    обновлений в секунду: между отправками по каждой монете остается только
+    последняя цена.
+    """
+    await ws_manager.connect(websocket)
+    ws_manager.set_max_rate(websocket, max_rate or settings.ws_max_update_rate)
     
     try:
-        service = CryptoService(client)
-        
         while True:
-            # Получаем трендовые монеты
-            trending = await service.get_trending_coins()
-            
-            # Получаем топ монет
-            top_coins = await service.get_crypto_prices(limit=20)
+            message = await receive_message(websocket, ws_manager)
+            if not isinstance(message, dict):
+                ws_manager.enqueue(websocket, Payload({"type": "error", "message": "Неверный формат сообщения"}))
+                continue
+            action = message.get("action")
+            symbols = message.get("symbols") or []
+            if isinstance(symbols, str):
+                symbols = [symbols]
+            symbols = [str(symbol) for symbol in symbols]
             
-            # Формируем обзор рынка
-            market_overview = {
-                "trending_coins": [coin.dict() for coin in trending],
-                "top_coins": [coin.dict() for coin in top_coins],
-                "total_coins": len(top_coins),
-                "timestamp": top_coins[0].last_updated if top_coins else None
-            }
+            if action == "subscribe":
+                subscribed = ws_manager.subscribe(websocket, symbols)
+                if isinstance(message.get("max_rate"), (int, float)):
+                    ws_manager.set_max_rate(websocket, message["max_rate"])
+            elif action == "unsubscribe":
+                subscribed = ws_manager.unsubscribe(websocket, symbols)
+            elif action == "get_prices":
+                subscribed = ws_manager.registry.subscriptions.get(websocket, set())
+                ws_manager.enqueue(websocket, Payload({"type": "prices", "data": stream.snapshot(subscribed)}))
+                continue
+            else:
+                ws_manager.enqueue(websocket, Payload({"type": "error", "message": f"Неизвестное действие: {action}"}))
+                continue
             
-            # Отправляем данные клиенту
-            await websocket.send_json({
-                "type": "market_overview",
-                "data": market_overview
-            })
-            
-            # Ждем 60 секунд перед следующим обновлением
-            import asyncio
-            await asyncio.sleep(60)
+            ws_manager.enqueue(websocket, Payload({
+                "type": "subscription",
+                "symbols": sorted(subscribed),
+                "data": stream.snapshot(symbol.upper() for symbol in symbols) if action == "subscribe" else {}
+            }))
             
     except WebSocketDisconnect:
-        ws_manager.disconnect(websocket)
-        logger.info("WebSocket соединение для обзора рынка закрыто")
+        logger.info("WebSocket соединение потока цен закрыто")
     except Exception as e:
-        logger.error(f"Ошибка WebSocket для обзора рынка: {e}")
-        ws_manager.disconnect(websocket) 
\ No newline at end of file
+        logger.error(f"Ошибка WebSocket потока цен: {e}")
+    finally:
+        ws_manager.disconnect(websocket)
@@ -0,0 +1,84 @@
+"""
+Market Screener
+Векторная фильтрация и ранжирование монет по индикаторам и полям рыночного снимка
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .constants import SortOrder
+from .exceptions import ValidationError
+
+# Поля снимка рынка (из листинга), доступные в условиях
+SNAPSHOT_FIELDS = ("price", "change_24h", "volume_24h", "market_cap")
+
+# Поля индикаторов (столбцы batch_analysis.analyze_matrix)
+INDICATOR_FIELDS = (
+    "sma_20", "sma_50", "ema_12", "ema_26", "rsi",
+    "macd", "macd_signal", "macd_histogram", "macd_bullish_cross", "macd_bearish_cross",
+    "bb_upper", "bb_middle", "bb_lower", "price_change_percent", "trend",
+)
+
+SCREENER_FIELDS = SNAPSHOT_FIELDS + INDICATOR_FIELDS
+
+OPERATORS = {
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    "eq": np.equal,
+    "ne": np.not_equal,
+}
+
+
+def validate_field(field: str, name: str = "field") -> str:
+    if field not in SCREENER_FIELDS:
+        raise ValidationError(name, field, f"один из {', '.join(SCREENER_FIELDS)}")
+    return field
+
+
+def evaluate_conditions(columns: Dict[str, np.ndarray], conditions: Sequence[Any]) -> np.ndarray:
+    """
+    Маска монет, удовлетворяющих всем условиям
+
+    Каждое условие - одно векторное сравнение по столбцу; NaN (нет данных) не проходит.
+    """
+    size = len(next(iter(columns.values()))) if columns else 0
+    mask = np.ones(size, dtype=bool)
+    for condition in conditions:
+        values = columns[validate_field(condition.field)]
+        with np.errstate(invalid="ignore"):
+            mask &= OPERATORS[condition.op](values, condition.value)
+    return mask
+
+
+def rank(
+    columns: Dict[str, np.ndarray],
+    mask: np.ndarray,
+    sort_by: Optional[str],
+    sort_order: SortOrder,
+    limit: int
+) -> np.ndarray:
+    """Индексы подходящих монет, отсортированные по `sort_by` (NaN - в конце)"""
+    indices = np.flatnonzero(mask)
+    if sort_by is None or len(indices) == 0:
+        return indices[:limit]
+
+    values = columns[validate_field(sort_by, "sort_by")][indices]
+    keys = -values if sort_order == SortOrder.DESC else values
+    order = np.argsort(np.where(np.isnan(keys), np.inf, keys), kind="stable")
+    return indices[order][:limit]
+
+
+def rows(symbols: List[str], columns: Dict[str, np.ndarray], indices: np.ndarray) -> List[Dict[str, Any]]:
+    """Строки результата: только выбранные монеты превращаются в объекты"""
+    selected = {name: values[indices] for name, values in columns.items()}
+    result = []
+    for position, index in enumerate(indices):
+        row = {"symbol": symbols[index]}
+        for name, values in selected.items():
+            value = values[position]
+            row[name] = None if np.isnan(value) else float(value)
+        result.append(row)
+    return result
@@ -0,0 +1,120 @@
+"""
+Series Encoding
+Выровненные по времени ряды индикаторов: окно, точность и компактная кодировка
+"""
+
+import base64
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .exceptions import ValidationError
+
+# json - массивы чисел (null для периода прогрева)
+# f32/f64 - base64 little-endian float32/float64 (NaN для периода прогрева)
+ENCODINGS = ("json", "f32", "f64")
+
+_BINARY_DTYPES = {"f32": "<f4", "f64": "<f8"}
+
+
+def to_epoch_ms(value: str) -> int:
+    """ISO-время в миллисекунды эпохи (время без зоны считается UTC)"""
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValidationError("timestamp", value, "ISO 8601")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def timestamps_to_epoch_ms(timestamps: Sequence[str]) -> np.ndarray:
+    """Метки времени исторических данных в массив int64 (мс эпохи)"""
+    return np.fromiter((to_epoch_ms(ts) for ts in timestamps), dtype=np.int64, count=len(timestamps))
+
+
+def flatten_series(values: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Составные индикаторы в плоские столбцы: macd -> macd.macd, macd.signal, ..."""
+    columns = {}
+    for name, value in values.items():
+        if isinstance(value, dict):
+            for part, series in value.items():
+                columns[f"{name}.{part}"] = series
+        else:
+            columns[name] = value
+    return columns
+
+
+def window_bounds(
+    epoch_ms: np.ndarray,
+    start: Optional[str],
+    end: Optional[str],
+    limit: Optional[int]
+) -> Tuple[int, int, Optional[int]]:
+    """
+    Границы окна [lo, hi) по времени (бинарный поиск по отсортированным меткам)
+
+    `limit` ограничивает количество точек от начала окна; если окно обрезано,
+    возвращается метка следующей точки - ее можно передать как `from` следующей страницы.
+    """
+    lo = int(np.searchsorted(epoch_ms, to_epoch_ms(start), side="left")) if start else 0
+    hi = int(np.searchsorted(epoch_ms, to_epoch_ms(end), side="right")) if end else len(epoch_ms)
+    hi = max(hi, lo)
+
+    next_from = None
+    if limit is not None and hi - lo > limit:
+        hi = lo + limit
+        next_from = int(epoch_ms[hi])
+    return lo, hi, next_from
+
+
+def encode_column(values: np.ndarray, precision: Optional[int], encoding: str) -> Any:
+    """Кодирование одного столбца"""
+    if precision is not None:
+        values = np.round(values, precision)
+
+    if encoding in _BINARY_DTYPES:
+        # Буфер NumPy напрямую в base64, без Python-объекта на значение
+        return base64.b64encode(np.ascontiguousarray(values, dtype=_BINARY_DTYPES[encoding]).tobytes()).decode("ascii")
+
+    values = values.astype(float, copy=False)
+    mask = np.isnan(values)
+    if not mask.any():
+        return values.tolist()
+    return np.where(mask, None, values).tolist()
+
+
+def encode_timestamps(epoch_ms: np.ndarray, encoding: str) -> Any:
+    """Метки времени: ISO-строки для json, base64 int64 (мс эпохи) для бинарных кодировок"""
+    if encoding in _BINARY_DTYPES:
+        return base64.b64encode(np.ascontiguousarray(epoch_ms, dtype="<i8").tobytes()).decode("ascii")
+    return np.datetime_as_string(epoch_ms.astype("datetime64[ms]"), unit="ms", timezone="UTC").tolist()
+
+
+def render_series(
+    epoch_ms: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: Optional[int] = None,
+    precision: Optional[int] = None,
+    encoding: str = "json"
+) -> Dict[str, Any]:
+    """
+    Окно рядов в колоночном виде
+
+    Все столбцы имеют ту же длину, что и `timestamps`: i-е значение относится к i-й метке.
+    """
+    if encoding not in ENCODINGS:
+        raise ValidationError("encoding", encoding, f"один из {', '.join(ENCODINGS)}")
+
+    lo, hi, next_from = window_bounds(epoch_ms, start, end, limit)
+    return {
+        "encoding": encoding,
+        "count": hi - lo,
+        "total": len(epoch_ms),
+        "next_from": encode_timestamps(np.array([next_from]), "json")[0] if next_from is not None else None,
+        "timestamps": encode_timestamps(epoch_ms[lo:hi], encoding),
+        "columns": {name: encode_column(series[lo:hi], precision, encoding) for name, series in columns.items()},
+    }
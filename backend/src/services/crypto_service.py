@@ -1,8 +1,10 @@
 from typing import List, Dict, Any, Optional
 from ..coinmarketcap_client import CoinMarketCapClient
-from ..models.crypto import CryptoPrice, CoinInfo, SearchResult, TrendingCoin
+from ..models.crypto import CryptoPrice, CoinInfo, SearchResult, TrendingCoin, MarketMicrostats
 from ..exceptions import CoinNotFoundError, ExternalAPIError
 from ..constants import Currency, DEFAULT_LIMIT
+from ..market_ingest import market_ingest
+from ..market_stats import MarketStats, market_stats
 from loguru import logger
 
 class CryptoService:
@@ -16,8 +18,9 @@ class CryptoService:
     - Переиспользование логики
     """
     
-    def __init__(self, client: CoinMarketCapClient):
+    def __init__(self, client: CoinMarketCapClient, stats: MarketStats = market_stats):
         self.client = client
+        self.stats = stats
     
     async def get_crypto_prices(
         self, 
@@ -46,10 +49,22 @@ class CryptoService:
                         last_updated=item["last_updated"]
                     )
                     prices.append(price)
+                    # Запросы анализа по ID и slug разделяют версию данных символа
+                    for name in (item["id"], item.get("slug")):
+                        if name is not None:
+                            market_ingest.versions.alias(name, price.symbol)
                 except KeyError as e:
                     logger.warning(f"Пропущен элемент с отсутствующим полем: {e}")
                     continue
             
+            # Котировки идут в общий прием тиков: новый тик монеты инвалидирует
+            # закэшированный анализ и доходит до потребителей (алерты и т.д.)
+            market_ingest.ingest_quotes(
+                [price.symbol for price in prices],
+                [price.last_updated for price in prices],
+                [price.price for price in prices]
+            )
+            
             logger.info(f"Получено {len(prices)} цен криптовалют")
             return prices
             
@@ -86,6 +101,15 @@ class CryptoService:
                 description=raw_data.get("description")
             )
             
+            for name in (coin_id, coin_info.id, coin_info.slug):
+                market_ingest.versions.alias(name, coin_info.symbol)
+            market_ingest.ingest_quotes([coin_info.symbol], [coin_info.last_updated], [coin_info.price])
+            # Статистики уже посчитаны по принятым тикам: без запроса истории
+            coin_info.microstats = {
+                window: MarketMicrostats(**snapshot)
+                for window, snapshot in self.stats.get_all(coin_info.symbol).items()
+            }
+            
             logger.info(f"Получена информация о монете {coin_id}")
             return coin_info
             
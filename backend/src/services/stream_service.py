@@ -0,0 +1,53 @@
+from typing import Any, Dict
+from ..coinmarketcap_client import CoinMarketCapClient
+from .crypto_service import CryptoService
+
+class StreamService:
+    """
+    Сообщения тем WebSocket-рассылки
+
+    Каждый метод - источник одной темы хаба: вызывается один раз на интервал
+    опроса темы, результат получают все ее подписчики.
+    """
+
+    def __init__(self, client: CoinMarketCapClient):
+        self.crypto_service = CryptoService(client)
+
+    async def prices_message(self, argument: str = "") -> Dict[str, Any]:
+        """Топ-10 монет со скользящими статистиками"""
+        prices = await self.crypto_service.get_crypto_prices(limit=10)
+        
+        # Скользящие статистики из уже принятых тиков (без доп. запросов к API)
+        stats = {price.symbol: self.crypto_service.stats.get(price.symbol) for price in prices}
+        
+        return {
+            "type": "crypto_prices",
+            "data": [price.dict() for price in prices],
+            "stats": stats,
+            "timestamp": prices[0].last_updated if prices else None
+        }
+
+    async def coin_message(self, coin_id: str) -> Dict[str, Any]:
+        """Информация об одной монете"""
+        coin_info = await self.crypto_service.get_coin_info(coin_id)
+        return {
+            "type": "coin_data",
+            "coin_id": coin_id,
+            "data": coin_info.dict(),
+            "timestamp": coin_info.last_updated
+        }
+
+    async def overview_message(self, argument: str = "") -> Dict[str, Any]:
+        """Обзор рынка: трендовые монеты и топ-20"""
+        trending = await self.crypto_service.get_trending_coins()
+        top_coins = await self.crypto_service.get_crypto_prices(limit=20)
+        
+        return {
+            "type": "market_overview",
+            "data": {
+                "trending_coins": [coin.dict() for coin in trending],
+                "top_coins": [coin.dict() for coin in top_coins],
+                "total_coins": len(top_coins),
+                "timestamp": top_coins[0].last_updated if top_coins else None
+            }
+        }
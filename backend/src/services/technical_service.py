@@ -0,0 +1,452 @@
+import asyncio
+import math
+import time
+import numpy as np
+from typing import List, Dict, Any, AsyncIterator, Optional, Sequence
+from ..coinmarketcap_client import CoinMarketCapClient
+from ..analysis_executor import AnalysisExecutor
+from ..analysis_cache import AnalysisCache, DataVersionRegistry, analysis_cache, backtest_cache
+from ..backtesting import resolve_params, expand_grid, run_backtest, run_grid_chunk, chunked, rank_results
+from ..batch_analysis import MIN_POINTS, build_price_matrix, analyze_matrix, merge_columns, to_columnar
+from ..correlation import CorrelationCache, correlation_cache
+from ..series_encoding import timestamps_to_epoch_ms
+from ..resampling import BARS_PER_YEAR, TIMEFRAME_INTERVALS, bucket_starts, resample_all, bars_to_history
+from ..screener import SNAPSHOT_FIELDS, evaluate_conditions, rank, rows
+from ..constants import SortOrder, Timeframe, MAX_DAYS
+from ..config import settings
+from ..market_ingest import quote_time
+from ..exceptions import ValidationError, InsufficientDataError
+from .crypto_service import CryptoService
+from loguru import logger
+
+class TechnicalService:
+    """
+    Сервисный слой для технического анализа
+
+    Что делает:
+    - Загружает исторические данные через CryptoService
+    - Собирает ряды нескольких монет в матрицу
+    - Считает индикаторы векторно в пуле вычислений (при необходимости - частями)
+    """
+
+    def __init__(
+        self,
+        client: CoinMarketCapClient,
+        executor: AnalysisExecutor,
+        cache: AnalysisCache = analysis_cache,
+        correlations: CorrelationCache = correlation_cache,
+        backtests: AnalysisCache = backtest_cache
+    ):
+        self.client = client
+        self.executor = executor
+        self.cache = cache
+        self.correlations = correlations
+        self.backtests = backtests
+        self.crypto_service = CryptoService(client)
+
+    async def resolve_coins(self, coins: Optional[List[str]], top_n: Optional[int]) -> List[str]:
+        """
+        Список монет для пакетного анализа: явный список или топ-N по капитализации
+        """
+        if coins and top_n:
+            raise ValidationError("coins/top_n", top_n, "укажите либо coins, либо top_n")
+        if coins:
+            # Сохраняем порядок, убираем дубликаты
+            return list(dict.fromkeys(coin.upper() for coin in coins))
+        if top_n:
+            prices = await self.crypto_service.get_crypto_prices(limit=top_n)
+            return [price.symbol for price in prices]
+        raise ValidationError("coins/top_n", None, "нужно указать coins или top_n")
+
+    async def get_bars(
+        self,
+        coin: str,
+        days: int,
+        timeframes: Sequence[Timeframe] = (Timeframe.DAILY,)
+    ) -> Dict[Timeframe, Dict[str, np.ndarray]]:
+        """
+        Бары монеты по интервалам
+
+        Бары каждого интервала кэшируются до новых данных монеты. Недостающие
+        интервалы строятся вместе: исторические данные загружаются и разбираются один раз.
+        """
+        bars: Dict[Timeframe, Dict[str, np.ndarray]] = {}
+        missing = []
+        for timeframe in dict.fromkeys(timeframes):
+            cached = self.cache.get(self.cache.make_key(coin, days, ("bars", timeframe.value)))
+            if cached is not None:
+                bars[timeframe] = cached[0]
+            else:
+                missing.append(timeframe)
+
+        if missing:
+            started = time.perf_counter()
+            historical_data = await self.crypto_service.get_historical_data(coin, days)
+            resampled = resample_all(historical_data, missing)
+            elapsed = (time.perf_counter() - started) / len(missing)
+            for timeframe, values in resampled.items():
+                self.cache.put(self.cache.make_key(coin, days, ("bars", timeframe.value)), values, elapsed)
+            bars.update(resampled)
+        return bars
+
+    async def load_bars(self, coin: str, days: int, timeframe: Timeframe = Timeframe.DAILY) -> Dict[str, np.ndarray]:
+        """
+        Бары одного интервала с проверкой достаточности данных
+        """
+        bars = (await self.get_bars(coin, days, [timeframe]))[timeframe]
+        if len(bars["close"]) < MIN_POINTS:
+            raise InsufficientDataError(MIN_POINTS, len(bars["close"]))
+        return bars
+
+    @staticmethod
+    def analysis_response(coin: str, days: int, timeframe: Timeframe, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ответ /technical/analyze из результата TechnicalAnalyzer.analyze_series
+        """
+        return {
+            "coin_id": coin,
+            "period_days": days,
+            "timeframe": timeframe.value,
+            "indicators": {
+                name: analysis_result[name]
+                for name in ("sma_20", "sma_50", "rsi", "macd", "bollinger_bands")
+            },
+            "trend_analysis": analysis_result["trend_analysis"],
+            "volume_analysis": analysis_result["volume_analysis"] or None,
+            "support_resistance": analysis_result["support_resistance"]
+        }
+
+    async def fetch_histories(
+        self,
+        coins: List[str],
+        days: int,
+        timeframe: Timeframe = Timeframe.DAILY
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Параллельная загрузка исторических данных (бары интервала `timeframe`)
+        с ограничением одновременных запросов
+        """
+        semaphore = asyncio.Semaphore(settings.batch_fetch_concurrency)
+
+        async def fetch(coin: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    bars = await self.get_bars(coin, days, [timeframe])
+                    return bars_to_history(bars[timeframe])
+                except Exception as e:
+                    logger.warning(f"Пропущена монета {coin} в пакетном анализе: {e}")
+                    return []
+
+        results = await asyncio.gather(*(fetch(coin) for coin in coins))
+        return dict(zip(coins, results))
+
+    async def analyze_matrix(self, matrix: np.ndarray, parallel: bool) -> Dict[str, np.ndarray]:
+        """
+        Индикаторы по матрице цен в пуле вычислений
+        """
+        chunk_size = max(settings.batch_chunk_size, 1)
+        if parallel and len(matrix) > chunk_size:
+            # Части матрицы считаются параллельно на воркерах пула
+            chunks = await asyncio.gather(*(
+                self.executor.run_array(analyze_matrix, matrix[start:start + chunk_size])
+                for start in range(0, len(matrix), chunk_size)
+            ))
+            return merge_columns(list(chunks))
+        return await self.executor.run_array(analyze_matrix, matrix)
+
+    async def analyze_batch(
+        self,
+        coins: Optional[List[str]],
+        top_n: Optional[int],
+        days: int,
+        parallel: bool = False,
+        timeframe: Timeframe = Timeframe.DAILY
+    ) -> Dict[str, Any]:
+        """
+        Пакетный технический анализ в колоночном формате
+        """
+        symbols = await self.resolve_coins(coins, top_n)
+        histories = await self.fetch_histories(symbols, days, timeframe)
+
+        coin_list, matrix, timestamps, skipped = build_price_matrix(histories)
+        columns = await self.analyze_matrix(matrix, parallel) if coin_list else {}
+
+        logger.info(f"Пакетный анализ: {len(coin_list)} монет, {matrix.shape[-1] if coin_list else 0} точек")
+        return {
+            "coins": coin_list,
+            "period_days": days,
+            "timeframe": timeframe.value,
+            "points": len(timestamps),
+            "as_of": timestamps[-1] if timestamps else None,
+            "columns": to_columnar(columns),
+            "skipped": skipped
+        }
+
+    async def get_market_table(self, top_n: int, days: int, timeframe: Timeframe = Timeframe.DAILY) -> Dict[str, Any]:
+        """
+        Таблица топ-N монет: поля снимка рынка и индикаторы, по столбцу на поле
+
+        Кэшируется по версии данных всего рынка: новый тик любой монеты сбрасывает таблицу.
+        """
+        async def compute() -> Dict[str, Any]:
+            listing = await self.crypto_service.get_crypto_prices(limit=top_n)
+            snapshot = {price.symbol: price for price in listing}
+            histories = await self.fetch_histories(list(snapshot), days, timeframe)
+
+            coin_list, matrix, timestamps, skipped = build_price_matrix(histories)
+            columns = await self.analyze_matrix(matrix, parallel=True) if coin_list else {}
+
+            for field in SNAPSHOT_FIELDS:
+                columns[field] = np.array([getattr(snapshot[coin], field) for coin in coin_list], dtype=float)
+
+            return {
+                "symbols": coin_list,
+                "columns": columns,
+                "as_of": timestamps[-1] if timestamps else None,
+                "skipped": skipped
+            }
+
+        return await self.cache.get_or_compute(DataVersionRegistry.MARKET, days, ("market_table", top_n, timeframe.value), compute)
+
+    async def screen(
+        self,
+        conditions: Sequence[Any],
+        top_n: int,
+        days: int,
+        sort_by: Optional[str],
+        sort_order: SortOrder,
+        limit: int,
+        timeframe: Timeframe = Timeframe.DAILY
+    ) -> Dict[str, Any]:
+        """
+        Скринер: все условия проверяются одним векторным проходом по таблице рынка
+        """
+        table = await self.get_market_table(top_n, days, timeframe)
+        symbols, columns = table["symbols"], table["columns"]
+
+        started = time.perf_counter()
+        if symbols:
+            mask = evaluate_conditions(columns, conditions)
+            selected = rank(columns, mask, sort_by, sort_order, limit)
+            results = rows(symbols, columns, selected)
+            matched = int(mask.sum())
+        else:
+            results, matched = [], 0
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        logger.info(f"Скринер: {matched} из {len(symbols)} монет за {elapsed_ms:.2f} мс")
+        return {
+            "universe": len(symbols),
+            "timeframe": timeframe.value,
+            "matched": matched,
+            "as_of": table["as_of"],
+            "evaluation_ms": round(elapsed_ms, 3),
+            "results": results
+        }
+
+    async def get_correlation(
+        self,
+        top_n: int,
+        window: int,
+        interval: Timeframe,
+        precision: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Матрицы корреляций и ковариаций доходностей топ-N монет за окно
+
+        Состояние по (N, окно, интервал) хранит хвост матрицы цен: пока состав топ-N
+        не меняется, в него добавляется только текущий бар из последних цен листинга,
+        история заново не загружается. Готовый результат кэшируется до прихода новых данных рынка.
+        История ограничена MAX_DAYS, поэтому для старших интервалов окно может быть заполнено не полностью.
+        """
+        bar_days = math.ceil(365 / BARS_PER_YEAR[interval])
+        days = min(max((window + 1) * bar_days, MIN_POINTS), MAX_DAYS)
+        key = (top_n, window, interval.value)
+
+        async def compute() -> Dict[str, Any]:
+            listing = await self.crypto_service.get_crypto_prices(limit=top_n)
+            latest = max(listing, key=lambda price: quote_time(price.last_updated), default=None)
+
+            state, incremental = None, False
+            previous = self.correlations.get(key)
+            if previous is not None and latest is not None and (
+                {price.symbol for price in listing} == set(previous.symbols) | set(previous.skipped)
+            ):
+                # Метка бара - его начало: одинакова для всех обновлений незакрытого бара
+                bar = bucket_starts(
+                    np.array([quote_time(latest.last_updated)], dtype=np.int64), TIMEFRAME_INTERVALS[interval]
+                )
+                prices = {price.symbol: price.price for price in listing}
+                column = np.array([[prices[symbol]] for symbol in previous.symbols], dtype=float)
+                state, incremental = self.correlations.refresh(key, previous.symbols, bar, column, None)
+                as_of = latest.last_updated
+
+            if state is None:
+                histories = await self.fetch_histories([price.symbol for price in listing], days, interval)
+
+                # Для корреляций достаточно двух доходностей (трех баров)
+                coin_list, matrix, timestamps, skipped = build_price_matrix(histories, min_points=3)
+                if len(coin_list) < 2:
+                    raise InsufficientDataError(2, len(coin_list))
+
+                bars = timestamps_to_epoch_ms(timestamps)
+                state, incremental = self.correlations.refresh(key, coin_list, bars, matrix, window, skipped)
+                as_of = timestamps[-1]
+
+            logger.info(f"Корреляции {len(state.symbols)} монет, окно {window}: {'инкрементально' if incremental else 'полный расчет'}")
+            return {
+                **self.correlations.summary(state, precision),
+                "window": window,
+                "interval": interval.value,
+                "as_of": as_of,
+                "incremental": incremental,
+                "skipped": state.skipped
+            }
+
+        return await self.cache.get_or_compute(
+            DataVersionRegistry.MARKET, days, ("correlation", top_n, window, interval.value, precision), compute
+        )
+
+    @staticmethod
+    def _backtest_selection(
+        strategy: str,
+        params: Dict[str, Any],
+        fee: float,
+        timeframe: Timeframe,
+        kind: str = "metrics"
+    ) -> tuple:
+        # "metrics" - результат перебора, "run" - полный результат с кривой капитала
+        return ("backtest", kind, timeframe.value, strategy, tuple(sorted(params.items())), fee)
+
+    async def backtest(
+        self,
+        coin: str,
+        days: int,
+        strategy: str,
+        params: Dict[str, Any],
+        fee: float = 0.0,
+        include_equity: bool = False,
+        timeframe: Timeframe = Timeframe.DAILY
+    ) -> Dict[str, Any]:
+        """
+        Бэктест одной комбинации параметров (результат кэшируется до новых данных монеты)
+        """
+        params = resolve_params(strategy, params)
+
+        async def compute() -> Dict[str, Any]:
+            bars = await self.load_bars(coin, days, timeframe)
+            return await self.executor.run_array(
+                run_backtest, bars["close"], strategy, params, fee, BARS_PER_YEAR[timeframe]
+            )
+
+        result = await self.backtests.get_or_compute(
+            coin, days, self._backtest_selection(strategy, params, fee, timeframe, "run"), compute
+        )
+        equity = result["equity"]
+        return {
+            "coin_id": coin,
+            "days": days,
+            "strategy": strategy,
+            "timeframe": timeframe.value,
+            "fee": fee,
+            **{name: value for name, value in result.items() if name != "equity"},
+            "equity": equity.tolist() if include_equity else None
+        }
+
+    async def sweep(
+        self,
+        coin: str,
+        days: int,
+        strategy: str,
+        grid: Dict[str, Sequence[Any]],
+        fee: float = 0.0,
+        sort_by: str = "sharpe",
+        top: int = 10,
+        timeframe: Timeframe = Timeframe.DAILY
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Перебор сетки параметров
+
+        Проверка сетки и загрузка цен выполняются сразу (ошибки - обычным ответом),
+        сам перебор возвращается генератором событий прогресса.
+        """
+        combinations = expand_grid(strategy, grid)
+        bars = await self.load_bars(coin, days, timeframe)
+        return self._run_sweep(coin, days, bars["close"], strategy, combinations, fee, sort_by, top, timeframe)
+
+    async def _run_sweep(
+        self,
+        coin: str,
+        days: int,
+        prices: np.ndarray,
+        strategy: str,
+        combinations: List[Dict[str, Any]],
+        fee: float,
+        sort_by: str,
+        top: int,
+        timeframe: Timeframe
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Как работает:
+        1. Комбинации, уже посчитанные для текущей версии данных, берутся из кэша
+        2. Остальные делятся на части (~4 на воркер) и считаются в пуле параллельно;
+           одновременно в пуле не больше `max_workers` частей
+        3. После каждой готовой части - событие progress, в конце - result с лучшими комбинациями
+        """
+        started = time.perf_counter()
+        total = len(combinations)
+        results: Dict[int, Dict[str, Any]] = {}
+        missing = []
+        for index, params in enumerate(combinations):
+            cached = self.backtests.get(
+                self.backtests.make_key(coin, days, self._backtest_selection(strategy, params, fee, timeframe))
+            )
+            if cached is not None:
+                results[index] = cached[0]
+            else:
+                missing.append(index)
+        cached_count = len(results)
+        yield {"type": "progress", "completed": cached_count, "total": total, "cached": cached_count}
+
+        workers = max(self.executor.max_workers, 1)
+        semaphore = asyncio.Semaphore(workers)
+
+        async def run_chunk(indices: List[int]):
+            async with semaphore:
+                chunk_started = time.perf_counter()
+                chunk = await self.executor.run_array(
+                    run_grid_chunk, prices, strategy, [combinations[index] for index in indices],
+                    fee, BARS_PER_YEAR[timeframe]
+                )
+                return indices, chunk, time.perf_counter() - chunk_started
+
+        chunk_size = max(math.ceil(len(missing) / (workers * 4)), 1)
+        tasks = [asyncio.ensure_future(run_chunk(indices)) for indices in chunked(missing, chunk_size)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                indices, chunk, elapsed = await future
+                for index, result in zip(indices, chunk):
+                    results[index] = result
+                    selection = self._backtest_selection(strategy, combinations[index], fee, timeframe)
+                    self.backtests.put(self.backtests.make_key(coin, days, selection), result, elapsed / len(chunk))
+                yield {"type": "progress", "completed": len(results), "total": total, "cached": cached_count}
+        finally:
+            # Клиент отключился или часть упала: незапущенные части не нужны
+            for task in tasks:
+                task.cancel()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Перебор {strategy} для {coin}: {total} комбинаций ({cached_count} из кэша) за {elapsed_ms:.0f} мс")
+        yield {
+            "type": "result",
+            "coin_id": coin,
+            "days": days,
+            "strategy": strategy,
+            "timeframe": timeframe.value,
+            "fee": fee,
+            "combinations": total,
+            "cached": cached_count,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "sort_by": sort_by,
+            "best": rank_results(list(results.values()), sort_by, top)
+        }
@@ -0,0 +1,177 @@
+"""
+Simulated Market Client
+Клиент с интерфейсом CoinMarketCapClient поверх синтетического рынка (режим разработки и нагрузочные тесты)
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .market_ingest import MarketIngest, market_ingest
+from .market_simulator import DAY_SECONDS, MarketSimulator, synthetic_history
+
+
+class SimulatedMarketClient:
+    """
+    Источник данных без внешнего API
+
+    Что делает:
+    - Держит MarketSimulator на `symbols` монет (символы SIM1, SIM2, ...)
+    - В фоне продвигает рынок в реальном темпе и отдает тики в общий прием (MarketIngest)
+    - Отвечает на те же вызовы, что и CoinMarketCapClient, по текущему состоянию симулятора
+    """
+
+    def __init__(
+        self,
+        symbols: int = 500,
+        seed: int = 42,
+        interval: float = 1.0,
+        steps_per_interval: int = 10,
+        ingest: MarketIngest = market_ingest
+    ):
+        self.seed = seed
+        self.interval = interval
+        self.steps_per_interval = max(steps_per_interval, 1)
+        self.ingest = ingest
+        self.simulator = MarketSimulator(
+            [f"SIM{index}" for index in range(1, symbols + 1)],
+            seed=seed,
+            step_seconds=interval / self.steps_per_interval
+        )
+        self.supply = np.exp(np.random.default_rng(seed + 1).normal(18.0, 2.0, symbols))
+        self._index = {symbol: index for index, symbol in enumerate(self.simulator.symbols)}
+        self._day_open = self.simulator.prices.copy()
+        self._day_started_ms = self.simulator.time_ms
+        self._task: Optional[asyncio.Task] = None
+
+    def advance(self, steps: Optional[int] = None) -> int:
+        """Один пакет тиков: шаг симулятора и передача в прием; возвращает число тиков"""
+        batch = self.simulator.step(steps or self.steps_per_interval)
+        if self.simulator.time_ms - self._day_started_ms >= DAY_SECONDS * 1000:
+            self._day_open = batch.prices[-1].copy()
+            self._day_started_ms = self.simulator.time_ms
+        return self.ingest.ingest(batch)
+
+    async def _run(self):
+        while True:
+            try:
+                self.advance()
+            except Exception as e:
+                logger.error(f"Ошибка симулятора рынка: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Запуск фоновой генерации тиков"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🧪 Симулятор рынка: {len(self.simulator.symbols)} монет, seed {self.seed}")
+
+    async def stop(self):
+        """Остановка фоновой генерации тиков"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _last_updated(self) -> str:
+        moment = datetime.fromtimestamp(self.simulator.time_ms / 1000, tz=timezone.utc)
+        return moment.isoformat().replace("+00:00", "Z")
+
+    def _coin(self, index: int) -> Dict[str, Any]:
+        price = float(self.simulator.prices[index])
+        symbol = self.simulator.symbols[index]
+        return {
+            "id": index + 1,
+            "name": f"Synthetic {index + 1}",
+            "symbol": symbol,
+            "slug": symbol.lower(),
+            "price": price,
+            "market_cap": price * float(self.supply[index]),
+            "volume_24h": float(self.simulator.base_volumes[index]),
+            "change_24h": (price / float(self._day_open[index]) - 1) * 100,
+            "last_updated": self._last_updated()
+        }
+
+    def _find(self, coin_id: str) -> int:
+        coin_id = str(coin_id).upper()
+        if coin_id in self._index:
+            return self._index[coin_id]
+        if coin_id.isdigit() and 1 <= int(coin_id) <= len(self.simulator.symbols):
+            return int(coin_id) - 1
+        raise Exception("Монета не найдена")
+
+    async def get_status(self) -> bool:
+        return True
+
+    async def get_crypto_prices(self, limit: int = 100, convert: str = "USD") -> List[Dict[str, Any]]:
+        """Листинг по убыванию капитализации"""
+        market_caps = self.simulator.prices * self.supply
+        order = np.argsort(-market_caps, kind="stable")[:limit]
+        return [self._coin(int(index)) for index in order]
+
+    async def get_coin_info(self, coin_id: str) -> Dict[str, Any]:
+        coin = self._coin(self._find(coin_id))
+        return {
+            **coin,
+            "change_1h": 0.0,
+            "change_7d": 0.0,
+            "circulating_supply": coin["market_cap"] / coin["price"] if coin["price"] else None,
+            "total_supply": None,
+            "max_supply": None,
+            "cmc_rank": None,
+            "tags": ["synthetic"],
+            "platform": None,
+            "description": "Синтетическая монета симулятора рынка"
+        }
+
+    async def search_cryptocurrencies(self, query: str) -> List[Dict[str, Any]]:
+        query = query.upper()
+        matches = [index for index, symbol in enumerate(self.simulator.symbols) if query in symbol][:10]
+        return [
+            {
+                "id": index + 1,
+                "name": f"Synthetic {index + 1}",
+                "symbol": self.simulator.symbols[index],
+                "slug": self.simulator.symbols[index].lower(),
+                "rank": None,
+                "is_active": 1,
+                "first_historical_data": None,
+                "last_historical_data": self._last_updated()
+            }
+            for index in matches
+        ]
+
+    async def get_market_data(self) -> Dict[str, Any]:
+        market_caps = self.simulator.prices * self.supply
+        return {
+            "total_market_cap": float(market_caps.sum()),
+            "total_volume_24h": float(self.simulator.base_volumes.sum()),
+            "market_cap_percentage": {},
+            "market_cap_change_24h": 0.0,
+            "active_cryptocurrencies": len(self.simulator.symbols),
+            "total_cryptocurrencies": len(self.simulator.symbols),
+            "active_market_pairs": len(self.simulator.symbols),
+            "last_updated": self._last_updated()
+        }
+
+    async def get_trending_coins(self) -> List[Dict[str, Any]]:
+        """Топ-10 по изменению за 24 часа"""
+        change = self.simulator.prices / self._day_open
+        order = np.argsort(-change, kind="stable")[:10]
+        return [
+            {name: value for name, value in self._coin(int(index)).items() if name != "last_updated"}
+            for index in order
+        ]
+
+    async def get_historical_data(self, coin_id: str, days: int = 30) -> List[Dict[str, Any]]:
+        """Дневная история, заканчивающаяся текущей ценой симулятора"""
+        coin = self._coin(self._find(coin_id))
+        return synthetic_history(
+            coin["symbol"], coin["price"], days, self.seed, coin["volume_24h"], coin["market_cap"]
+        )
@@ -0,0 +1,336 @@
+"""
+Snapshot Store
+Архив снимков листинга: колоночный формат с дельта-кодированием и индексом по времени
+"""
+
+import asyncio
+import io
+import os
+import struct
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .coinmarketcap_client import CoinMarketCapClient
+from .market_ingest import quote_time
+from .metrics import observe_snapshot_read, observe_snapshot_write
+from .models.crypto import CryptoPrice
+from .services.crypto_service import CryptoService
+
+# Числовые столбцы снимка (время обновления котировки - мс эпохи)
+NUMERIC_COLUMNS = ("price", "market_cap", "volume_24h", "change_24h", "last_updated")
+
+# Заголовок записи: время снимка (мс), тип (0 - опорный, 1 - дельта), длина данных
+RECORD_HEADER = struct.Struct("<qBI")
+KEYFRAME, DELTA = 0, 1
+
+
+class IndexEntry(NamedTuple):
+    """Положение записи снимка в архиве"""
+    taken_at: int
+    kind: int
+    path: str
+    offset: int
+    length: int
+
+
+class ListingState:
+    """Восстановленный снимок: монеты в порядке листинга и столбцы значений"""
+
+    def __init__(self, ids: np.ndarray, columns: Dict[str, np.ndarray], names: Dict[int, Tuple[str, str]]):
+        self.ids = ids
+        self.columns = columns
+        # ID монеты -> (название, символ)
+        self.names = names
+
+    def rows(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        count = len(self.ids) if limit is None else min(limit, len(self.ids))
+        ids = self.ids[:count].tolist()
+        columns = {name: values[:count].tolist() for name, values in self.columns.items()}
+        return [
+            {
+                "id": coin_id,
+                "name": self.names[coin_id][0],
+                "symbol": self.names[coin_id][1],
+                "price": columns["price"][i],
+                "market_cap": columns["market_cap"][i],
+                "volume_24h": columns["volume_24h"][i],
+                "change_24h": columns["change_24h"][i],
+                "last_updated": format_quote_time(int(columns["last_updated"][i])),
+            }
+            for i, coin_id in enumerate(ids)
+        ]
+
+
+def format_quote_time(epoch_ms: int) -> str:
+    """Мс эпохи -> ISO 8601 UTC, как в ответах API"""
+    moment = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def listing_state(prices: List[CryptoPrice]) -> ListingState:
+    """Снимок из листинга"""
+    ids = np.array([price.id for price in prices], dtype=np.int64)
+    columns = {
+        "price": np.array([price.price for price in prices], dtype=float),
+        "market_cap": np.array([price.market_cap for price in prices], dtype=float),
+        "volume_24h": np.array([price.volume_24h for price in prices], dtype=float),
+        "change_24h": np.array([price.change_24h for price in prices], dtype=float),
+        "last_updated": np.array([quote_time(price.last_updated) for price in prices], dtype=np.int64),
+    }
+    names = {price.id: (price.name, price.symbol) for price in prices}
+    return ListingState(ids, columns, names)
+
+
+def encode_keyframe(state: ListingState) -> Dict[str, np.ndarray]:
+    """Опорный снимок: все столбцы целиком"""
+    ids = state.ids.tolist()
+    return {
+        "ids": state.ids,
+        "names": np.array([state.names[coin_id][0] for coin_id in ids], dtype=str),
+        "symbols": np.array([state.names[coin_id][1] for coin_id in ids], dtype=str),
+        **state.columns,
+    }
+
+
+def encode_delta(previous: ListingState, state: ListingState) -> Dict[str, np.ndarray]:
+    """
+    Дельта относительно предыдущего снимка
+
+    - Порядок монет пишется, только если он изменился
+    - Для каждого столбца - позиции изменившихся значений и сами значения
+    - Названия и символы - только для монет, которых не было в предыдущем снимке
+    """
+    record: Dict[str, np.ndarray] = {}
+    if not np.array_equal(previous.ids, state.ids):
+        record["ids"] = state.ids
+
+    # Строка предыдущего снимка для каждой монеты текущего (-1 - новая монета)
+    position = {coin_id: row for row, coin_id in enumerate(previous.ids.tolist())}
+    source = np.array([position.get(coin_id, -1) for coin_id in state.ids.tolist()], dtype=np.int64)
+    is_new = source < 0
+
+    for name, values in state.columns.items():
+        carried = previous.columns[name][np.where(is_new, 0, source)] if len(previous.ids) else values
+        changed = np.flatnonzero(is_new | (carried != values))
+        record[f"{name}_idx"] = changed.astype(np.int32)
+        record[f"{name}_val"] = values[changed]
+
+    new_ids = state.ids[is_new].tolist()
+    if new_ids:
+        record["new_ids"] = np.array(new_ids, dtype=np.int64)
+        record["names"] = np.array([state.names[coin_id][0] for coin_id in new_ids], dtype=str)
+        record["symbols"] = np.array([state.names[coin_id][1] for coin_id in new_ids], dtype=str)
+    return record
+
+
+def decode_keyframe(record: Dict[str, np.ndarray]) -> ListingState:
+    ids = record["ids"]
+    names = dict(zip(ids.tolist(), zip(record["names"].tolist(), record["symbols"].tolist())))
+    return ListingState(ids, {name: record[name] for name in NUMERIC_COLUMNS}, names)
+
+
+def apply_delta(state: ListingState, record: Dict[str, np.ndarray]) -> ListingState:
+    """Следующий снимок из предыдущего и дельты"""
+    names = state.names
+    if "new_ids" in record:
+        names = {**names, **dict(zip(record["new_ids"].tolist(), zip(record["names"].tolist(), record["symbols"].tolist())))}
+
+    ids = state.ids
+    columns = state.columns
+    if "ids" in record:
+        ids = record["ids"]
+        position = {coin_id: row for row, coin_id in enumerate(state.ids.tolist())}
+        source = np.array([position.get(coin_id, 0) for coin_id in ids.tolist()], dtype=np.int64)
+        # Значения новых монет перезапишет дельта столбца
+        columns = {name: values[source] if len(values) else np.zeros(len(ids), values.dtype) for name, values in columns.items()}
+    else:
+        columns = {name: values.copy() for name, values in columns.items()}
+
+    for name in NUMERIC_COLUMNS:
+        columns[name][record[f"{name}_idx"]] = record[f"{name}_val"]
+    return ListingState(ids, columns, names)
+
+
+def pack(record: Dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **record)
+    return buffer.getvalue()
+
+
+def unpack(payload: bytes) -> Dict[str, np.ndarray]:
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+class SnapshotStore:
+    """
+    Архив снимков листинга на диске
+
+    Как работает:
+    1. Раз в `interval` секунд снимается листинг топ-`limit` монет
+    2. Снимок пишется в файл текущих суток (UTC) записью "заголовок + сжатые столбцы":
+       каждый `keyframe_interval`-й снимок (и первый в файле) - опорный, остальные -
+       только изменения относительно предыдущего
+    3. Индекс (время -> файл, смещение) держится в памяти, при запуске
+       восстанавливается чтением одних заголовков
+    4. Запрос на момент времени: бинарный поиск по индексу, чтение ближайшего
+       опорного снимка и дельт после него - не больше `keyframe_interval` записей
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        client: Optional[CoinMarketCapClient] = None,
+        limit: int = 500,
+        interval: float = 60.0,
+        keyframe_interval: int = 60
+    ):
+        self.directory = directory
+        self.client = client
+        self.limit = limit
+        self.interval = interval
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self._index: List[IndexEntry] = []
+        self._times: List[int] = []
+        self._keyframes: List[int] = []
+        self._last: Optional[ListingState] = None
+        self._since_keyframe = 0
+        self._task: Optional[asyncio.Task] = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def first(self) -> Optional[int]:
+        return self._times[0] if self._times else None
+
+    @property
+    def last(self) -> Optional[int]:
+        return self._times[-1] if self._times else None
+
+    def _segment_path(self, taken_at: int) -> str:
+        day = datetime.fromtimestamp(taken_at / 1000, tz=timezone.utc).strftime("%Y%m%d")
+        return os.path.join(self.directory, f"listing-{day}.snap")
+
+    def _load_index(self):
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith("listing-") and name.endswith(".snap")):
+                continue
+            path = os.path.join(self.directory, name)
+            size = os.path.getsize(path)
+            with open(path, "rb") as file:
+                offset = 0
+                while offset + RECORD_HEADER.size <= size:
+                    taken_at, kind, length = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))
+                    if offset + RECORD_HEADER.size + length > size:
+                        # Недописанная запись (остановка во время записи)
+                        break
+                    self._add_entry(IndexEntry(taken_at, kind, path, offset + RECORD_HEADER.size, length))
+                    offset += RECORD_HEADER.size + length
+                    file.seek(offset)
+            if offset < size:
+                # Хвост недописанной записи отрезается: иначе новые записи пойдут после
+                # него и не прочитаются при следующем запуске
+                logger.warning(f"Архив снимков: {path} обрезан до {offset} байт (было {size})")
+                os.truncate(path, offset)
+        if self._index:
+            logger.info(f"🗂️ Архив снимков листинга: {len(self._index)} снимков в {self.directory}")
+
+    def _add_entry(self, entry: IndexEntry):
+        if entry.kind == KEYFRAME:
+            self._keyframes.append(len(self._index))
+        self._index.append(entry)
+        self._times.append(entry.taken_at)
+
+    def record(self, prices: List[CryptoPrice], taken_at: Optional[int] = None) -> IndexEntry:
+        """Запись снимка листинга (время - мс эпохи, по умолчанию сейчас)"""
+        started = time.perf_counter()
+        taken_at = int(taken_at if taken_at is not None else time.time() * 1000)
+        if self._times and taken_at <= self._times[-1]:
+            taken_at = self._times[-1] + 1
+
+        state = listing_state(prices)
+        path = self._segment_path(taken_at)
+        # Опорный снимок: первый после запуска, первый в файле суток и каждый keyframe_interval-й
+        new_segment = not self._index or self._index[-1].path != path
+        if self._last is None or new_segment or self._since_keyframe >= self.keyframe_interval - 1:
+            kind, record = KEYFRAME, encode_keyframe(state)
+            self._since_keyframe = 0
+        else:
+            kind, record = DELTA, encode_delta(self._last, state)
+            self._since_keyframe += 1
+
+        payload = pack(record)
+        with open(path, "ab") as file:
+            offset = file.tell()
+            file.write(RECORD_HEADER.pack(taken_at, kind, len(payload)))
+            file.write(payload)
+
+        entry = IndexEntry(taken_at, kind, path, offset + RECORD_HEADER.size, len(payload))
+        self._add_entry(entry)
+        self._last = state
+        observe_snapshot_write(kind == KEYFRAME, len(payload), time.perf_counter() - started)
+        return entry
+
+    def _read(self, entry: IndexEntry) -> Dict[str, np.ndarray]:
+        with open(entry.path, "rb") as file:
+            file.seek(entry.offset)
+            return unpack(file.read(entry.length))
+
+    def as_of(self, moment: int) -> Optional[Tuple[int, ListingState]]:
+        """
+        Снимок, действовавший в момент `moment` (мс эпохи): последний снятый не позже него
+
+        Returns:
+            (время снимка, снимок) или None, если архив начинается позже
+        """
+        started = time.perf_counter()
+        position = bisect_right(self._times, moment) - 1
+        if position < 0:
+            return None
+
+        keyframe = self._keyframes[bisect_right(self._keyframes, position) - 1]
+        state = decode_keyframe(self._read(self._index[keyframe]))
+        for entry in self._index[keyframe + 1:position + 1]:
+            state = apply_delta(state, self._read(entry))
+
+        observe_snapshot_read(time.perf_counter() - started, position - keyframe + 1)
+        return self._times[position], state
+
+    async def capture(self) -> IndexEntry:
+        """Снятие и запись текущего листинга"""
+        prices = await CryptoService(self.client).get_crypto_prices(limit=self.limit)
+        return self.record(prices)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.capture()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка записи снимка листинга: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Запуск фоновой записи снимков"""
+        if self._task is None and self.client is not None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🗂️ Снимки листинга: топ-{self.limit} каждые {self.interval} с в {self.directory}")
+
+    async def stop(self):
+        """Остановка фоновой записи снимков"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,91 @@
+"""
+Subscription Registry
+Подписки соединений на монеты с обратным индексом "монета -> подписчики"
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Set, Tuple
+
+
+class SubscriptionRegistry:
+    """
+    Реестр подписок
+
+    Как работает:
+    - Соединения и подписки хранятся в словарях и множествах: подключение,
+      отключение, подписка и отписка - O(1) (отключение - O(число подписок соединения))
+    - Обратный индекс "монета -> соединения" позволяет на обновлении цен
+      обойти только подписчиков обновившихся монет, а не все соединения
+    - Соединения с одинаковым набором обновившихся монет группируются:
+      сообщение для каждого различного набора строится один раз
+    """
+
+    def __init__(self):
+        # ID соединения -> соединение
+        self.connections: Dict[Hashable, Any] = {}
+        # ID соединения -> его монеты
+        self.subscriptions: Dict[Hashable, Set[str]] = {}
+        # Монета -> ID подписанных соединений
+        self.subscribers: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def __contains__(self, connection_id: Hashable) -> bool:
+        return connection_id in self.connections
+
+    def add(self, connection_id: Hashable, connection: Any):
+        self.connections[connection_id] = connection
+        self.subscriptions.setdefault(connection_id, set())
+
+    def remove(self, connection_id: Hashable):
+        """Отключение: снятие всех подписок соединения"""
+        self.connections.pop(connection_id, None)
+        for symbol in self.subscriptions.pop(connection_id, ()):
+            self._discard(symbol, connection_id)
+
+    def subscribe(self, connection_id: Hashable, symbols: Iterable[str]) -> Set[str]:
+        """Подписка на монеты; возвращает текущий набор монет соединения"""
+        subscribed = self.subscriptions.setdefault(connection_id, set())
+        for symbol in symbols:
+            symbol = symbol.upper()
+            subscribed.add(symbol)
+            self.subscribers.setdefault(symbol, set()).add(connection_id)
+        return subscribed
+
+    def unsubscribe(self, connection_id: Hashable, symbols: Iterable[str]) -> Set[str]:
+        """Отписка от монет; возвращает текущий набор монет соединения"""
+        subscribed = self.subscriptions.get(connection_id, set())
+        for symbol in symbols:
+            symbol = symbol.upper()
+            subscribed.discard(symbol)
+            self._discard(symbol, connection_id)
+        return subscribed
+
+    def _discard(self, symbol: str, connection_id: Hashable):
+        subscribers = self.subscribers.get(symbol)
+        if subscribers is not None:
+            subscribers.discard(connection_id)
+            if not subscribers:
+                del self.subscribers[symbol]
+
+    def symbols(self) -> Set[str]:
+        """Монеты, на которые есть хотя бы один подписчик"""
+        return set(self.subscribers)
+
+    def fan_out(self, updates: Mapping[str, Any]) -> Dict[Tuple[str, ...], List[Hashable]]:
+        """
+        Группы получателей обновления
+
+        Returns:
+            набор обновившихся монет (в порядке `updates`) -> ID соединений, подписанных
+            ровно на эти монеты из обновления
+        """
+        interested: Dict[Hashable, List[str]] = {}
+        for symbol in updates:
+            for connection_id in self.subscribers.get(symbol, ()):
+                interested.setdefault(connection_id, []).append(symbol)
+
+        groups: Dict[Tuple[str, ...], List[Hashable]] = {}
+        for connection_id, symbols in interested.items():
+            groups.setdefault(tuple(symbols), []).append(connection_id)
+        return groups
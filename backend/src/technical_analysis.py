@@ -1,6 +1,9 @@
 import numpy as np
 from typing import List, Dict, Optional, Tuple, Any
 import math
+from .indicator_pipeline import IndicatorPipeline, DEFAULT_INDICATORS, valid_values
+from .rolling import rolling_max, rolling_min, cluster_levels
+from .series_encoding import flatten_series
 
 class TechnicalAnalyzer:
     """Класс для технического анализа криптовалют"""
@@ -11,12 +14,7 @@ class TechnicalAnalyzer:
         if len(prices) < period:
             return []
         
-        sma_values = []
-        for i in range(period - 1, len(prices)):
-            sma = sum(prices[i - period + 1:i + 1]) / period
-            sma_values.append(sma)
-        
-        return sma_values
+        return valid_values(IndicatorPipeline(prices).sma(period))
     
     @staticmethod
     def calculate_ema(prices: List[float], period: int) -> List[float]:
@@ -24,18 +22,7 @@ class TechnicalAnalyzer:
         if len(prices) < period:
             return []
         
-        ema_values = []
-        multiplier = 2 / (period + 1)
-        
-        # Первое значение EMA равно SMA
-        ema = sum(prices[:period]) / period
-        ema_values.append(ema)
-        
-        for i in range(period, len(prices)):
-            ema = (prices[i] * multiplier) + (ema * (1 - multiplier))
-            ema_values.append(ema)
-        
-        return ema_values
+        return valid_values(IndicatorPipeline(prices).ema(period))
     
     @staticmethod
     def calculate_rsi(prices: List[float], period: int = 14) -> List[float]:
@@ -43,41 +30,7 @@ class TechnicalAnalyzer:
         if len(prices) < period + 1:
             return []
         
-        rsi_values = []
-        gains = []
-        losses = []
-        
-        # Вычисляем изменения цены
-        for i in range(1, len(prices)):
-            change = prices[i] - prices[i - 1]
-            gains.append(max(change, 0))
-            losses.append(max(-change, 0))
-        
-        # Вычисляем средние значения
-        avg_gain = sum(gains[:period]) / period
-        avg_loss = sum(losses[:period]) / period
-        
-        # Первое значение RSI
-        if avg_loss == 0:
-            rsi = 100
-        else:
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-        rsi_values.append(rsi)
-        
-        # Вычисляем остальные значения RSI
-        for i in range(period, len(gains)):
-            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-            
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-            rsi_values.append(rsi)
-        
-        return rsi_values
+        return valid_values(IndicatorPipeline(prices).rsi(period))
     
     @staticmethod
     def calculate_bollinger_bands(prices: List[float], period: int = 20, std_dev: float = 2) -> Dict[str, List[float]]:
@@ -85,31 +38,8 @@ class TechnicalAnalyzer:
         if len(prices) < period:
             return {"upper": [], "middle": [], "lower": []}
         
-        sma_values = TechnicalAnalyzer.calculate_sma(prices, period)
-        upper_band = []
-        lower_band = []
-        
-        for i in range(len(sma_values)):
-            start_idx = i
-            end_idx = start_idx + period
-            if end_idx > len(prices):
-                break
-            
-            # Вычисляем стандартное отклонение
-            subset = prices[start_idx:end_idx]
-            std = np.std(subset)
-            
-            upper = sma_values[i] + (std_dev * std)
-            lower = sma_values[i] - (std_dev * std)
-            
-            upper_band.append(upper)
-            lower_band.append(lower)
-        
-        return {
-            "upper": upper_band,
-            "middle": sma_values,
-            "lower": lower_band
-        }
+        bands = IndicatorPipeline(prices).bollinger(period, std_dev)
+        return {key: valid_values(series) for key, series in bands.items()}
     
     @staticmethod
     def calculate_macd(prices: List[float], fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, List[float]]:
@@ -117,33 +47,9 @@ class TechnicalAnalyzer:
         if len(prices) < slow_period:
             return {"macd": [], "signal": [], "histogram": []}
         
-        ema_fast = TechnicalAnalyzer.calculate_ema(prices, fast_period)
-        ema_slow = TechnicalAnalyzer.calculate_ema(prices, slow_period)
-        
-        # Вычисляем MACD линию
-        macd_line = []
-        min_length = min(len(ema_fast), len(ema_slow))
-        
-        for i in range(min_length):
-            macd_value = ema_fast[i] - ema_slow[i]
-            macd_line.append(macd_value)
-        
-        # Вычисляем сигнальную линию
-        signal_line = TechnicalAnalyzer.calculate_ema(macd_line, signal_period)
-        
-        # Вычисляем гистограмму
-        histogram = []
-        min_length = min(len(macd_line), len(signal_line))
-        
-        for i in range(min_length):
-            hist_value = macd_line[i] - signal_line[i]
-            histogram.append(hist_value)
-        
-        return {
-            "macd": macd_line,
-            "signal": signal_line,
-            "histogram": histogram
-        }
+        # EMA выровнены по индексам цен, поэтому быстрая и медленная линии сопоставляются по времени
+        macd = IndicatorPipeline(prices).macd(fast_period, slow_period, signal_period)
+        return {key: valid_values(series) for key, series in macd.items()}
     
     @staticmethod
     def calculate_stochastic(prices: List[float], high_prices: List[float], low_prices: List[float], 
@@ -152,19 +58,16 @@ class TechnicalAnalyzer:
         if len(prices) < k_period:
             return {"k": [], "d": []}
         
-        k_values = []
+        # Экстремумы окон за O(n) вместо max()/min() по каждому срезу
+        highest_high = rolling_max(high_prices, k_period)
+        lowest_low = rolling_min(low_prices, k_period)
+        current_price = np.asarray(prices[k_period - 1:], dtype=float)
         
-        for i in range(k_period - 1, len(prices)):
-            highest_high = max(high_prices[i - k_period + 1:i + 1])
-            lowest_low = min(low_prices[i - k_period + 1:i + 1])
-            current_price = prices[i]
-            
-            if highest_high == lowest_low:
-                k = 50  # Нейтральное значение
-            else:
-                k = ((current_price - lowest_low) / (highest_high - lowest_low)) * 100
-            
-            k_values.append(k)
+        price_range = highest_high - lowest_low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k = (current_price - lowest_low) / price_range * 100
+        # Нейтральное значение при нулевом диапазоне
+        k_values = np.where(price_range == 0, 50.0, k).tolist()
         
         # Вычисляем %D (сглаженная %K)
         d_values = TechnicalAnalyzer.calculate_sma(k_values, d_period)
@@ -175,30 +78,28 @@ class TechnicalAnalyzer:
         }
     
     @staticmethod
-    def get_support_resistance(prices: List[float], window: int = 20) -> Dict[str, List[float]]:
-        """Определение уровней поддержки и сопротивления"""
-        if len(prices) < window:
+    def get_support_resistance(prices: List[float], window: int = 20, tolerance: float = 0.01,
+                               max_levels: int = 5) -> Dict[str, List[Dict[str, float]]]:
+        """
+        Определение уровней поддержки и сопротивления
+        
+        Точка - поддержка (сопротивление), если она не выше (не ниже) всех точек
+        в `window` слева и справа: то есть равна минимуму (максимуму) центрированного
+        окна 2 * window + 1. Окна считаются за O(n), близкие уровни кластеризуются
+        и сортируются по числу касаний.
+        """
+        if len(prices) < 2 * window + 1:
             return {"support": [], "resistance": []}
         
-        support_levels = []
-        resistance_levels = []
+        values = np.asarray(prices, dtype=float)
+        center = values[window:len(values) - window]
         
-        for i in range(window, len(prices) - window):
-            current_price = prices[i]
-            left_window = prices[i - window:i]
-            right_window = prices[i + 1:i + window + 1]
-            
-            # Проверяем на локальный минимум (поддержка)
-            if all(current_price <= price for price in left_window) and all(current_price <= price for price in right_window):
-                support_levels.append(current_price)
-            
-            # Проверяем на локальный максимум (сопротивление)
-            if all(current_price >= price for price in left_window) and all(current_price >= price for price in right_window):
-                resistance_levels.append(current_price)
+        support_levels = center[center == rolling_min(values, 2 * window + 1)]
+        resistance_levels = center[center == rolling_max(values, 2 * window + 1)]
         
         return {
-            "support": support_levels,
-            "resistance": resistance_levels
+            "support": cluster_levels(support_levels, values, tolerance, max_levels),
+            "resistance": cluster_levels(resistance_levels, values, tolerance, max_levels)
         }
     
     @staticmethod
@@ -225,42 +126,7 @@ class TechnicalAnalyzer:
     @staticmethod
     def get_trend_analysis(prices: List[float], sma_short: int = 20, sma_long: int = 50) -> Dict[str, str]:
         """Анализ тренда на основе скользящих средних"""
-        if len(prices) < sma_long:
-            return {"trend": "недостаточно данных", "strength": "неизвестно"}
-        
-        sma_short_values = TechnicalAnalyzer.calculate_sma(prices, sma_short)
-        sma_long_values = TechnicalAnalyzer.calculate_sma(prices, sma_long)
-        
-        if not sma_short_values or not sma_long_values:
-            return {"trend": "недостаточно данных", "strength": "неизвестно"}
-        
-        current_short = sma_short_values[-1]
-        current_long = sma_long_values[-1]
-        previous_short = sma_short_values[-2] if len(sma_short_values) > 1 else current_short
-        previous_long = sma_long_values[-2] if len(sma_long_values) > 1 else current_long
-        
-        # Определяем тренд
-        if current_short > current_long and previous_short > previous_long:
-            trend = "восходящий"
-        elif current_short < current_long and previous_short < previous_long:
-            trend = "нисходящий"
-        else:
-            trend = "боковой"
-        
-        # Определяем силу тренда
-        price_change = ((prices[-1] - prices[0]) / prices[0]) * 100
-        if abs(price_change) > 20:
-            strength = "сильный"
-        elif abs(price_change) > 10:
-            strength = "умеренный"
-        else:
-            strength = "слабый"
-        
-        return {
-            "trend": trend,
-            "strength": strength,
-            "price_change_percent": round(price_change, 2)
-        }
+        return IndicatorPipeline(prices).trend(sma_short, sma_long)
     
     @staticmethod
     def get_volume_analysis(prices: List[float], volumes: List[float]) -> Dict[str, str]:
@@ -310,37 +176,88 @@ class TechnicalAnalyzer:
         if not historical_data or len(historical_data) < 20:
             return {"error": "Недостаточно данных для анализа"}
         
-        # Извлекаем цены
+        # Извлекаем цены и объемы
         prices = [item.get('price', 0) for item in historical_data]
+        volumes = [item.get('volume', 0) for item in historical_data]
         
-        # Вычисляем индикаторы
-        sma_20 = TechnicalAnalyzer.calculate_sma(prices, 20)
-        sma_50 = TechnicalAnalyzer.calculate_sma(prices, 50)
-        rsi = TechnicalAnalyzer.calculate_rsi(prices, 14)
-        macd = TechnicalAnalyzer.calculate_macd(prices)
-        bollinger = TechnicalAnalyzer.calculate_bollinger_bands(prices)
+        return TechnicalAnalyzer.analyze_prices(prices, volumes)
+    
+    @staticmethod
+    def analyze_prices(prices: List[float], volumes: List[float]) -> Dict[str, Any]:
+        """Полный технический анализ по рядам цен и объемов"""
+        # Один пайплайн на запрос: SMA-20, EMA и оконные суммы считаются один раз
+        pipeline = IndicatorPipeline(prices)
+        indicators = pipeline.latest(DEFAULT_INDICATORS)
         
-        # Анализ тренда
-        trend_analysis = TechnicalAnalyzer.get_trend_analysis(prices)
+        # Анализ тренда (переиспользует SMA-20/SMA-50 из пайплайна)
+        trend_analysis = pipeline.trend()
         
         # Анализ объема (если есть данные)
-        volumes = [item.get('volume', 0) for item in historical_data]
         volume_analysis = TechnicalAnalyzer.get_volume_analysis(prices, volumes) if any(volumes) else {}
         
         return {
-            "sma_20": sma_20[-1] if sma_20 else None,
-            "sma_50": sma_50[-1] if sma_50 else None,
-            "rsi": rsi[-1] if rsi else None,
-            "macd": {
-                "macd": macd["macd"][-1] if macd["macd"] else None,
-                "signal": macd["signal"][-1] if macd["signal"] else None,
-                "histogram": macd["histogram"][-1] if macd["histogram"] else None
-            },
-            "bollinger_bands": {
-                "upper": bollinger["upper"][-1] if bollinger["upper"] else None,
-                "middle": bollinger["middle"][-1] if bollinger["middle"] else None,
-                "lower": bollinger["lower"][-1] if bollinger["lower"] else None
-            },
+            **indicators,
             "trend_analysis": trend_analysis,
             "volume_analysis": volume_analysis
-        } 
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def analyze_series(series: np.ndarray) -> Dict[str, Any]:
+        """
+        Полный анализ с уровнями поддержки/сопротивления по массиву 2 x n (цены, объемы)
+        
+        Задача для пула вычислений: массив может приходить из разделяемой памяти.
+        """
+        prices = series[0].tolist()
+        volumes = series[1].tolist()
+        
+        analysis = TechnicalAnalyzer.analyze_prices(prices, volumes)
+        analysis["support_resistance"] = TechnicalAnalyzer.get_support_resistance(prices)
+        return analysis
+    
+    @staticmethod
+    def indicator_values(prices: np.ndarray, names: List[str], series_names: List[str]) -> Dict[str, Any]:
+        """
+        Выбранные индикаторы: последние значения, а для `series_names` - полные ряды
+        
+        Задача для пула вычислений.
+        """
+        pipeline = IndicatorPipeline(prices)
+        latest = pipeline.latest(name for name in names if name not in series_names)
+        series = pipeline.series(name for name in names if name in series_names)
+        return {name: latest.get(name, series.get(name)) for name in names}
+    
+    @staticmethod
+    def materialize_series(series: np.ndarray, names: List[str], series_names: List[str]) -> Dict[str, Any]:
+        """
+        Все результаты эндпоинтов /technical/* для одной монеты по массиву 2 x n (цены, объемы)
+        
+        Задача для пула вычислений: полный анализ, значения индикаторов и тренд за один вызов.
+        """
+        prices = series[0]
+        return {
+            "analysis": TechnicalAnalyzer.analyze_series(series),
+            "indicators": TechnicalAnalyzer.indicator_values(prices, names, series_names),
+            "trend": TechnicalAnalyzer.get_trend_analysis(prices.tolist()),
+        }
+    
+    @staticmethod
+    def indicator_values_by_timeframe(closes: Dict[str, np.ndarray], names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Последние значения индикаторов для рядов нескольких интервалов
+        
+        Задача для пула вычислений: все интервалы считаются за один вызов.
+        """
+        return {
+            timeframe: IndicatorPipeline(prices).latest(names)
+            for timeframe, prices in closes.items()
+        }
+    
+    @staticmethod
+    def indicator_series(prices: np.ndarray, names: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Полные ряды выбранных индикаторов, выровненные по индексам цен (NaN в периоде прогрева)
+        
+        Задача для пула вычислений.
+        """
+        return flatten_series(IndicatorPipeline(prices).evaluate(names))
@@ -0,0 +1,163 @@
+"""
+Timer Wheel
+Иерархическое колесо таймеров: множество таймеров соединений (heartbeat, простой)
+на одном таймере цикла событий вместо задачи или TimerHandle на каждый
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Callable, List, Optional
+
+CLOCK_RESOLUTION = time.get_clock_info("monotonic").resolution
+
+
+class Timer:
+    """Таймер колеса; отмена - O(1), запись удаляется из ячейки при ее обработке"""
+
+    __slots__ = ("deadline", "callback", "args")
+
+    def __init__(self, deadline: int, callback: Callable[..., Any], args: tuple):
+        # Срок в тиках колеса
+        self.deadline = deadline
+        self.callback: Optional[Callable[..., Any]] = callback
+        self.args = args
+
+    @property
+    def cancelled(self) -> bool:
+        return self.callback is None
+
+    def cancel(self):
+        self.callback = None
+        self.args = ()
+
+
+class TimerWheel:
+    """
+    Иерархическое колесо таймеров (hashed hierarchical timing wheel)
+
+    Как работает:
+    1. Время идет тиками по `tick` секунд; у колеса `levels` уровней по `slots` ячеек,
+       ячейка уровня L охватывает slots^L тиков
+    2. Таймер кладется в ячейку самого нижнего уровня, диапазон которого вмещает
+       его срок: постановка и отмена - O(1) при любом числе таймеров
+    3. На каждом тике обрабатывается одна ячейка нижнего уровня; когда нижний
+       уровень проходит полный оборот, ячейка уровня выше раскладывается вниз
+       (каскад) - таймер перекладывается не больше `levels` раз
+    4. Колесо движет один TimerHandle цикла событий, пока есть таймеры
+
+    Точность срабатывания - один тик: таймер не срабатывает раньше срока и
+    опаздывает не больше чем на `tick`. Обратные вызовы синхронные (как у
+    loop.call_later) и выполняются в цикле событий.
+    """
+
+    def __init__(self, tick: float = 0.5, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: List[List[List[Timer]]] = [[[] for _ in range(slots)] for _ in range(levels)]
+        # Текущий тик и время цикла событий, соответствующее тику 0
+        self._now = 0
+        self._origin: Optional[float] = None
+        self._count = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        """Число запланированных таймеров (отмененные считаются до обработки их ячейки)"""
+        return self._count
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args: Any) -> Timer:
+        """Вызов callback(*args) через `delay` секунд (с точностью до тика)"""
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        if self._origin is None:
+            self._origin = now
+        # Срок отсчитывается от реального времени: колесо могло отстать от часов
+        elapsed = now - self._origin
+        if self._handle is None and not self._count:
+            # Пустое колесо не тикало: отсчет продолжается с текущего времени
+            self._now = max(self._now, math.floor(elapsed / self.tick))
+        timer = Timer(max(math.ceil((elapsed + delay) / self.tick), self._now + 1), callback, args)
+        self._place(timer)
+        self._count += 1
+        if self._handle is None:
+            self._arm(loop)
+        return timer
+
+    def _place(self, timer: Timer):
+        remaining = timer.deadline - self._now
+        span = 1
+        for level in range(self.levels):
+            if remaining < span * self.slots or level == self.levels - 1:
+                self._wheels[level][(timer.deadline // span) % self.slots].append(timer)
+                return
+            span *= self.slots
+
+    def _arm(self, loop: asyncio.AbstractEventLoop):
+        self._handle = loop.call_at(self._origin + (self._now + 1) * self.tick, self._advance)
+
+    def _advance(self):
+        """Обработка тиков до текущего времени (после задержки цикла событий - несколько)"""
+        self._handle = None
+        loop = asyncio.get_event_loop()
+        # Цикл событий запускает таймер с опережением до разрешения часов
+        target = math.floor((loop.time() - self._origin + CLOCK_RESOLUTION) / self.tick)
+        while self._now < target and self._count:
+            self._now += 1
+            self._cascade()
+            self._expire()
+        # Обратные вызовы могли поставить таймеры и уже завести колесо
+        if self._count and self._handle is None:
+            self._arm(loop)
+
+    def _cascade(self):
+        """Раскладка ячеек верхних уровней, чей диапазон начинается с текущего тика"""
+        span = self.slots
+        for level in range(1, self.levels):
+            if self._now % span:
+                break
+            slot = self._wheels[level][(self._now // span) % self.slots]
+            if slot:
+                timers = slot[:]
+                slot.clear()
+                for timer in timers:
+                    if timer.cancelled:
+                        self._count -= 1
+                    else:
+                        self._place(timer)
+            span *= self.slots
+
+    def _expire(self):
+        slot = self._wheels[0][self._now % self.slots]
+        if not slot:
+            return
+        timers = slot[:]
+        slot.clear()
+        for timer in timers:
+            if timer.cancelled:
+                self._count -= 1
+            elif timer.deadline > self._now:
+                # Срок за пределами верхнего уровня: еще не пора
+                self._place(timer)
+            else:
+                self._count -= 1
+                callback, args = timer.callback, timer.args
+                timer.cancel()
+                try:
+                    callback(*args)
+                except Exception as e:
+                    asyncio.get_event_loop().call_exception_handler({
+                        "message": f"Ошибка таймера колеса: {e}", "exception": e
+                    })
+
+    def stop(self):
+        """Отмена всех таймеров"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for wheel in self._wheels:
+            for slot in wheel:
+                for timer in slot:
+                    timer.cancel()
+                slot.clear()
+        self._count = 0
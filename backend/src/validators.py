@@ -1,6 +1,12 @@
 from pydantic import BaseModel, validator, Field
-from typing import Optional
-from .constants import MIN_LIMIT, MAX_LIMIT, MIN_DAYS, MAX_DAYS, Currency
+from typing import Dict, List, Literal, Optional
+from .constants import (
+    MIN_LIMIT, MAX_LIMIT, MIN_DAYS, MAX_DAYS, MAX_BATCH_COINS, DEFAULT_DAYS, DEFAULT_BATCH_TOP_N,
+    MAX_BACKTEST_COMBINATIONS, DEFAULT_BACKTEST_TOP, DEFAULT_ALERT_COOLDOWN, Currency, SortOrder, Timeframe
+)
+from .screener import SCREENER_FIELDS
+from .backtesting import STRATEGIES
+from .price_alerts import ALERT_KINDS
 
 class CryptoPricesRequest(BaseModel):
     """Валидация запроса цен криптовалют"""
@@ -30,6 +36,126 @@ class TechnicalAnalysisRequest(BaseModel):
             raise ValueError(f'Количество дней должно быть от {MIN_DAYS} до {MAX_DAYS}')
         return v
 
+class BatchAnalysisRequest(BaseModel):
+    """Валидация запроса пакетного технического анализа"""
+    coins: Optional[List[str]] = Field(default=None, max_length=MAX_BATCH_COINS, description="Список символов монет")
+    top_n: Optional[int] = Field(default=None, ge=1, le=MAX_BATCH_COINS, description="Топ-N монет по капитализации")
+    days: int = Field(default=DEFAULT_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней для анализа")
+    parallel: bool = Field(default=False, description="Считать большие пакеты частями на нескольких воркерах пула")
+    timeframe: Timeframe = Field(default=Timeframe.DAILY, description="Интервал баров")
+    
+    @validator('coins')
+    def validate_coins(cls, v):
+        if v is not None and not all(coin.isalnum() for coin in v):
+            raise ValueError('Символы монет должны содержать только буквы и цифры')
+        return v
+
+class ScreenerCondition(BaseModel):
+    """Условие скринера: поле, оператор сравнения, значение"""
+    field: str = Field(..., description="Поле снимка рынка или индикатор")
+    op: Literal["lt", "le", "gt", "ge", "eq", "ne"] = Field(..., description="Оператор сравнения")
+    value: float = Field(..., description="Значение для сравнения")
+    
+    @validator('field')
+    def validate_field(cls, v):
+        if v not in SCREENER_FIELDS:
+            raise ValueError(f'Поле должно быть одним из: {", ".join(SCREENER_FIELDS)}')
+        return v
+
+class ScreenerRequest(BaseModel):
+    """Валидация запроса скринера"""
+    conditions: List[ScreenerCondition] = Field(default=[], max_length=20, description="Условия (объединяются через И)")
+    top_n: int = Field(default=DEFAULT_BATCH_TOP_N, ge=1, le=MAX_BATCH_COINS, description="Размер вселенной: топ-N по капитализации")
+    days: int = Field(default=DEFAULT_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней истории для индикаторов")
+    timeframe: Timeframe = Field(default=Timeframe.DAILY, description="Интервал баров")
+    sort_by: Optional[str] = Field(default=None, description="Поле для ранжирования")
+    sort_order: SortOrder = Field(default=SortOrder.DESC, description="Порядок сортировки")
+    limit: int = Field(default=50, ge=1, le=MAX_BATCH_COINS, description="Максимум результатов")
+    
+    @validator('sort_by')
+    def validate_sort_by(cls, v):
+        if v is not None and v not in SCREENER_FIELDS:
+            raise ValueError(f'Поле сортировки должно быть одним из: {", ".join(SCREENER_FIELDS)}')
+        return v
+
+class BacktestRequest(BaseModel):
+    """Валидация запроса бэктеста одной комбинации параметров"""
+    coin_id: str = Field(..., min_length=1, max_length=10, description="ID или символ монеты")
+    days: int = Field(default=MAX_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней истории")
+    timeframe: Timeframe = Field(default=Timeframe.DAILY, description="Интервал баров")
+    strategy: str = Field(..., description="Стратегия: sma_crossover, rsi, bollinger_breakout")
+    params: Dict[str, float] = Field(default={}, description="Параметры стратегии (недостающие - по умолчанию)")
+    fee: float = Field(default=0.0, ge=0, le=0.1, description="Комиссия за изменение позиции (доля)")
+    include_equity: bool = Field(default=False, description="Вернуть кривую капитала")
+    
+    @validator('coin_id')
+    def validate_coin_id(cls, v):
+        if not v.isalnum():
+            raise ValueError('ID монеты должен содержать только буквы и цифры')
+        return v.upper()
+    
+    @validator('strategy')
+    def validate_strategy(cls, v):
+        if v not in STRATEGIES:
+            raise ValueError(f'Стратегия должна быть одной из: {", ".join(STRATEGIES)}')
+        return v
+
+class BacktestSweepRequest(BaseModel):
+    """Валидация запроса перебора сетки параметров"""
+    coin_id: str = Field(..., min_length=1, max_length=10, description="ID или символ монеты")
+    days: int = Field(default=MAX_DAYS, ge=MIN_DAYS, le=MAX_DAYS, description="Количество дней истории")
+    timeframe: Timeframe = Field(default=Timeframe.DAILY, description="Интервал баров")
+    strategy: str = Field(..., description="Стратегия: sma_crossover, rsi, bollinger_breakout")
+    grid: Dict[str, List[float]] = Field(..., description="Значения каждого параметра для перебора")
+    fee: float = Field(default=0.0, ge=0, le=0.1, description="Комиссия за изменение позиции (доля)")
+    sort_by: Literal["sharpe", "total_return", "max_drawdown"] = Field(default="sharpe", description="Метрика ранжирования")
+    top: int = Field(default=DEFAULT_BACKTEST_TOP, ge=1, le=MAX_BACKTEST_COMBINATIONS, description="Количество лучших комбинаций")
+    
+    @validator('coin_id')
+    def validate_coin_id(cls, v):
+        if not v.isalnum():
+            raise ValueError('ID монеты должен содержать только буквы и цифры')
+        return v.upper()
+    
+    @validator('strategy')
+    def validate_strategy(cls, v):
+        if v not in STRATEGIES:
+            raise ValueError(f'Стратегия должна быть одной из: {", ".join(STRATEGIES)}')
+        return v
+    
+    @validator('grid')
+    def validate_grid(cls, v):
+        combinations = 1
+        for values in v.values():
+            if not values:
+                raise ValueError('Каждый параметр сетки должен иметь хотя бы одно значение')
+            combinations *= len(values)
+        if combinations > MAX_BACKTEST_COMBINATIONS:
+            raise ValueError(f'Сетка не должна превышать {MAX_BACKTEST_COMBINATIONS} комбинаций')
+        return v
+
+class PriceAlertRequest(BaseModel):
+    """Валидация запроса создания ценового алерта"""
+    client_id: str = Field(..., min_length=1, max_length=64, description="ID клиента (получатель по WebSocket)")
+    symbol: str = Field(..., min_length=1, max_length=10, description="Символ монеты")
+    kind: str = Field(..., description="Тип: price_above, price_below, change_up, change_down")
+    value: float = Field(..., gt=0, description="Цена порога или изменение в процентах")
+    reference_price: Optional[float] = Field(default=None, gt=0, description="Опорная цена для изменения в % (по умолчанию - текущая)")
+    cooldown: float = Field(default=DEFAULT_ALERT_COOLDOWN, ge=0, le=86400, description="Пауза между срабатываниями, секунды")
+    repeat: bool = Field(default=False, description="Повторять срабатывания (иначе алерт удаляется после первого)")
+    
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        if not v.isalnum():
+            raise ValueError('Символ монеты должен содержать только буквы и цифры')
+        return v.upper()
+    
+    @validator('kind')
+    def validate_kind(cls, v):
+        if v not in ALERT_KINDS:
+            raise ValueError(f'Тип алерта должен быть одним из: {", ".join(ALERT_KINDS)}')
+        return v
+
 class SearchRequest(BaseModel):
     """Валидация запроса поиска"""
     query: str = Field(..., min_length=1, max_length=50, description="Поисковый запрос")
@@ -3,90 +3,537 @@ WebSocket Manager
 Менеджер для управления WebSocket соединениями
 """
 
-import json
 import asyncio
-from typing import List, Dict, Any
+import time
+from collections import deque
+import math
+from typing import Awaitable, Callable, Deque, Iterable, List, Dict, Any, Optional, Set, Tuple, Union
 from fastapi import WebSocket
 from loguru import logger
 
+from .backplane import Backplane
+from .constants import WS_PING_EXTENSION
+from .metrics import (
+    decrement_websocket_connection, increment_websocket_connection, observe_websocket_queue_depth,
+    observe_websocket_send, record_websocket_conflated, record_websocket_dropped, record_websocket_ping,
+    record_websocket_reaped
+)
+from .subscriptions import SubscriptionRegistry
+from .timer_wheel import Timer, TimerWheel
+from .wire_format import DEFAULT_FORMAT, Encoded, Payload, negotiate
+
+# Политики для медленных клиентов (очередь отправки заполнена)
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "conflate", "disconnect")
+
+# Ключ обновлений цен по подпискам: при слиянии данные ожидающих сообщений объединяются по монетам
+PRICE_UPDATE = "price_update"
+
+# Канал шины для адресных сообщений клиентам
+CLIENTS_CHANNEL = "clients"
+
+
+class Outbound:
+    """
+    Очередь отправки одного соединения
+
+    Элементы - (ключ сжатия, готовые текст или байты в формате соединения, время
+    постановки, исходный Payload для сообщений, которые сливаются по данным). Отправляет только задача-писатель соединения, поэтому медленный
+    клиент задерживает лишь себя.
+    """
+
+    def __init__(
+        self, websocket: WebSocket, max_size: int, client_id: Optional[str] = None, format: str = DEFAULT_FORMAT
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.client_id = client_id
+        self.format = format
+        self.items: Deque[Tuple[Optional[str], Encoded, float, Optional[Payload]]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        # Ограничение частоты: минимальный интервал между отправками обновлений (0 - без ограничения)
+        self.min_interval = 0.0
+        # Отложенные до следующей отправки: ключ -> [сообщение, замена при слиянии, число слитых]
+        self.held: Dict[str, List[Any]] = {}
+        # Монеты с обновлениями цен после последней отправки
+        self.dirty: Set[str] = set()
+        # Heartbeat: время последнего входящего кадра или pong, таймер проверки на колесе
+        # и ping на уровне протокола, если сервер его предоставляет
+        self.last_seen = 0.0
+        self.heartbeat: Optional[Timer] = None
+        self.ping: Optional[Callable[[], Awaitable[Awaitable[None]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
 class WebSocketManager:
-    """Менеджер WebSocket соединений"""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Менеджер WebSocket соединений
+
+    Как работает отправка:
+    1. У каждого соединения - ограниченная очередь и задача-писатель
+    2. Рассылка только ставит готовый текст в очереди и не ждет сокетов
+    3. Если очередь клиента заполнена, применяется политика медленного клиента:
+       - drop_oldest: выбрасывается самое старое сообщение
+       - conflate: ожидающие сообщения с тем же ключом (тема, тип) заменяются новым,
+         без совпадения ключа - как drop_oldest. Обновления цен по подпискам (у разных
+         сообщений - разные наборы монет) объединяются: по каждой монете остается
+         последняя цена
+
+       - disconnect: клиент отключается
+
+    Соединения хранятся в словарях (подключение и отключение - O(1)), подписки
+    на монеты - в реестре с обратным индексом "монета -> соединения".
+
+    Формат сообщений выбирается подпротоколом при подключении: "json" (по умолчанию,
+    текстовые кадры) или "msgpack" (бинарные кадры). Рассылка передает Payload:
+    сообщение сериализуется один раз на формат, а не на соединение.
+
+    Клиент может ограничить частоту обновлений (set_max_rate). Тогда промежуточные
+    обновления сливаются: по каждой монете и теме хранится только последнее значение,
+    а отправка идет по таймеру. Моменты отправки выровнены по сетке интервала, поэтому
+    соединения с одной частотой отправляются одним таймером и делят сообщения.
+    Память на клиента ограничена числом его монет и тем, а не частотой тиков.
+
+    Heartbeat: соединению, от которого ничего не приходило `heartbeat_interval` секунд,
+    отправляется ping - кадр ping протокола (браузер отвечает pong сам), если сервер
+    предоставляет его в scope (см. ws_compression), иначе сообщение {"type": "ping"},
+    на которое клиент отвечает {"action": "pong"}. Соединение без входящих кадров
+    и pong дольше `idle_timeout` закрывается. Проверки всех соединений - таймеры
+    одного колеса (TimerWheel), а не задача на каждое соединение; входящий кадр
+    только обновляет время (touch), таймер не переставляется.
+
+    С подключенной шиной (attach_backplane) адресные сообщения (send_to_client, алерты)
+    идут через шину: соединения клиента могут быть в другом процессе.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 100,
+        slow_consumer_policy: str = "drop_oldest",
+        heartbeat_interval: float = 0.0,
+        idle_timeout: float = 0.0,
+        wheel: Optional[TimerWheel] = None
+    ):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Политика медленного клиента должна быть одной из: {', '.join(SLOW_CONSUMER_POLICIES)}")
+        # Упорядоченное множество соединений
+        self.active_connections: Dict[WebSocket, None] = {}
+        # ID клиента -> его соединения (адресная доставка, например алертов)
+        self.client_connections: Dict[str, Set[WebSocket]] = {}
+        self.registry = SubscriptionRegistry()
+        self.outbound: Dict[WebSocket, Outbound] = {}
+        self.max_queue = max_queue
+        self.slow_consumer_policy = slow_consumer_policy
         self.connection_count = 0
-    
-    async def connect(self, websocket: WebSocket):
-        """Подключение нового клиента"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
+        # Интервал отправки -> соединения с этим ограничением частоты и таймер ближайшей отправки
+        self._throttled: Dict[float, Set[WebSocket]] = {}
+        self._flush_handles: Dict[float, asyncio.TimerHandle] = {}
+        # Последнее обновление каждой монеты (общее для всех ограниченных соединений)
+        self._latest_prices: Dict[str, Any] = {}
+        # Шина между процессами для адресных сообщений (None - только этот процесс)
+        self.backplane: Optional[Backplane] = None
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.wheel = wheel if wheel is not None else TimerWheel()
+
+    async def connect(self, websocket: WebSocket, client_id: Optional[str] = None):
+        """Подключение нового клиента (с выбором формата по подпротоколу)"""
+        subprotocol = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=subprotocol)
+        self.active_connections[websocket] = None
         self.connection_count += 1
-        
+        increment_websocket_connection()
+        if client_id is not None:
+            self.client_connections.setdefault(client_id, set()).add(websocket)
+        self.registry.add(websocket, websocket)
+
+        outbound = self.outbound[websocket] = Outbound(
+            websocket, self.max_queue, client_id, subprotocol or DEFAULT_FORMAT
+        )
+        outbound.writer = asyncio.create_task(self._write(outbound))
+        outbound.last_seen = asyncio.get_event_loop().time()
+        outbound.ping = websocket.scope.get("extensions", {}).get(WS_PING_EXTENSION, {}).get("ping")
+        if self.heartbeat_interval > 0:
+            outbound.heartbeat = self.wheel.schedule(self.heartbeat_interval, self._heartbeat, outbound)
+
         logger.info(f"🔌 WebSocket подключен. Всего соединений: {self.connection_count}")
-        
+
         # Отправляем приветственное сообщение
-        await websocket.send_text(json.dumps({
+        self.enqueue(websocket, Payload({
             "type": "connection_established",
             "message": "Подключение к Crypto Analytics API установлено",
+            "format": outbound.format,
             "timestamp": asyncio.get_event_loop().time()
         }))
-    
+
     def disconnect(self, websocket: WebSocket):
         """Отключение клиента"""
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+            del self.active_connections[websocket]
             self.connection_count -= 1
+            decrement_websocket_connection()
+            self.registry.remove(websocket)
+            outbound = self.outbound.pop(websocket, None)
+            if outbound is not None and outbound.heartbeat is not None:
+                outbound.heartbeat.cancel()
+            if outbound is not None and outbound.min_interval:
+                self._leave_throttle(websocket, outbound.min_interval)
+            if outbound is not None and outbound.client_id is not None:
+                connections = self.client_connections.get(outbound.client_id)
+                if connections is not None:
+                    connections.discard(websocket)
+                    if not connections:
+                        del self.client_connections[outbound.client_id]
+            if outbound is not None and outbound.writer is not None and outbound.writer is not asyncio.current_task():
+                outbound.writer.cancel()
             logger.info(f"🔌 WebSocket отключен. Всего соединений: {self.connection_count}")
-    
-    async def send_data(self, data: Dict[str, Any]):
-        """Отправка данных всем подключенным клиентам"""
-        if not self.active_connections:
+
+    def set_max_rate(self, websocket: WebSocket, max_rate: Optional[float]):
+        """Ограничение частоты обновлений соединения (в секунду; None или <= 0 - без ограничения)"""
+        outbound = self.outbound.get(websocket)
+        if outbound is None:
+            return
+        # Интервал округляется до мс, чтобы близкие частоты делили таймер
+        interval = round(1.0 / max_rate, 3) if max_rate and max_rate > 0 else 0.0
+        if interval == outbound.min_interval:
             return
-        
-        message = json.dumps(data)
-        disconnected = []
-        
-        for connection in self.active_connections:
+        if outbound.min_interval:
+            self._leave_throttle(websocket, outbound.min_interval)
+            self._flush_connection(outbound, {})
+        outbound.min_interval = interval
+        if interval:
+            self._throttled.setdefault(interval, set()).add(websocket)
+
+    def _leave_throttle(self, websocket: WebSocket, interval: float):
+        connections = self._throttled.get(interval)
+        if connections is None:
+            return
+        connections.discard(websocket)
+        if not connections:
+            del self._throttled[interval]
+            handle = self._flush_handles.pop(interval, None)
+            if handle is not None:
+                handle.cancel()
+
+    def _schedule_flush(self, interval: float):
+        """Таймер отправки на ближайшем узле сетки интервала"""
+        if interval in self._flush_handles:
+            return
+        loop = asyncio.get_event_loop()
+        at = (math.floor(loop.time() / interval) + 1) * interval
+        self._flush_handles[interval] = loop.call_at(at, self._flush, interval)
+
+    def _flush(self, interval: float):
+        """Отправка накопленного всем соединениям с интервалом `interval`"""
+        self._flush_handles.pop(interval, None)
+        # Одинаковые наборы монет в одной отправке получают одно сообщение
+        payloads: Dict[Tuple[str, ...], Payload] = {}
+        for websocket in list(self._throttled.get(interval, ())):
+            outbound = self.outbound.get(websocket)
+            if outbound is None:
+                continue
             try:
-                await connection.send_text(message)
+                self._flush_connection(outbound, payloads)
             except Exception as e:
-                logger.error(f"Ошибка отправки WebSocket сообщения: {e}")
-                disconnected.append(connection)
-        
-        # Удаляем отключенные соединения
-        for connection in disconnected:
-            self.disconnect(connection)
-    
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Отправка персонального сообщения"""
+                # Ошибка одного соединения не должна лишать отправки остальные
+                logger.error(f"Ошибка отложенной отправки соединению: {e}")
+
+    def _flush_connection(self, outbound: Outbound, payloads: Dict[Tuple[str, ...], Payload]):
+        if outbound.dirty:
+            symbols = tuple(sorted(outbound.dirty))
+            outbound.dirty.clear()
+            payload = payloads.get(symbols)
+            if payload is None:
+                payload = payloads[symbols] = Payload({
+                    "type": "price_update",
+                    "data": {symbol: self._latest_prices[symbol] for symbol in symbols},
+                    "timestamp": asyncio.get_event_loop().time()
+                })
+            self._push(outbound, payload, PRICE_UPDATE)
+        if outbound.held:
+            held = list(outbound.held.items())
+            outbound.held.clear()
+            for key, (message, replacement, count) in held:
+                if count > 1 and replacement is not None:
+                    message = replacement() or message
+                self._push(outbound, message, key)
+
+    def enqueue(
+        self,
+        websocket: WebSocket,
+        message: Union[Payload, str],
+        key: Optional[str] = None,
+        replacement: Optional[Callable[[], Optional[Payload]]] = None
+    ) -> bool:
+        """
+        Постановка сообщения в очередь соединения без ожидания отправки
+
+        `message` - Payload (сериализуется в формат соединения один раз на формат)
+        или уже готовый JSON-текст. Сообщения с ключом (темы) у соединения
+        с ограничением частоты откладываются до таймера: из нескольких сообщений
+        с одним ключом отправляется последнее, а если задана `replacement` -
+        ее результат (например, снимок вместо цепочки дельт).
+
+        Returns:
+            False, если сообщение не принято (соединения нет или клиент отключен политикой)
+        """
+        outbound = self.outbound.get(websocket)
+        if outbound is None:
+            return False
+        if outbound.min_interval and key is not None:
+            held = outbound.held.get(key)
+            if held is None:
+                outbound.held[key] = [message, replacement, 1]
+            else:
+                held[0] = message
+                held[2] += 1
+                record_websocket_conflated("topic")
+            self._schedule_flush(outbound.min_interval)
+            return True
+        return self._push(outbound, message, key)
+
+    def _push(self, outbound: Outbound, message: Union[Payload, str], key: Optional[str] = None) -> bool:
+        """Сериализация в формат соединения и постановка в очередь с политикой медленного клиента"""
+        websocket = outbound.websocket
+        if isinstance(message, str):
+            if outbound.format == DEFAULT_FORMAT:
+                data = message
+            else:
+                data = Payload.from_json(message).encode(outbound.format)
+        else:
+            data = message.encode(outbound.format)
+
+        items = outbound.items
+        if len(items) >= outbound.max_size:
+            policy = self.slow_consumer_policy
+            if policy == "disconnect":
+                record_websocket_dropped(policy)
+                logger.warning("Медленный WebSocket клиент отключен: очередь отправки заполнена")
+                self.disconnect(websocket)
+                asyncio.create_task(self._close(websocket))
+                return False
+
+            record_websocket_dropped(policy)
+            if policy == "conflate" and key is not None and any(item[0] == key for item in items):
+                if self._mergeable(key, message):
+                    message = self._merge_prices([item[3] for item in items if item[0] == key], message)
+                    data = message.encode(outbound.format)
+                # Новое сообщение заменяет все ожидающие с тем же ключом (последнее значение темы)
+                remaining = [item for item in items if item[0] != key]
+                items.clear()
+                items.extend(remaining)
+            else:
+                items.popleft()
+
+        merged = message if self._mergeable(key, message) else None
+        items.append((key, data, time.perf_counter(), merged))
+        outbound.ready.set()
+        observe_websocket_queue_depth(len(items))
+        return True
+
+    @staticmethod
+    def _mergeable(key: Optional[str], message: Union[Payload, str]) -> bool:
+        """Обновление цен в виде {символ: цена}: такие сообщения сливаются по монетам"""
+        return (
+            key == PRICE_UPDATE
+            and isinstance(message, Payload)
+            and message.message is not None
+            and isinstance(message.message.get("data"), dict)
+        )
+
+    @staticmethod
+    def _merge_prices(pending: List[Optional[Payload]], payload: Payload) -> Payload:
+        """Ожидающие обновления цен и новое - одним сообщением (последняя цена каждой монеты)"""
+        data: Dict[str, Any] = {}
+        for item in pending + [payload]:
+            if item is not None and item.message is not None:
+                data.update(item.message.get("data") or {})
+        return Payload({"type": PRICE_UPDATE, "data": data, "timestamp": (payload.message or {}).get("timestamp")})
+
+    async def _write(self, outbound: Outbound):
+        """Задача-писатель: отправка очереди соединения по порядку"""
+        websocket = outbound.websocket
+        items = outbound.items
         try:
-            await websocket.send_text(message)
+            while True:
+                if not items:
+                    outbound.ready.clear()
+                    await outbound.ready.wait()
+                    continue
+                _, data, enqueued_at, _ = items.popleft()
+                if isinstance(data, bytes):
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
+                observe_websocket_send(time.perf_counter() - enqueued_at)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Ошибка отправки персонального сообщения: {e}")
+            logger.error(f"Ошибка отправки WebSocket сообщения: {e}")
             self.disconnect(websocket)
-    
-    async def broadcast(self, message: str):
-        """Широковещательная отправка сообщения"""
+
+    async def _close(self, websocket: WebSocket, code: int = 1008):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    def touch(self, websocket: WebSocket):
+        """Входящий кадр от клиента: соединение живо"""
+        outbound = self.outbound.get(websocket)
+        if outbound is not None:
+            outbound.last_seen = asyncio.get_event_loop().time()
+
+    def _heartbeat(self, outbound: Outbound):
+        """Проверка соединения по таймеру колеса: закрытие по простою или ping молчащему"""
+        websocket = outbound.websocket
+        if self.outbound.get(websocket) is not outbound:
+            return
+        now = asyncio.get_event_loop().time()
+        silent = now - outbound.last_seen
+        if self.idle_timeout > 0 and silent >= self.idle_timeout:
+            record_websocket_reaped()
+            logger.warning(f"WebSocket соединение закрыто: нет входящих кадров {silent:.0f} с")
+            self.disconnect(websocket)
+            asyncio.create_task(self._close(websocket, code=1001))
+            return
+        if silent >= self.heartbeat_interval:
+            if outbound.ping is not None:
+                record_websocket_ping("protocol")
+                asyncio.create_task(self._ping(outbound))
+            else:
+                record_websocket_ping("message")
+                self._push(outbound, Payload({"type": "ping", "timestamp": now}), "ping")
+        # Следующая проверка - через интервал, но не позже истечения простоя
+        delay = self.heartbeat_interval
+        if self.idle_timeout > 0:
+            delay = min(delay, max(self.idle_timeout - silent, 0.0))
+        outbound.heartbeat = self.wheel.schedule(delay, self._heartbeat, outbound)
+
+    async def _ping(self, outbound: Outbound):
+        """Кадр ping протокола; ответ pong обновляет время соединения (задача живет до отправки кадра)"""
+        try:
+            pong = await outbound.ping()
+        except Exception:
+            return
+        pong.add_done_callback(lambda future: self._pong(outbound, future))
+
+    def _pong(self, outbound: Outbound, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None:
+            outbound.last_seen = asyncio.get_event_loop().time()
+
+    async def send_data(self, data: Dict[str, Any]):
+        """Отправка данных всем подключенным клиентам"""
         if not self.active_connections:
             return
-        
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Ошибка широковещательной отправки: {e}")
-                disconnected.append(connection)
-        
-        # Удаляем отключенные соединения
-        for connection in disconnected:
-            self.disconnect(connection)
-    
+
+        payload = Payload(data)
+        for connection in list(self.active_connections):
+            self.enqueue(connection, payload, data.get("type"))
+
+    async def attach_backplane(self, backplane: Backplane):
+        """Подписка процесса на адресные сообщения клиентам из шины"""
+        await backplane.subscribe(CLIENTS_CHANNEL, self._relay_to_client)
+        self.backplane = backplane
+
+    async def detach_backplane(self):
+        if self.backplane is not None:
+            backplane, self.backplane = self.backplane, None
+            await backplane.unsubscribe(CLIENTS_CHANNEL)
+
+    async def _relay_to_client(self, envelope: Dict[str, Any]):
+        self._send_to_local_client(envelope["client_id"], envelope["data"])
+
+    async def send_to_client(self, client_id: str, data: Dict[str, Any]) -> int:
+        """
+        Отправка данных всем соединениям клиента
+
+        Returns:
+            число принявших очередей этого процесса; с шиной сообщение доставляется
+            всеми процессами, и результат - 0
+        """
+        if self.backplane is not None:
+            await self.backplane.publish(CLIENTS_CHANNEL, {"client_id": client_id, "data": data})
+            return 0
+        return self._send_to_local_client(client_id, data)
+
+    def _send_to_local_client(self, client_id: str, data: Dict[str, Any]) -> int:
+        connections = self.client_connections.get(client_id)
+        if not connections:
+            return 0
+
+        payload = Payload(data)
+        return sum(self.enqueue(connection, payload) for connection in list(connections))
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        """Отправка персонального сообщения"""
+        self.enqueue(websocket, message)
+
+    async def broadcast(self, message: str):
+        """Широковещательная отправка сообщения"""
+        payload = Payload.from_json(message)
+        for connection in list(self.active_connections):
+            self.enqueue(connection, payload)
+
+    def subscribe(self, websocket: WebSocket, symbols: Iterable[str]) -> Set[str]:
+        """Подписка соединения на обновления монет"""
+        return self.registry.subscribe(websocket, symbols)
+
+    def unsubscribe(self, websocket: WebSocket, symbols: Iterable[str]) -> Set[str]:
+        """Отписка соединения от обновлений монет"""
+        subscribed = self.registry.unsubscribe(websocket, symbols)
+        outbound = self.outbound.get(websocket)
+        if outbound is not None and outbound.dirty:
+            outbound.dirty &= subscribed
+        return subscribed
+
+    def publish_prices(self, updates: Dict[str, Any]) -> int:
+        """
+        Рассылка обновлений цен подписчикам монет
+
+        Обходятся только подписчики обновившихся монет; сообщение для каждого
+        различного набора монет строится один раз и сериализуется один раз на формат.
+        Соединениям с ограничением частоты монеты только помечаются к отправке по таймеру.
+
+        Returns:
+            количество соединений, получивших обновление
+        """
+        groups = self.registry.fan_out(updates)
+        timestamp = asyncio.get_event_loop().time()
+        if self._throttled:
+            self._latest_prices.update(updates)
+        delivered = 0
+        conflated = 0
+        for symbols, connections in groups.items():
+            payload = None
+            for connection in connections:
+                outbound = self.outbound.get(connection)
+                if outbound is None:
+                    continue
+                if outbound.min_interval:
+                    if not outbound.dirty.isdisjoint(symbols):
+                        conflated += 1
+                    outbound.dirty.update(symbols)
+                    self._schedule_flush(outbound.min_interval)
+                    delivered += 1
+                    continue
+                if payload is None:
+                    payload = Payload({
+                        "type": "price_update",
+                        "data": {symbol: updates[symbol] for symbol in symbols},
+                        "timestamp": timestamp
+                    })
+                delivered += self._push(outbound, payload, PRICE_UPDATE)
+        if conflated:
+            record_websocket_conflated("price", conflated)
+        return delivered
+
     def get_connection_count(self) -> int:
         """Получение количества активных соединений"""
         return self.connection_count
-    
+
     async def send_price_update(self, prices: List[Dict[str, Any]]):
         """Отправка обновления цен"""
         await self.send_data({
@@ -94,7 +541,7 @@ class WebSocketManager:
             "data": prices,
             "timestamp": asyncio.get_event_loop().time()
         })
-    
+
     async def send_market_update(self, market_data: Dict[str, Any]):
         """Отправка обновления рыночных данных"""
         await self.send_data({
@@ -102,17 +549,20 @@ class WebSocketManager:
             "data": market_data,
             "timestamp": asyncio.get_event_loop().time()
         })
-    
-    async def send_alert(self, alert_type: str, message: str, data: Dict[str, Any] = None):
-        """Отправка алерта"""
+
+    async def send_alert(self, alert_type: str, message: str, data: Dict[str, Any] = None, client_id: Optional[str] = None):
+        """Отправка алерта (всем или только соединениям клиента `client_id`)"""
         alert_data = {
             "type": "alert",
             "alert_type": alert_type,
             "message": message,
             "timestamp": asyncio.get_event_loop().time()
         }
-        
+
         if data:
             alert_data["data"] = data
-        
-        await self.send_data(alert_data) 
\ No newline at end of file
+
+        if client_id is not None:
+            await self.send_to_client(client_id, alert_data)
+        else:
+            await self.send_data(alert_data)
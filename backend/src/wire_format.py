@@ -0,0 +1,84 @@
+"""
+Wire Format
+Форматы сообщений WebSocket: JSON (текстовые кадры) и MessagePack (бинарные кадры),
+выбор формата через подпротокол WebSocket
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+import msgpack
+
+from .metrics import observe_websocket_serialization
+
+Encoded = Union[str, bytes]
+
+# Подпротокол (Sec-WebSocket-Protocol) -> функция сериализации
+ENCODERS: Dict[str, Callable[[Any], Encoded]] = {
+    "json": json.dumps,
+    "msgpack": lambda message: msgpack.packb(message, use_bin_type=True),
+}
+DEFAULT_FORMAT = "json"
+
+
+def negotiate(offered: Iterable[str]) -> Optional[str]:
+    """
+    Первый поддерживаемый подпротокол из предложенных клиентом (в порядке его предпочтения)
+    или None - тогда соединение принимается без подпротокола и получает JSON
+    """
+    for subprotocol in offered:
+        if subprotocol in ENCODERS:
+            return subprotocol
+    return None
+
+
+def decode(data: Encoded) -> Any:
+    """Входящее сообщение клиента: JSON из текстового кадра или MessagePack из бинарного"""
+    if isinstance(data, bytes):
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+class Payload:
+    """
+    Сообщение рассылки, сериализуемое не больше одного раза на формат
+
+    Один объект передается всем получателям: первый получатель в каждом формате
+    сериализует сообщение, остальные получают готовые строку или байты.
+    """
+
+    __slots__ = ("message", "source", "_encoded")
+
+    def __init__(self, message: Optional[Dict[str, Any]], source: Optional[str] = None):
+        self.message = message
+        self.source = source or (message.get("type") if message else None) or "message"
+        self._encoded: Dict[str, Encoded] = {}
+
+    @classmethod
+    def from_json(cls, text: str, source: Optional[str] = None) -> "Payload":
+        """Сообщение, уже сериализованное в JSON (разбирается только для других форматов)"""
+        payload = cls(None, source)
+        payload._encoded[DEFAULT_FORMAT] = text
+        return payload
+
+    @classmethod
+    def frozen(cls, message: Dict[str, Any], source: Optional[str] = None) -> "Payload":
+        """
+        Сообщение, объекты которого могут измениться после публикации (состояние темы):
+        JSON сериализуется сразу, остальные форматы строятся из него
+        """
+        payload = cls(message, source)
+        payload.encode(DEFAULT_FORMAT)
+        payload.message = None
+        return payload
+
+    def encode(self, format: str = DEFAULT_FORMAT) -> Encoded:
+        encoded = self._encoded.get(format)
+        if encoded is None:
+            started = time.perf_counter()
+            if self.message is None:
+                self.message = json.loads(self._encoded[DEFAULT_FORMAT])
+            encoded = self._encoded[format] = ENCODERS[format](self.message)
+            observe_websocket_serialization(self.source, format, time.perf_counter() - started, len(encoded))
+        return encoded
@@ -0,0 +1,104 @@
+"""
+WebSocket Compression
+permessage-deflate (RFC 7692) с настраиваемыми порогом, уровнем и окном сжатия;
+ping протокола для heartbeat приложения
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets import frames
+from websockets.extensions.base import Extension
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.typing import ExtensionParameter
+
+from .config import settings
+from .constants import WS_PING_EXTENSION
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """
+    permessage-deflate, не сжимающий короткие сообщения
+
+    RFC 7692 разрешает отправлять отдельные сообщения без сжатия (бит RSV1 не
+    выставлен): для коротких сообщений (heartbeat, дельты) заголовок и сброс
+    deflate дороже экономии.
+    """
+
+    def __init__(self, *args: Any, min_size: int = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        # Пропускается только сообщение из одного кадра: продолжения сжатого сообщения сжимаются
+        if (
+            frame.opcode in (frames.Opcode.TEXT, frames.Opcode.BINARY)
+            and frame.fin
+            and len(frame.data) < self.min_size
+        ):
+            return frame
+        return super().encode(frame)
+
+
+class ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    """Серверная фабрика permessage-deflate с порогом сжатия"""
+
+    def __init__(self, min_size: int = 0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+    def process_request_params(
+        self, params: Sequence[ExtensionParameter], accepted_extensions: Sequence[Extension]
+    ) -> Tuple[List[ExtensionParameter], Extension]:
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def deflate_factory(
+    min_size: int = settings.ws_deflate_min_size,
+    level: int = settings.ws_deflate_level,
+    window_bits: Optional[int] = settings.ws_deflate_window_bits,
+    no_context_takeover: bool = settings.ws_deflate_no_context_takeover,
+) -> ThresholdDeflateFactory:
+    """
+    Фабрика permessage-deflate по настройкам
+
+    Сжатие идет отдельно на каждом соединении: уровень задает цену CPU, окно
+    и контекст между сообщениями (context takeover) - память на соединение
+    (до ~256 КБ при окне 15 бит) и степень сжатия повторяющихся сообщений.
+    """
+    compress_settings: Dict[str, Any] = {"level": level}
+    return ThresholdDeflateFactory(
+        min_size=min_size,
+        server_no_context_takeover=no_context_takeover,
+        server_max_window_bits=window_bits,
+        compress_settings=compress_settings,
+    )
+
+
+class CompressedWebSocketProtocol(WebSocketProtocol):
+    """
+    WebSocket протокол uvicorn (реализация websockets) с настраиваемым permessage-deflate
+
+    Запуск: uvicorn.run(..., ws=CompressedWebSocketProtocol). Сжатие согласуется,
+    только если клиент его предлагает; выключается WS_DEFLATE_ENABLED=false.
+
+    Приложение получает ping протокола через расширение scope WS_PING_EXTENSION:
+    heartbeat WebSocketManager отправляет кадры ping по колесу таймеров, поэтому
+    keepalive-задачу websockets на каждое соединение можно выключить (ws_ping_interval=None).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.available_extensions = [deflate_factory()] if self.config.ws_per_message_deflate else []
+
+    async def run_asgi(self) -> None:
+        self.scope.setdefault("extensions", {})[WS_PING_EXTENSION] = {"ping": self.ping}
+        await super().run_asgi()
@@ -6,6 +6,8 @@ from typing import Dict, Set, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 import logging
 from metrics import increment_websocket_connection, decrement_websocket_connection, increment_websocket_message
+from src.delta import moved
+from src.subscriptions import SubscriptionRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,19 +15,21 @@ logger = logging.getLogger(__name__)
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
-        self.subscriptions: Dict[WebSocket, Set[str]] = {}
+        # Подписки с обратным индексом "монета -> соединения"
+        self.registry = SubscriptionRegistry()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.add(websocket)
-        self.subscriptions[websocket] = set()
+        self.registry.add(websocket, websocket)
         increment_websocket_connection()  # Увеличиваем счетчик метрик
         logger.info(f"Новое WebSocket соединение. Всего соединений: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        if websocket in self.subscriptions:
-            del self.subscriptions[websocket]
+        if websocket not in self.active_connections:
+            return
+        self.active_connections.discard(websocket)
+        self.registry.remove(websocket)
         decrement_websocket_connection()  # Уменьшаем счетчик метрик
         logger.info(f"WebSocket соединение закрыто. Осталось соединений: {len(self.active_connections)}")
 
@@ -51,20 +55,22 @@ class ConnectionManager:
 
     def subscribe_to_coin(self, websocket: WebSocket, coin_symbol: str):
         """Подписка на обновления конкретной монеты"""
-        if websocket in self.subscriptions:
-            self.subscriptions[websocket].add(coin_symbol.upper())
+        if websocket in self.registry:
+            self.registry.subscribe(websocket, [coin_symbol])
             logger.info(f"Подписка на {coin_symbol.upper()} для соединения")
 
     def unsubscribe_from_coin(self, websocket: WebSocket, coin_symbol: str):
         """Отписка от обновлений конкретной монеты"""
-        if websocket in self.subscriptions:
-            self.subscriptions[websocket].discard(coin_symbol.upper())
+        if websocket in self.registry:
+            self.registry.unsubscribe(websocket, [coin_symbol])
             logger.info(f"Отписка от {coin_symbol.upper()} для соединения")
 
 class CryptoWebSocketHandler:
-    def __init__(self):
+    def __init__(self, epsilon: float = 1e-5):
         self.manager = ConnectionManager()
         self.price_cache: Dict[str, float] = {}
+        # Относительный порог: более мелкие изменения цены не рассылаются
+        self.epsilon = epsilon
         self.is_running = False
 
     async def handle_websocket(self, websocket: WebSocket):
@@ -112,7 +118,7 @@ class CryptoWebSocketHandler:
                         websocket
                     )
             
-            elif action == "get_prices":
+            elif action in ("get_prices", "resync"):
                 await self.manager.send_personal_message(
                     json.dumps({
                         "type": "prices",
@@ -150,22 +156,25 @@ class CryptoWebSocketHandler:
 
     async def update_prices(self, prices: Dict[str, float]):
         """Обновление цен и отправка уведомлений подписчикам"""
-        self.price_cache.update(prices)
+        # Рассылаются только цены, сдвинувшиеся больше порога с последней рассылки
+        changed = {
+            coin: price for coin, price in prices.items()
+            if moved(self.price_cache.get(coin), price, self.epsilon)
+        }
+        self.price_cache.update(changed)
         
-        # Отправляем обновления подписчикам
-        for websocket, subscriptions in self.manager.subscriptions.items():
-            relevant_prices = {
-                coin: price for coin, price in prices.items() 
-                if coin in subscriptions
-            }
-            
-            if relevant_prices:
+        # Отправляем обновления только подписчикам обновившихся монет;
+        # сообщение для каждого различного набора монет сериализуется один раз
+        timestamp = asyncio.get_event_loop().time()
+        for coins, connections in self.manager.registry.fan_out(changed).items():
+            message = json.dumps({
+                "type": "price_update",
+                "data": {coin: changed[coin] for coin in coins},
+                "timestamp": timestamp
+            })
+            for websocket in connections:
                 try:
-                    await websocket.send_text(json.dumps({
-                        "type": "price_update",
-                        "data": relevant_prices,
-                        "timestamp": asyncio.get_event_loop().time()
-                    }))
+                    await websocket.send_text(message)
                 except Exception as e:
                     logger.error(f"Ошибка отправки обновления: {e}")
                     self.manager.disconnect(websocket)